@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the pet game.
+
+Each module can be run on its own with ``python -m benchmarks.<module>``.
+"""
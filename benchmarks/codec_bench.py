@@ -0,0 +1,35 @@
+"""
+Benchmark: save-file size and encode/decode throughput for each codec.
+
+Usage: python -m benchmarks.codec_bench [pets]
+"""
+import datetime
+import sys
+import time
+from src.serialization import CODECS
+from benchmarks.datagen import make_pets
+
+
+def main(pet_count=20_000):
+    """Print size and throughput per codec; 'json' is the original format"""
+    pets = make_pets(pet_count, datetime.datetime.now())
+    print(f"Pets: {pet_count:,}")
+    print(f"{'codec':<14}{'bytes/pet':>10}{'encode/s':>12}{'decode/s':>12}")
+
+    for name, codec in CODECS.items():
+        start = time.perf_counter()
+        payloads = [codec.encode_pet(pet) for pet in pets]
+        encode_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for payload in payloads:
+            codec.decode_pet(payload)
+        decode_seconds = time.perf_counter() - start
+
+        size = sum(len(payload) for payload in payloads) / pet_count
+        print(f"{name:<14}{size:>10.1f}{pet_count / encode_seconds:>12,.0f}{pet_count / decode_seconds:>12,.0f}")
+
+
+if __name__ == "__main__":
+    count_arg = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    main(count_arg)
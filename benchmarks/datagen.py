@@ -0,0 +1,112 @@
+"""
+Synthetic data generator: N users with M pets each, saved through data_handler.
+
+Records are written under ./data of the current directory, so run it from a
+scratch directory (the benchmark suite does this for you).
+
+Usage: python -m benchmarks.datagen [users] [pets_per_user]
+"""
+import datetime
+import os
+import random
+import sys
+from src.config import PETS_PATH
+from src.user import User
+from src.data_handler import save_pet, save_user, Session
+from src.pet import Pet
+
+
+def make_pets(count, now, seed=0):
+    """
+    Build pets in random states, last updated up to 30 days before now.
+
+    Args:
+        count (int): Number of pets
+        now (datetime.datetime): Reference time
+        seed (int): Random seed
+
+    Returns:
+        list[Pet]: Generated pets
+    """
+    rng = random.Random(seed)
+    pets = []
+    for i in range(count):
+        pet = Pet(f"pet{i}", owner=f"user{i % 1000}")
+        pet.sleep = rng.random() < 0.3
+        pet.auto_sleep = pet.sleep and rng.random() < 0.5
+        pet.energy = rng.uniform(0, 9.9) if pet.auto_sleep else rng.uniform(0, 100)
+        pet.fullness = rng.uniform(0, 100)
+        pet.last_update = now - datetime.timedelta(seconds=rng.uniform(0, 30 * 86400))
+        pet.sleep_start = pet.last_update if pet.sleep else None
+        pets.append(pet)
+    return pets
+
+
+def make_users(user_count, pets_per_user, now, seed=0):
+    """
+    Build users and their pets in random states.
+
+    Args:
+        user_count (int): Number of users
+        pets_per_user (int): Pets owned by each user
+        now (datetime.datetime): Reference time
+        seed (int): Random seed
+
+    Returns:
+        list[tuple[User, list[tuple[str, Pet]]]]: Each user with their (pet path, pet) pairs
+    """
+    rng = random.Random(seed)
+    pets = make_pets(user_count * pets_per_user, now, seed)
+    users = []
+    for i in range(user_count):
+        user = User(f"user{i}", datetime.date(1970, 1, 1) + datetime.timedelta(days=rng.randrange(20000)))
+        user.first_login_date = now.date() - datetime.timedelta(days=rng.randrange(365))
+        user.last_login_date = now.date() - datetime.timedelta(days=rng.randrange(30))
+        user.current_login_streak = rng.randrange(1, 30)
+        user.longest_login_streak = user.current_login_streak + rng.randrange(30)
+        user.games_played = rng.randrange(200)
+        user.games_won = rng.randrange(user.games_played + 1)
+
+        owned = []
+        for pet in pets[i * pets_per_user:(i + 1) * pets_per_user]:
+            pet.owner = user.username
+            filename = f"{pet.name}.json"
+            user.add_pet(filename, pet.name)
+            owned.append((os.path.join(PETS_PATH, filename), pet))
+        if owned:
+            user.set_current_pet(os.path.basename(owned[0][0]))
+        users.append((user, owned))
+    return users
+
+
+def generate_dataset(user_count, pets_per_user, seed=0):
+    """
+    Generate users and pets and save them to ./data.
+
+    Args:
+        user_count (int): Number of users
+        pets_per_user (int): Pets owned by each user
+        seed (int): Random seed
+
+    Returns:
+        list[tuple[User, list[tuple[str, Pet]]]]: What was saved, as returned by make_users()
+    """
+    users = make_users(user_count, pets_per_user, datetime.datetime.now(), seed)
+    with Session():
+        for user, owned in users:
+            for filename, pet in owned:
+                save_pet(pet, filename, quiet=True)
+            save_user(user)
+    return users
+
+
+def main(user_count=1000, pets_per_user=3):
+    """Generate the dataset in ./data"""
+    generate_dataset(user_count, pets_per_user)
+    print(f"Saved {user_count:,} users with {pets_per_user} pets each to ./data")
+
+
+if __name__ == "__main__":
+    users_arg = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    pets_arg = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    main(users_arg, pets_arg)
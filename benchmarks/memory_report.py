@@ -0,0 +1,89 @@
+"""
+Memory report: bytes per Pet and User instance, measured with tracemalloc.
+
+Compares the current compact classes against a baseline with a per-instance
+__dict__ and datetime timestamps, which is how pets used to be stored.
+
+Usage: python -m benchmarks.memory_report [count]
+"""
+import datetime
+import sys
+import tracemalloc
+from src.pet import Pet
+from src.user import User
+
+
+class DictPet:
+    """Baseline pet layout: __dict__ attributes and datetime timestamps"""
+
+    def __init__(self, name, owner, now):
+        self.name = name
+        self.owner = owner
+        self.birthday = now.date()
+        self.age = 0
+        self.sleep = True
+        self.sleep_start = now - datetime.timedelta(hours=1)
+        self.auto_sleep = True
+        self.last_update = now
+        self.fullness = 20.0
+        self.energy = 0.0
+        self.fullness_zero_since = now - datetime.timedelta(hours=2)
+        self.energy_zero_since = now - datetime.timedelta(hours=1)
+
+
+def make_pet(name, owner, now):
+    """Build a Pet with every timestamp set"""
+    pet = Pet(name, owner)
+    pet.sleep = True
+    pet.auto_sleep = True
+    pet.sleep_start = now - datetime.timedelta(hours=1)
+    pet.last_update = now
+    pet.energy = 0.0
+    pet.fullness_zero_since = now - datetime.timedelta(hours=2)
+    pet.energy_zero_since = now - datetime.timedelta(hours=1)
+    return pet
+
+
+def bytes_per_instance(factory, count):
+    """
+    Measure the memory allocated per object built by factory.
+
+    Args:
+        factory (callable): Called with an index, returns one object
+        count (int): Number of objects to build
+
+    Returns:
+        float: Bytes allocated per object
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    # Don't count the list holding the objects
+    allocated -= sys.getsizeof(objects)
+    return allocated / count
+
+
+def main(count=100_000):
+    """Print bytes per pet and per user"""
+    now = datetime.datetime.now()
+    # Names and owners are shared so only per-instance overhead is measured
+    names = [f"pet{i}" for i in range(count)]
+
+    baseline = bytes_per_instance(lambda i: DictPet(names[i], "owner", now), count)
+    compact = bytes_per_instance(lambda i: make_pet(names[i], "owner", now), count)
+    users = bytes_per_instance(lambda i: User(names[i]), count)
+
+    print(f"Instances: {count:,}")
+    print(f"Pet (__dict__ + datetime baseline): {baseline:7.1f} bytes/pet")
+    print(f"Pet (__slots__ + epoch seconds):    {compact:7.1f} bytes/pet")
+    print(f"Saved: {baseline - compact:.1f} bytes/pet ({(1 - compact / baseline) * 100:.0f}%)")
+    print(f"User (__slots__):                   {users:7.1f} bytes/user")
+
+
+if __name__ == "__main__":
+    count_arg = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    main(count_arg)
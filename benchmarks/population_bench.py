@@ -0,0 +1,40 @@
+"""
+Benchmark: vectorized PetPopulation updates versus the scalar Pet loop.
+
+Usage: python -m benchmarks.population_bench [pets] [scalar_sample]
+"""
+import datetime
+import sys
+import time
+from src.population import PetPopulation
+from benchmarks.datagen import make_pets
+
+
+def main(pet_count=1_000_000, scalar_sample=20_000):
+    """Run the benchmark and print throughput per million pets"""
+    now = datetime.datetime.now()
+    pets = make_pets(pet_count, now)
+    population = PetPopulation.from_pets(pets)
+
+    sample = pets[:scalar_sample]
+    start = time.perf_counter()
+    for pet in sample:
+        pet.update_stats(now)
+    scalar_seconds = (time.perf_counter() - start) * pet_count / len(sample)
+
+    start = time.perf_counter()
+    population.update_stats(now)
+    vector_seconds = time.perf_counter() - start
+
+    per_million = 1_000_000 / pet_count
+    print(f"Pets: {pet_count:,}")
+    print(f"Scalar Pet.update_stats:     {scalar_seconds * per_million:8.3f} s per million pets "
+          f"(extrapolated from {len(sample):,})")
+    print(f"PetPopulation.update_stats:  {vector_seconds * per_million:8.3f} s per million pets")
+    print(f"Speedup: {scalar_seconds / vector_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    count_arg = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sample_arg = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    main(count_arg, min(count_arg, sample_arg))
@@ -0,0 +1,254 @@
+"""
+Benchmark suite for the hot paths, with JSON results and a compare mode.
+
+'run' generates N users x M pets in a scratch directory and times:
+
+- Pet.update_stats for gaps from a second to five years
+- Pet.to_dict / Pet.from_dict
+- save_pet / load_pet
+- load_user / list_users
+- User pet lookups (has_pet, get_pet_name) on a collector account
+
+Each benchmark is repeated and the best run is kept. 'compare' reads two
+result files and flags benchmarks that got slower by more than a threshold.
+
+Usage:
+    python -m benchmarks.suite run --users 1000 --pets 3 --output results.json
+    python -m benchmarks.suite compare baseline.json results.json --threshold 0.1
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+from src.pet import Pet
+from src.user import User
+from src.data_handler import save_pet, load_pet, load_user, list_users
+from benchmarks.datagen import generate_dataset
+from benchmarks.datagen import make_pets
+
+# Gaps between updates for the update_stats benchmarks
+UPDATE_GAPS = {
+    '1s': datetime.timedelta(seconds=1),
+    '1m': datetime.timedelta(minutes=1),
+    '1h': datetime.timedelta(hours=1),
+    '1d': datetime.timedelta(days=1),
+    '30d': datetime.timedelta(days=30),
+    '1y': datetime.timedelta(days=365),
+    '5y': datetime.timedelta(days=5 * 365)
+}
+
+# Pets owned by the account used for the lookup benchmarks
+COLLECTOR_PETS = 10_000
+
+
+def measure(fn, ops, repeat, setup=None):
+    """
+    Time fn over several runs.
+
+    Args:
+        fn (callable): Called with setup()'s return value (or nothing); does ops operations
+        ops (int): Operations per call, for the per-operation figures
+        repeat (int): Number of timed runs
+        setup (callable, optional): Builds fresh input for each run, outside the timing
+
+    Returns:
+        dict: ops, best and median seconds per run, and microseconds per operation (best run)
+    """
+    times = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        'ops': ops,
+        'best_seconds': best,
+        'median_seconds': statistics.median(times),
+        'us_per_op': best / ops * 1e6
+    }
+
+
+def bench_update_stats(results, pet_count, repeat):
+    now = datetime.datetime.now()
+    template = [pet.to_dict() for pet in make_pets(pet_count, now)]
+
+    for label, gap in UPDATE_GAPS.items():
+        def setup():
+            pets = [Pet.from_dict(record) for record in template]
+            for pet in pets:
+                pet.last_update = now - gap
+            return pets
+
+        results[f'pet.update_stats[{label}]'] = measure(
+            lambda pets: [pet.update_stats(now) for pet in pets], pet_count, repeat, setup)
+
+
+def bench_pet_dicts(results, pet_count, repeat):
+    pets = make_pets(pet_count, datetime.datetime.now())
+    records = [pet.to_dict() for pet in pets]
+    results['pet.to_dict'] = measure(lambda: [pet.to_dict() for pet in pets], pet_count, repeat)
+    results['pet.from_dict'] = measure(lambda: [Pet.from_dict(record) for record in records], pet_count, repeat)
+
+
+def bench_storage(results, users, repeat):
+    pets = [entry for _, owned in users for entry in owned]
+    results['data_handler.save_pet'] = measure(
+        lambda: [save_pet(pet, filename, quiet=True) for filename, pet in pets], len(pets), repeat)
+    results['data_handler.load_pet'] = measure(
+        lambda: [load_pet(filename, quiet=True) for filename, _ in pets], len(pets), repeat)
+
+    usernames = [user.username for user, _ in users]
+    results['data_handler.load_user'] = measure(
+        lambda: [load_user(username) for username in usernames], len(usernames), repeat)
+    results['data_handler.list_users'] = measure(list_users, 1, repeat)
+
+
+def bench_user_lookups(results, repeat):
+    user = User("collector")
+    filenames = [f"pet_{i}.json" for i in range(COLLECTOR_PETS)]
+    for filename in filenames:
+        user.add_pet(filename)
+    results['user.has_pet'] = measure(
+        lambda: [user.has_pet(filename) for filename in filenames], len(filenames), repeat)
+    results['user.get_pet_name'] = measure(
+        lambda: [user.get_pet_name(filename) for filename in filenames], len(filenames), repeat)
+
+
+def run(user_count=1000, pets_per_user=3, repeat=5, only=None):
+    """
+    Run the suite in a scratch directory.
+
+    Args:
+        user_count (int): Users in the generated dataset
+        pets_per_user (int): Pets per user
+        repeat (int): Timed runs per benchmark
+        only (str, optional): Regular expression; only matching benchmarks are kept
+
+    Returns:
+        dict: 'meta' (environment and parameters) and 'results' (by benchmark name)
+    """
+    results = {}
+    pet_count = user_count * pets_per_user
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="pet_bench_") as scratch:
+        # Config paths are relative, so the dataset lands in the scratch directory
+        os.chdir(scratch)
+        try:
+            bench_update_stats(results, pet_count, repeat)
+            bench_pet_dicts(results, pet_count, repeat)
+            users = generate_dataset(user_count, pets_per_user)
+            bench_storage(results, users, repeat)
+            bench_user_lookups(results, repeat)
+        finally:
+            os.chdir(original_dir)
+
+    if only:
+        results = {name: result for name, result in results.items() if re.search(only, name)}
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'users': user_count,
+            'pets_per_user': pets_per_user,
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Compare two result sets.
+
+    Args:
+        baseline (dict): Earlier output of run()
+        current (dict): Later output of run()
+        threshold (float): Relative slowdown that counts as a regression (0.1 = 10%)
+
+    Returns:
+        list[dict]: One row per benchmark in both runs: name, baseline and current
+            microseconds per op, relative change, and whether it regressed
+    """
+    rows = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['us_per_op']
+        after = result['us_per_op']
+        change = (after - before) / before if before else 0.0
+        rows.append({
+            'name': name,
+            'baseline_us': before,
+            'current_us': after,
+            'change': change,
+            'regressed': change > threshold
+        })
+    return rows
+
+
+def print_results(report):
+    """Print a run's results as a table"""
+    meta = report['meta']
+    print(f"{meta['users']:,} users x {meta['pets_per_user']} pets, best of {meta['repeat']} "
+          f"(Python {meta['python']})")
+    print(f"{'benchmark':<36}{'ops':>10}{'us/op':>12}{'best s':>10}")
+    for name, result in report['results'].items():
+        print(f"{name:<36}{result['ops']:>10,}{result['us_per_op']:>12.3f}{result['best_seconds']:>10.4f}")
+
+
+def print_comparison(rows, threshold):
+    """Print a comparison table, marking regressions"""
+    print(f"{'benchmark':<36}{'baseline us':>12}{'current us':>12}{'change':>9}")
+    for row in rows:
+        flag = "  REGRESSION" if row['regressed'] else ""
+        print(f"{row['name']:<36}{row['baseline_us']:>12.3f}{row['current_us']:>12.3f}{row['change']:>+9.1%}{flag}")
+    regressions = sum(row['regressed'] for row in rows)
+    print(f"{regressions} regression(s) over {threshold:.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pet game's hot paths.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--users", type=int, default=1000, help="users in the generated dataset")
+    run_parser.add_argument("--pets", type=int, default=3, help="pets per user")
+    run_parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    run_parser.add_argument("--only", help="regular expression selecting benchmarks to keep")
+    run_parser.add_argument("--output", help="write results as JSON to this file")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline", help="earlier results")
+    compare_parser.add_argument("current", help="later results")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative slowdown that counts as a regression")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        report = run(args.users, args.pets, args.repeat, args.only)
+        print_results(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Results written to {args.output}")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    print_comparison(rows, args.threshold)
+    return 1 if any(row['regressed'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
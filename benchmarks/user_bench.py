@@ -0,0 +1,57 @@
+"""
+Benchmark: User pet ownership operations for collector accounts.
+
+Usage: python -m benchmarks.user_bench [pets ...]
+"""
+import sys
+import time
+from src.user import User
+
+
+def timed(label, count, fn):
+    """Run fn once and print its time per operation"""
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    print(f"  {label:<34} {seconds:8.4f} s ({seconds / count * 1e6:7.2f} us/op)")
+    return seconds
+
+
+def run(pet_count):
+    """Time bulk import, lookups, renames and removals for one user"""
+    filenames = [f"pet_{i}.json" for i in range(pet_count)]
+    user = User("collector")
+    print(f"User with {pet_count:,} pets")
+
+    timed("add_pet (bulk import)", pet_count,
+          lambda: [user.add_pet(filename) for filename in filenames])
+    timed("has_pet", pet_count,
+          lambda: [user.has_pet(filename) for filename in filenames])
+    timed("get_pet_name", pet_count,
+          lambda: [user.get_pet_name(filename) for filename in filenames])
+    timed("set_current_pet + current name", pet_count,
+          lambda: [(user.set_current_pet(f), user.get_current_pet_name()) for f in filenames])
+    timed("rename_pet", pet_count,
+          lambda: [user.rename_pet(filename, "renamed") for filename in filenames])
+    timed("to_dict / from_dict", 1,
+          lambda: User.from_dict(user.to_dict()))
+
+    # Linear scan over the serialized list, as membership checks used to be done
+    sample = filenames[::max(1, pet_count // 1000)]
+    pets = user.pets
+    timed("linear scan membership (baseline)", len(sample),
+          lambda: [any(p['filename'] == f for p in pets) for f in sample])
+
+    timed("remove_pet", pet_count,
+          lambda: [user.remove_pet(filename) for filename in filenames])
+
+
+def main(pet_counts=(10_000, 100_000)):
+    """Run the benchmark for each account size"""
+    for pet_count in pet_counts:
+        run(pet_count)
+
+
+if __name__ == "__main__":
+    counts_arg = [int(arg) for arg in sys.argv[1:]] or (10_000, 100_000)
+    main(counts_arg)
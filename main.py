@@ -5,7 +5,10 @@ import sys
 from src.user_auth import authenticate_user
 from src.app_loop import initialize_pet, run_game_loop
 from src.ui import display_welcome
-from src.data_handler import save_user
+from src.data_handler import save_user, Session
+from src.config import SESSION_RECORD_PATH, METRICS_PATH
+from src import instrumentation
+from src.replay import SessionRecorder
 
 
 def main(username=None, pet_filename=None):
@@ -16,17 +19,30 @@ def main(username=None, pet_filename=None):
         username (str, optional): Username to login/create
         pet_filename (str, optional): Specific pet filename to load
     """
-    display_welcome()
-
-    # Authenticate user
-    user = authenticate_user(username)
-    save_user(user)
+    if METRICS_PATH:
+        instrumentation.start(METRICS_PATH)
 
-    # Initialize pet
-    pet, filename = initialize_pet(user, pet_filename)
+    display_welcome()
 
-    # Run game loop
-    run_game_loop(user, pet, filename)
+    # Saves are collected and written once when the session ends
+    with Session() as session:
+        # Authenticate user
+        user = authenticate_user(username)
+        save_user(user)
+
+        # Initialize pet
+        pet, filename = initialize_pet(user, pet_filename)
+
+        # Run game loop
+        recorder = SessionRecorder(SESSION_RECORD_PATH) if SESSION_RECORD_PATH else None
+        try:
+            run_game_loop(user, pet, filename, recorder)
+        finally:
+            if recorder:
+                recorder.close()
+
+    if METRICS_PATH:
+        print(f"Session: {session.summary()}", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -3,13 +3,17 @@ Game loop and action handling for the pet game.
 """
 import os
 from src.pet import Pet
-from src.user import User
-from src.config import FOODS, MAX_STAT, PETS_PATH
-from src.data_handler import save_pet, load_pet, save_user
+from src.config import PETS_PATH, JOURNAL_ENABLED
+from src.data_handler import save_user
+from src.engine import GameEngine, CommandError
+from src.instrumentation import instrumented
+from src.journal import Journal, recover_pet
+from src.lazy_pet import load_current_pet
 from src.ui import display_action_menu, display_food_menu, display_pet_status, display_game_menu
-from src.games.which_way import play_which_way
+from src.games.which_way import prompt_which_way_guesses
 
 
+@instrumented('app_loop.initialize_pet')
 def initialize_pet(user, pet_filename=None):
     """
     Initialize or load a pet for the user.
@@ -27,7 +31,7 @@ def initialize_pet(user, pet_filename=None):
         # Specific pet file was requested
         filename = os.path.join(PETS_PATH, pet_filename)
         # Add to user's collection if not already there
-        if not any(pet['filename'] == pet_filename for pet in user.pets):
+        if not user.has_pet(pet_filename):
             user.add_pet(pet_filename)
             save_user(user)
     elif user.current_pet:
@@ -37,10 +41,9 @@ def initialize_pet(user, pet_filename=None):
 
     # Load or create pet
     if filename:
-        loaded_pet = load_pet(filename)
+        loaded_pet = load_pet_or_recover(user, pet_filename)
         if loaded_pet:
             print(f"Loading {loaded_pet.name}...")
-            loaded_pet.update_stats()
             return loaded_pet, filename
         else:
             # File exists but couldn't load - create new pet
@@ -53,7 +56,7 @@ def initialize_pet(user, pet_filename=None):
                 filename = os.path.join(PETS_PATH, pet_filename)
 
             # Add pet to user's collection
-            if not any(p['filename'] == pet_filename for p in user.pets):
+            if not user.has_pet(pet_filename):
                 user.add_pet(pet_filename, pet.name)
                 save_user(user)
 
@@ -67,13 +70,36 @@ def initialize_pet(user, pet_filename=None):
         filename = os.path.join(PETS_PATH, pet_filename)
 
         # Add pet to user's collection
-        if not any(p['filename'] == pet_filename for p in user.pets):
+        if not user.has_pet(pet_filename):
             user.add_pet(pet_filename, pet.name)
             save_user(user)
 
         return pet, filename
 
 
+@instrumented('app_loop.load_pet_or_recover')
+def load_pet_or_recover(user, pet_filename):
+    """
+    Load a pet, rebuilding unsaved progress from its journal if needed.
+
+    Only this pet's save file is read, however many pets the user owns.
+
+    Args:
+        user (User): Owner of the pet
+        pet_filename (str): Pet save filename under PETS_PATH
+
+    Returns:
+        Pet | None: Loaded Pet instance with its stats up to date, or None if it couldn't be loaded
+    """
+    if JOURNAL_ENABLED:
+        recovered_pet = recover_pet(os.path.join(PETS_PATH, pet_filename))
+        if recovered_pet:
+            print("Recovered unsaved progress from your last session.")
+            recovered_pet.update_stats()
+            return recovered_pet
+    return load_current_pet(user, pet_filename)
+
+
 def create_new_pet(user):
     """
     Create a new pet by prompting for name.
@@ -93,142 +119,157 @@ def create_new_pet(user):
     return Pet(pet_name, owner=user.username)
 
 
-def handle_view_status(pet):
+def print_result(result):
+    """
+    Print an engine result the way the terminal game always has.
+
+    Args:
+        result (dict): Result returned by GameEngine.execute
+    """
+    if not result['ok']:
+        print(f"\n>> {result['error']}")
+        return
+    for i, message in enumerate(result['messages']):
+        print(f"\n>> {message}" if i == 0 else f">> {message}")
+
+
+@instrumented('app_loop.handle_view_status')
+def handle_view_status(engine):
     """
     Handle the 'View pet status' action.
 
     Args:
-        pet (Pet): The pet to display
+        engine (GameEngine): Engine for the current session
     """
-    display_pet_status(pet)
+    result = engine.execute({'action': 'status'})
+    if not result['ok']:
+        print_result(result)
+        return
+    # The status command already brought the stats up to date
+    display_pet_status(engine.pet, update=False)
 
 
-def handle_feed_pet(pet):
+@instrumented('app_loop.handle_feed_pet')
+def handle_feed_pet(engine):
     """
     Handle the 'Feed pet' action.
 
     Args:
-        pet (Pet): The pet to feed
+        engine (GameEngine): Engine for the current session
 
     Returns:
         bool: True if feeding was successful, False otherwise
     """
     # Check if pet can eat before showing food menu
-    if pet.fullness >= MAX_STAT:
-        print(f"\n>> {pet.name} is already full!")
-        return False
-    if pet.sleep:
-        print(f"\n>> {pet.name} is sleeping and can't eat right now!")
+    try:
+        engine.check_can_feed()
+    except CommandError as e:
+        print(f"\n>> {e}")
         return False
 
     display_food_menu()
     try:
-        food = int(input(f"Which food would you like to feed {pet.name}? ").strip())
+        food = int(input(f"Which food would you like to feed {engine.pet.name}? ").strip())
     except ValueError:
         print("\n>> Please enter a valid number.")
         return False
 
-    if food in FOODS:
-        food_data = FOODS[food]
-        pet.feed(food_data['fill_value'])
-        print(f"\n>> {pet.name} ate a {food_data['name'].lower()}!")
-        print(f">> {pet.name} is at {int(pet.fullness)}% fullness!")
-        return True
-    else:
-        print("\n>> Invalid food selection!")
-        return False
+    result = engine.execute({'action': 'feed', 'food': food})
+    print_result(result)
+    return result['ok']
 
 
-def handle_sleep(pet):
+@instrumented('app_loop.handle_sleep')
+def handle_sleep(engine):
     """
     Handle the 'Go to bed' action.
 
     Args:
-        pet (Pet): The pet to put to sleep
+        engine (GameEngine): Engine for the current session
 
     Returns:
         bool: True if action was successful, False otherwise
     """
-    if pet.sleep:
-        print(f"\n>> {pet.name} is sleeping already!")
-        return False
-    else:
-        pet.go_to_bed()
-        print(f"\n>> {pet.name} is now sleeping!")
-        return True
+    result = engine.execute({'action': 'sleep'})
+    print_result(result)
+    return result['ok']
 
 
-def handle_wake_up(pet):
+@instrumented('app_loop.handle_wake_up')
+def handle_wake_up(engine):
     """
     Handle the 'Wake up' action.
 
     Args:
-        pet (Pet): The pet to wake up
+        engine (GameEngine): Engine for the current session
 
     Returns:
         bool: True if action was successful, False otherwise
     """
-    if not pet.sleep:
-        print(f"\n>> {pet.name} is not sleeping!")
-        return False
-    else:
-        pet.wake_up()
-        print(f"\n>> {pet.name} is at {int(pet.energy)}% energy!")
-        return True
+    result = engine.execute({'action': 'wake'})
+    print_result(result)
+    return result['ok']
 
 
-def handle_user_display(user):
+@instrumented('app_loop.handle_user_display')
+def handle_user_display(engine):
     """
     Handle the user settings sub-menu.
 
     Args:
-        user (User): The current user
+        engine (GameEngine): Engine for the current session
 
     Returns:
         bool: False if user wants to exit the game, True otherwise
     """
+    info = engine.execute({'action': 'user_info'})['user']
     print("\n" + "-" * 50)
-    print(f"Username: {user.username}")
-    print(f"Birthday: {user.birthday}")
-    current_pet_name = user.get_current_pet_name()
-    print(f"Current pet: {current_pet_name if current_pet_name else 'None'}")
-    print(f"Total pets owned: {len(user.pets)}")
-    pet_names = [pet['name'] for pet in user.pets]
-    print(f"Pets: {', '.join(pet_names) if pet_names else 'None'}")
-    print(f"Games played: {user.games_played}")
-    print(f"Games won: {user.games_won}")
-    print(f"Win rate: {user.get_win_rate():.1f}%")
+    print(f"Username: {info['username']}")
+    print(f"Birthday: {info['birthday']}")
+    print(f"Current pet: {info['current_pet'] if info['current_pet'] else 'None'}")
+    print(f"Total pets owned: {len(info['pets'])}")
+    print(f"Pets: {', '.join(info['pets']) if info['pets'] else 'None'}")
+    print(f"Games played: {info['games_played']}")
+    print(f"Games won: {info['games_won']}")
+    print(f"Win rate: {info['win_rate']:.1f}%")
     print("-" * 50)
     return True
 
 
-def handle_play_games(pet, user):
+@instrumented('app_loop.handle_play_games')
+def handle_play_games(engine):
     """
     Handle the 'Play games' action.
-    
+
     Args:
-        pet (Pet): The current pet
-        user (User): The current user
-        
+        engine (GameEngine): Engine for the current session
+
     Returns:
         bool: True if continuing game loop, False to exit
     """
+    pet = engine.pet
     if pet.sleep:
         print(f"{pet.name} is sleeping and can't play games!")
         return True
 
     while True:
         display_game_menu()
-        
+
         try:
             choice = int(input("\nWhich game would you like to play? ").strip())
         except ValueError:
             print("\n>> Please enter a valid number.")
             continue
-        
+
         if choice == 1:
-            win_status = play_which_way(pet)
-            user.update_game_stats(win_status)
+            answers = engine.draw_answers()
+            guesses = prompt_which_way_guesses(pet, answers)
+            result = engine.execute({'action': 'play', 'guesses': guesses, 'answers': answers})
+            if result['ok']:
+                for message in result['messages']:
+                    print(message)
+            else:
+                print_result(result)
         elif choice == 2:
             print("Memory game coming soon!")
         elif choice == 3:
@@ -237,7 +278,7 @@ def handle_play_games(pet, user):
             print("\n>> Invalid choice!")
 
 
-def run_game_loop(user, pet, pet_filename):
+def run_game_loop(user, pet, pet_filename, recorder=None):
     """
     Run the main game loop.
 
@@ -245,6 +286,7 @@ def run_game_loop(user, pet, pet_filename):
         user (User): The current user
         pet (Pet): The pet being cared for
         pet_filename (str): The filename to save the pet to
+        recorder (SessionRecorder, optional): Records the session's commands for replay
     """
     if user.is_birthday_today():
         print()
@@ -253,6 +295,23 @@ def run_game_loop(user, pet, pet_filename):
         print(f"{(pet.name)} wishes you a happy birthday!")
         print("*" * 50)
 
+    pet_journal = None
+    user_journal = None
+    if JOURNAL_ENABLED:
+        # Journals only snapshot the loaded state if the save files don't already hold it
+        pet_journal = Journal.for_pet(pet_filename, pet.to_dict)
+        pet_journal.begin(pet.to_dict())
+        user_journal = Journal.for_user(user.username, user.to_dict)
+        user_journal.begin(user.to_dict())
+        user_journal.append('login',
+                            last_login_date=user.last_login_date.isoformat(),
+                            current_login_streak=user.current_login_streak,
+                            longest_login_streak=user.longest_login_streak)
+
+    if recorder:
+        recorder.start_session(user, pet, pet_filename)
+    engine = GameEngine(user, pet, pet_filename, pet_journal, user_journal, recorder=recorder)
+
     while True:
         display_action_menu()
 
@@ -263,21 +322,20 @@ def run_game_loop(user, pet, pet_filename):
             continue
 
         if user_input == 1:
-            handle_view_status(pet)
+            handle_view_status(engine)
         elif user_input == 2:
-            handle_feed_pet(pet)
+            handle_feed_pet(engine)
         elif user_input == 3:
-            handle_sleep(pet)
+            handle_sleep(engine)
         elif user_input == 4:
-            handle_wake_up(pet)
+            handle_wake_up(engine)
         elif user_input == 5:
-            handle_play_games(pet, user)
+            handle_play_games(engine)
         elif user_input == 6:
-            handle_user_display(user)
+            handle_user_display(engine)
         elif user_input == 7:
             print("=" * 50)
-            save_pet(pet, pet_filename)
-            save_user(user)
+            print(engine.execute({'action': 'save'})['messages'][0])
             print("Good Bye!")
             print("=" * 50)
             break
@@ -0,0 +1,416 @@
+"""
+Bulk export and import of every user and pet as newline-delimited JSON.
+
+An export file starts with a header line, followed by one record per line:
+
+    {"format": "simple-pet-game", "version": 1, "exported_at": "..."}
+    {"type": "user", "key": "alice", "data": {...User.to_dict()...}}
+    {"type": "pet", "key": "fluffy.json", "data": {...Pet.to_dict()...}}
+
+Files ending in .gz, .bz2 or .xz are compressed with the matching standard
+library codec. Export compresses each batch separately in the workers; all
+three formats allow concatenated streams, so the result reads back as one.
+
+Both directions are generator pipelines that handle a batch of records at a
+time: stored payloads (or lines) are decoded and validated through
+User.from_dict/Pet.from_dict in a pool of worker processes, with only a few
+batches in flight, so memory stays flat however large the dataset is.
+
+Import writes each batch through a data_handler Session, then records how far
+into the file it got in '<file>.checkpoint'. If it is interrupted, running it
+again resumes from there.
+
+Usage: python -m src.bulk export|import backup.ndjson.gz [--workers 8]
+"""
+import argparse
+import bz2
+import collections
+import contextlib
+import functools
+import gzip
+import json
+import lzma
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src import clock
+from src.config import PETS_PATH
+from src.data_handler import Session, save_pet, save_user
+from src.pet import Pet
+from src.serialization import detect_codec
+from src.storage import get_backend
+from src.user import User
+
+FORMAT = "simple-pet-game"
+VERSION = 1
+
+# Records per batch (one worker task, and one Session commit on import)
+BATCH_SIZE = 1000
+
+# Batches queued per worker; bounds how much is in memory at once
+BATCHES_PER_WORKER = 2
+
+# Compressed stream readers and whole-batch compressors by file suffix
+OPENERS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open
+}
+COMPRESSORS = {
+    '.gz': functools.partial(gzip.compress, compresslevel=6),
+    '.bz2': bz2.compress,
+    '.xz': lzma.compress
+}
+
+# Errors that mean a record is not a valid user or pet
+INVALID_RECORD_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+
+
+def _suffix(path):
+    return os.path.splitext(path)[1]
+
+
+def open_stream(path):
+    """
+    Open an export file for reading, decompressing according to its suffix.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        file: Binary file object
+    """
+    return OPENERS.get(_suffix(path), open)(path, 'rb')
+
+
+def compress(data, suffix):
+    """
+    Compress one piece of an export file for a file with the given suffix.
+
+    Args:
+        data (bytes): Uncompressed lines
+        suffix (str): File suffix, e.g. '.gz' ('' or unknown leaves data as is)
+
+    Returns:
+        bytes: Data to append to the file
+    """
+    compressor = COMPRESSORS.get(suffix)
+    return compressor(data) if compressor else data
+
+
+def _pipeline(work, batches, workers):
+    """
+    Apply work to each batch, in order, with at most a few batches in flight.
+
+    Args:
+        work (callable): Function of one batch (must be picklable if workers > 1)
+        batches (iterable[tuple[object, list]]): (tag, batch) pairs; the tag is passed through
+        workers (int): Worker processes (1 runs in this process)
+
+    Yields:
+        tuple[object, object]: (tag, work(batch))
+    """
+    if workers <= 1:
+        for tag, batch in batches:
+            yield tag, work(batch)
+        return
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for tag, batch in batches:
+            pending.append((tag, executor.submit(work, batch)))
+            if len(pending) >= workers * BATCHES_PER_WORKER:
+                tag, future = pending.popleft()
+                yield tag, future.result()
+        while pending:
+            tag, future = pending.popleft()
+            yield tag, future.result()
+
+
+def _batched(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield None, batch
+            batch = []
+    if batch:
+        yield None, batch
+
+
+# Export
+
+def iter_payloads():
+    """
+    Stream every stored record as it is on disk.
+
+    Usernames and pet names are streamed from the backend (a directory at a
+    time, or a page of keys at a time from SQLite) and each record is read
+    as it is yielded, so memory doesn't grow with the number of records.
+
+    Yields:
+        tuple[str, str, bytes]: ('user' or 'pet', key, payload)
+    """
+    backend = get_backend()
+    for username in backend.iter_users():
+        payload = backend.read_user(username)
+        if payload is not None:
+            yield 'user', username, payload
+    for filename in backend.iter_pets():
+        payload = backend.read_pet(os.path.join(PETS_PATH, filename))
+        if payload is not None:
+            yield 'pet', filename, payload
+
+
+def encode_records(batch, suffix=''):
+    """
+    Decode stored payloads and render them as export lines.
+
+    Args:
+        batch (list[tuple[str, str, bytes]]): (kind, key, payload) triples
+        suffix (str): Export file suffix, for compression
+
+    Returns:
+        tuple[bytes, int, int, list[str]]: Export lines joined and compressed, their
+            uncompressed size, how many there are, and the keys that failed to decode
+    """
+    lines, invalid = [], []
+    for kind, key, payload in batch:
+        try:
+            codec = detect_codec(payload)
+            record = codec.decode_user(payload) if kind == 'user' else codec.decode_pet(payload)
+        except INVALID_RECORD_ERRORS:
+            invalid.append(key)
+            continue
+        lines.append(json.dumps({'type': kind, 'key': key, 'data': record.to_dict()}, separators=(',', ':')))
+    data = "".join(line + "\n" for line in lines).encode('utf-8')
+    return compress(data, suffix), len(data), len(lines), invalid
+
+
+def export_data(path, workers=None, batch_size=BATCH_SIZE, report=print):
+    """
+    Write every user and pet to an export file.
+
+    The file is written under a temporary name and renamed when complete, so
+    an interrupted export never leaves a truncated file behind.
+
+    Args:
+        path (str): Destination (.gz/.bz2/.xz to compress)
+        workers (int, optional): Worker processes (defaults to the CPU count; 1 runs in this process)
+        batch_size (int): Records per batch
+        report (callable | None): Called with progress and summary lines
+
+    Returns:
+        dict: 'records' exported, 'invalid' records skipped, 'bytes' (uncompressed) and 'seconds'
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    summary = {'records': 0, 'invalid': 0, 'bytes': 0}
+    header = {'format': FORMAT, 'version': VERSION, 'exported_at': clock.now().isoformat()}
+    suffix = _suffix(path)
+    work = functools.partial(encode_records, suffix=suffix)
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(compress((json.dumps(header) + "\n").encode('utf-8'), suffix))
+            for _, (chunk, size, count, invalid) in _pipeline(work, _batched(iter_payloads(), batch_size), workers):
+                f.write(chunk)
+                summary['records'] += count
+                summary['bytes'] += size
+                summary['invalid'] += len(invalid)
+                if report:
+                    for key in invalid:
+                        report(f"Skipped unreadable record: {key}")
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    summary['seconds'] = time.perf_counter() - started
+    if report:
+        report(f"Exported {summary['records']:,} records to {path} in {summary['seconds']:.2f}s")
+    return summary
+
+
+# Import
+
+def decode_lines(batch):
+    """
+    Parse and validate export lines.
+
+    Args:
+        batch (list[tuple[int, bytes]]): (line number, line) pairs
+
+    Returns:
+        tuple[list[tuple[str, str, User | Pet]], list[str]]: Valid (kind, key, record)
+            triples, and a description of each invalid line
+    """
+    records, invalid = [], []
+    for number, line in batch:
+        try:
+            entry = json.loads(line)
+            kind, key = entry['type'], entry['key']
+            if kind == 'user':
+                record = User.from_dict(entry['data'])
+            elif kind == 'pet':
+                record = Pet.from_dict(entry['data'])
+            else:
+                raise ValueError(f"unknown record type {kind!r}")
+            if not isinstance(key, str) or not key or os.path.basename(key) != key:
+                raise ValueError(f"bad key {key!r}")
+        except INVALID_RECORD_ERRORS as e:
+            invalid.append(f"line {number}: {e}")
+            continue
+        records.append((kind, key, record))
+    return records, invalid
+
+
+def _checkpoint_path(path):
+    return path + ".checkpoint"
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {'source': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_checkpoint(path):
+    """
+    Progress saved by an interrupted import of this file.
+
+    Args:
+        path (str): Export file
+
+    Returns:
+        dict | None: Checkpoint ('offset', 'line', 'users', 'pets', 'invalid' counts), or None if there
+            is none or the file has changed since it was written
+    """
+    try:
+        with open(_checkpoint_path(path)) as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    stamp = _source_stamp(path)
+    if any(checkpoint.get(name) != value for name, value in stamp.items()):
+        return None
+    return checkpoint
+
+
+def _write_checkpoint(path, checkpoint):
+    temp_path = _checkpoint_path(path) + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(temp_path, _checkpoint_path(path))
+
+
+def _read_header(f, path):
+    line = f.readline()
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get('format') != FORMAT:
+        raise ValueError(f"{path} is not a pet game export")
+    if header.get('version') != VERSION:
+        raise ValueError(f"{path} is export version {header.get('version')}; this game reads version {VERSION}")
+    return len(line)
+
+
+def _line_batches(f, offset, line, batch_size):
+    """Batches of (line number, line), tagged with the offset and line number after the batch"""
+    batch = []
+    for text in f:
+        line += 1
+        offset += len(text)
+        if text.strip():
+            batch.append((line, text))
+        if len(batch) >= batch_size:
+            yield (offset, line), batch
+            batch = []
+    if batch:
+        yield (offset, line), batch
+
+
+def import_data(path, workers=None, batch_size=BATCH_SIZE, resume=True, report=print):
+    """
+    Load every record from an export file into the game's storage.
+
+    Records are validated in worker processes and saved one batch per
+    Session commit. After each batch the position in the file is written to
+    '<path>.checkpoint', so an interrupted import resumes from the last
+    committed batch; the checkpoint is removed when the import completes.
+    Existing users and pets with the same key are overwritten.
+
+    Args:
+        path (str): Export file (.gz/.bz2/.xz are decompressed)
+        workers (int, optional): Worker processes (defaults to the CPU count; 1 runs in this process)
+        batch_size (int): Records per batch
+        resume (bool): Continue from a checkpoint if there is one
+        report (callable | None): Called with progress and summary lines
+
+    Returns:
+        dict: 'users' and 'pets' imported, 'invalid' lines skipped, 'resumed_from'
+            (line number, 0 for a fresh import) and 'seconds'
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    checkpoint = read_checkpoint(path) if resume else None
+    summary = {'users': 0, 'pets': 0, 'invalid': 0, 'resumed_from': 0}
+    with open_stream(path) as f:
+        offset = _read_header(f, path)
+        line = 1
+        if checkpoint is not None:
+            # Compressed streams seek by decompressing and discarding up to the offset
+            f.seek(checkpoint['offset'])
+            offset, line = checkpoint['offset'], checkpoint['line']
+            summary.update(users=checkpoint['users'], pets=checkpoint['pets'], invalid=checkpoint['invalid'],
+                           resumed_from=line)
+            if report:
+                report(f"Resuming {path} after line {line:,}")
+
+        batches = _line_batches(f, offset, line, batch_size)
+        for (offset, line), (records, invalid) in _pipeline(decode_lines, batches, workers):
+            with Session():
+                for kind, key, record in records:
+                    if kind == 'user':
+                        save_user(record, key)
+                    else:
+                        save_pet(record, os.path.join(PETS_PATH, key), quiet=True)
+            summary['users'] += sum(kind == 'user' for kind, _, _ in records)
+            summary['pets'] += sum(kind == 'pet' for kind, _, _ in records)
+            summary['invalid'] += len(invalid)
+            if report:
+                for description in invalid:
+                    report(f"Skipped invalid record at {description}")
+            _write_checkpoint(path, dict(_source_stamp(path), offset=offset, line=line, users=summary['users'],
+                                         pets=summary['pets'], invalid=summary['invalid']))
+
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(_checkpoint_path(path))
+    summary['seconds'] = time.perf_counter() - started
+    if report:
+        report(f"Imported {summary['users']:,} users and {summary['pets']:,} pets from {path} "
+               f"in {summary['seconds']:.2f}s")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import every user and pet as NDJSON.")
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("path", help="export file (.gz, .bz2 or .xz to compress)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="records per batch")
+    parser.add_argument("--restart", action="store_true", help="ignore any checkpoint and import from the start")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_data(args.path, args.workers, args.batch_size)
+    else:
+        try:
+            import_data(args.path, args.workers, args.batch_size, resume=not args.restart)
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+        except KeyboardInterrupt:
+            parser.exit(130, "Interrupted; run the import again to resume from the last checkpoint\n")
+
+
+if __name__ == "__main__":
+    main()
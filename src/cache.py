@@ -0,0 +1,141 @@
+"""
+Bounded write-back LRU cache for loaded users and pets.
+
+Entries are evicted least-recently-used first once either the entry count
+or the total record size goes over its limit. Dirty entries are written
+back through a callback when evicted or flushed. Each entry remembers the
+version of the stored record it came from (e.g. file mtime); if the record
+changes underneath a clean entry, the entry is dropped on the next lookup.
+"""
+import collections
+import threading
+
+# Size assumed for dirty entries that haven't been written yet
+DEFAULT_ENTRY_SIZE = 512
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'version', 'dirty')
+
+    def __init__(self, value, size, version, dirty):
+        self.value = value
+        self.size = size
+        self.version = version
+        self.dirty = dirty
+
+
+class WriteBackCache:
+    """
+    LRU cache with dirty tracking and write-back.
+
+    Attributes:
+        max_entries (int): Maximum number of cached records
+        max_bytes (int): Maximum total size of cached records
+        writeback (callable): Called as writeback(key, value) to persist a dirty entry;
+            returns the written record's (size, version)
+        stats (dict): 'hits', 'misses', 'evictions', 'writebacks' and 'invalidations' counters
+    """
+
+    def __init__(self, writeback, max_entries=1024, max_bytes=16 * 1024 * 1024):
+        self.writeback = writeback
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'writebacks': 0, 'invalidations': 0}
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self):
+        """int: Total size of cached records"""
+        return self._bytes
+
+    def get(self, key, current_version=None):
+        """
+        Look up a cached value.
+
+        Args:
+            key (hashable): Cache key
+            current_version (callable, optional): Returns the stored record's
+                current version; clean entries from an older version are dropped
+
+        Returns:
+            object | None: Cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not entry.dirty and current_version is not None:
+                if current_version() != entry.version:
+                    self._remove(key)
+                    self.stats['invalidations'] += 1
+                    entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry.value
+
+    def put(self, key, value, size=None, version=None, dirty=False):
+        """
+        Add or replace a cached value.
+
+        Args:
+            key (hashable): Cache key
+            value (object): Value to cache
+            size (int, optional): Record size in bytes; defaults to the previous size
+            version (object, optional): Version of the stored record the value matches
+            dirty (bool): Whether the value still needs to be written back
+        """
+        with self._lock:
+            previous = self._entries.get(key)
+            if size is None:
+                size = previous.size if previous else DEFAULT_ENTRY_SIZE
+            if previous is not None:
+                self._remove(key)
+            self._entries[key] = _Entry(value, size, version, dirty)
+            self._bytes += size
+            self._evict()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        return entry
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or (self._bytes > self.max_bytes and len(self._entries) > 1):
+            key, entry = next(iter(self._entries.items()))
+            self._remove(key)
+            self.stats['evictions'] += 1
+            if entry.dirty:
+                self.writeback(key, entry.value)
+                self.stats['writebacks'] += 1
+
+    def discard(self, key):
+        """Drop a key without writing it back"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def flush(self, keys=None):
+        """
+        Write back dirty entries, keeping them cached as clean.
+
+        Args:
+            keys (iterable, optional): Only write back these keys; defaults to every entry
+        """
+        with self._lock:
+            if keys is None:
+                entries = list(self._entries.items())
+            else:
+                entries = [(key, self._entries[key]) for key in keys if key in self._entries]
+            for key, entry in entries:
+                if entry.dirty:
+                    size, entry.version = self.writeback(key, entry.value)
+                    self._bytes += size - entry.size
+                    entry.size = size
+                    entry.dirty = False
+                    self.stats['writebacks'] += 1
@@ -0,0 +1,101 @@
+"""
+Injectable clock for everything time-based in the game.
+
+Pet, User, user_auth and the engine read the time through now() and
+today() here instead of calling datetime directly. By default these return
+the system time; install a VirtualClock with set_clock() or use_clock() to
+run the game at any moment and fast-forward it instantly.
+"""
+import contextlib
+import datetime
+
+
+class SystemClock:
+    """Reads the real local time"""
+
+    def now(self):
+        return datetime.datetime.now()
+
+    def today(self):
+        return datetime.date.today()
+
+
+class VirtualClock:
+    """
+    A clock that only moves when told to.
+
+    Attributes:
+        current (datetime.datetime): The clock's current time
+    """
+
+    def __init__(self, start=None):
+        self.current = start if start is not None else datetime.datetime.now()
+
+    def now(self):
+        return self.current
+
+    def today(self):
+        return self.current.date()
+
+    def advance(self, delta=None, **kwargs):
+        """
+        Move the clock forward.
+
+        Args:
+            delta (datetime.timedelta, optional): How far to move
+            **kwargs: timedelta arguments instead of delta (e.g. days=1, hours=6)
+
+        Returns:
+            datetime.datetime: The new time
+        """
+        self.current += delta if delta is not None else datetime.timedelta(**kwargs)
+        return self.current
+
+    def set(self, moment):
+        """
+        Jump to a given time.
+
+        Args:
+            moment (datetime.datetime): New time (may be earlier than the current one)
+        """
+        self.current = moment
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    """Get the active clock"""
+    return _clock
+
+
+def set_clock(clock):
+    """
+    Replace the active clock.
+
+    Args:
+        clock (SystemClock | VirtualClock | None): Clock to use, or None for the system clock
+    """
+    global _clock
+    _clock = clock if clock is not None else SystemClock()
+
+
+@contextlib.contextmanager
+def use_clock(clock):
+    """Use a clock inside a with-block, restoring the previous one afterwards"""
+    previous = _clock
+    set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
+
+
+def now():
+    """Current time from the active clock"""
+    return _clock.now()
+
+
+def today():
+    """Current date from the active clock"""
+    return _clock.today()
@@ -11,6 +11,51 @@ USER_DATA_DEFAULT_FILE = 'user.json'
 PET_DATA_PATH = os.path.join(PETS_PATH, PET_DATA_DEFAULT_FILE)
 USER_DATA_PATH = os.path.join(USERS_PATH, USER_DATA_DEFAULT_FILE)
 
+# Storage backend: 'json' (one file per user/pet) or 'sqlite'
+STORAGE_BACKEND = os.environ.get("PET_GAME_STORAGE", "json")
+# Hash-prefix directory levels under users/ and pets/ (0 = flat). Existing flat
+# data should be moved first with: python -m src.storage.reshard migrate --levels 2
+STORAGE_SHARD_LEVELS = int(os.environ.get("PET_GAME_SHARD_LEVELS", "0"))
+SQLITE_DB_PATH = os.path.join(DATA_PATH, "pet_game.db")
+
+# Memory-mapped fixed-record pet store for batch jobs (see src/pet_store.py)
+PET_STORE_PATH = os.path.join(DATA_PATH, "pets.store")
+PET_STORE_INITIAL_CAPACITY = 1024  # records; the file doubles when full
+
+# Save formats: 'json' (pretty-printed), 'json-compact' or 'binary' (pets only)
+PET_CODEC = "json"
+USER_CODEC = "json"
+
+# Write-back cache for loaded users and pets (see data_handler.enable_cache)
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# User index: sorted usernames for search, pagination and existence checks
+USER_INDEX_PATH = os.path.join(DATA_PATH, "index")
+USER_INDEX_DELTA_LIMIT = 1000  # new usernames kept unsorted before a merge
+USER_INDEX_BLOOM_BITS = 2 ** 23  # 1 MB Bloom filter (~1% false positives at 800k users)
+USER_INDEX_BLOOM_HASHES = 7
+USER_PAGE_SIZE = 10
+
+# Leaderboards: kept up to date on every save (see src/leaderboard.py)
+LEADERBOARD_PATH = os.path.join(DATA_PATH, "leaderboard")
+LEADERBOARD_MIN_GAMES = 10  # games needed before a user appears on the win rate board
+LEADERBOARD_LOG_LIMIT = 10000  # changes logged before a new snapshot
+
+# Event journal: actions are appended here between full saves. Off by default
+# since it adds a file append to every action; set PET_GAME_JOURNAL=1 to recover
+# unsaved progress after a crash
+JOURNAL_ENABLED = os.environ.get("PET_GAME_JOURNAL", "") not in ("", "0")
+JOURNAL_PATH = os.path.join(DATA_PATH, "journal")
+JOURNAL_SNAPSHOT_INTERVAL = 50  # events between snapshots
+JOURNAL_FSYNC = False  # fsync every journal write (survives power loss, not just crashes)
+
+# Record every terminal session's commands to this file for replay (see src/replay.py)
+SESSION_RECORD_PATH = os.environ.get("PET_GAME_RECORD")
+
+# Collect latency and I/O metrics and write them to this path (.json and .prom) on exit or SIGUSR1
+METRICS_PATH = os.environ.get("PET_GAME_METRICS")
+
 # Stat boundaries
 MIN_STAT = 0.0
 MAX_STAT = 100.0
@@ -18,6 +63,7 @@ MAX_STAT = 100.0
 # Sleep mechanics
 SLEEP_RESTORATION_RATE = 288  # seconds per 1 energy point (8 hours = full restore)
 SLEEP_FULLNESS_MULTIPLIER = 0.1  # Fullness decreases at 10% rate while sleeping
+AUTO_WAKE_ENERGY = 10.0  # Energy level at which an auto-slept pet wakes up
 
 # Passive stat changes over time
 FULLNESS_DECREASE_RATE = 216  # seconds per 1 fullness point (6 hours = fully hungry)
@@ -1,52 +1,362 @@
 """
 Persistence layer for saving and loading game data.
+
+Records are stored through the active storage backend (see src.storage).
+For server and batch use, enable_cache() puts a write-back LRU cache in front
+of the loaders.
 """
-import json
-import os
+import time
+from src import instrumentation
+from src.instrumentation import instrumented
 from src.pet import Pet
 from src.user import User
-from src.config import PET_DATA_PATH, USERS_PATH, PETS_PATH
+from src.config import PET_DATA_PATH, PET_CODEC, USER_CODEC, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+from src.cache import WriteBackCache
+from src.serialization import get_codec, detect_codec
+from src.storage import get_backend
+from src.user_index import get_user_index
+from src.leaderboard import get_leaderboards
+
+# Estimated system calls for one direct save (stat + mkdir + open + write + close)
+SYSCALLS_PER_SAVE = 5
+
+_active_session = None
+_cache = None
+
+
+def _encode_pet(pet):
+    """Serialize a pet with the configured codec"""
+    metrics = instrumentation.registry
+    if metrics is None:
+        return get_codec(PET_CODEC).encode_pet(pet)
+    started = time.perf_counter()
+    payload = get_codec(PET_CODEC).encode_pet(pet)
+    metrics.observe('data_handler.encode.seconds', time.perf_counter() - started)
+    metrics.increment('data_handler.bytes_written', len(payload))
+    return payload
+
+
+def _encode_user(user):
+    """Serialize a user with the configured codec"""
+    metrics = instrumentation.registry
+    if metrics is None:
+        return get_codec(USER_CODEC).encode_user(user)
+    started = time.perf_counter()
+    payload = get_codec(USER_CODEC).encode_user(user)
+    metrics.observe('data_handler.encode.seconds', time.perf_counter() - started)
+    metrics.increment('data_handler.bytes_written', len(payload))
+    return payload
 
 
-def save_pet(pet, filename=PET_DATA_PATH):
+def _decode(payload, kind):
+    """Parse a stored pet or user, picking the codec from its header"""
+    metrics = instrumentation.registry
+    codec = detect_codec(payload)
+    if metrics is None:
+        return codec.decode_pet(payload) if kind == 'pet' else codec.decode_user(payload)
+    metrics.increment('data_handler.bytes_read', len(payload))
+    started = time.perf_counter()
+    try:
+        return codec.decode_pet(payload) if kind == 'pet' else codec.decode_user(payload)
+    finally:
+        metrics.observe('data_handler.parse.seconds', time.perf_counter() - started)
+
+
+def _write_back(key, value):
+    """Write a cached pet or user to storage; returns the record's (size, version)"""
+    kind, name = key
+    backend = get_backend()
+    if kind == 'pet':
+        payload = _encode_pet(value)
+        backend.write_pet(name, payload)
+        return len(payload), backend.pet_version(name)
+    payload = _encode_user(value)
+    backend.write_user(name, payload)
+    return len(payload), backend.user_version(name)
+
+
+def enable_cache(max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+    """
+    Cache loaded pets and users in memory and defer their saves.
+
+    While the cache is on, load_pet/load_user return the cached object when
+    the stored record hasn't changed since it was cached, and save_pet/save_user
+    only mark the object dirty. Dirty objects are written when evicted or on
+    flush_cache().
+
+    Args:
+        max_entries (int): Maximum number of cached records
+        max_bytes (int): Maximum total size of cached records
+
+    Returns:
+        WriteBackCache: The active cache
+    """
+    global _cache
+    if _cache is None:
+        _cache = WriteBackCache(_write_back, max_entries, max_bytes)
+    return _cache
+
+
+def flush_cache(pet_filenames=None, usernames=None):
+    """
+    Write dirty cached pets and users to storage.
+
+    With neither argument given, every dirty entry is flushed.
+
+    Args:
+        pet_filenames (iterable[str], optional): Only flush these pets
+        usernames (iterable[str], optional): Only flush these users
+    """
+    if _cache is None:
+        return
+    if pet_filenames is None and usernames is None:
+        _cache.flush()
+    else:
+        _cache.flush([('pet', filename) for filename in pet_filenames or ()] +
+                     [('user', username) for username in usernames or ()])
+
+
+def disable_cache():
+    """Flush and remove the cache"""
+    global _cache
+    flush_cache()
+    _cache = None
+
+
+def cache_stats():
+    """
+    Get the cache counters.
+
+    Returns:
+        dict | None: hits, misses, evictions, writebacks and invalidations, or None if the cache is off
+    """
+    return dict(_cache.stats) if _cache is not None else None
+
+
+class Session:
+    """
+    Unit of work that coalesces saves into one commit.
+
+    While a session is active, save_pet and save_user only mark the object as
+    dirty. On commit every dirty pet and user is written once, in a single
+    storage batch, no matter how many times it was saved.
+
+    Usage:
+        with Session() as session:
+            ...
+            save_user(user)  # deferred until the block exits
+
+    Attributes:
+        stats (dict): Counts of saves requested, records written, bytes written,
+            and the estimated bytes and system calls avoided (also counted by
+            instrumentation, when it is on)
+    """
+
+    def __init__(self):
+        self._pets = {}
+        self._users = {}
+        self._callbacks = []
+        self.stats = {
+            'saves_requested': 0,
+            'records_written': 0,
+            'bytes_written': 0,
+            'bytes_saved': 0,
+            'syscalls_saved': 0
+        }
+
+    def __enter__(self):
+        global _active_session
+        if _active_session is not None:
+            raise RuntimeError("A session is already active")
+        _active_session = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active_session
+        _active_session = None
+        self.commit()
+        return False
+
+    def add_pet(self, pet, filename):
+        """
+        Mark a pet as dirty.
+
+        Args:
+            pet (Pet): Pet to save on commit
+            filename (str): Path to save file
+        """
+        self.stats['saves_requested'] += 1
+        self._pets[filename] = pet
+
+    def add_user(self, user, username):
+        """
+        Mark a user as dirty.
+
+        Args:
+            user (User): User to save on commit
+            username (str): Username to save under
+        """
+        self.stats['saves_requested'] += 1
+        self._users[username] = user
+
+    def after_commit(self, callback):
+        """
+        Run a callback once the next commit has written everything.
+
+        Args:
+            callback (callable): Function called with no arguments
+        """
+        self._callbacks.append(callback)
+
+    @instrumented('data_handler.Session.commit')
+    def commit(self):
+        """Write every dirty pet and user once, then run the after-commit callbacks"""
+        pets = [(filename, _encode_pet(pet)) for filename, pet in self._pets.items()]
+        users = [(username, _encode_user(user)) for username, user in self._users.items()]
+        records = pets + users
+
+        backend = get_backend()
+        with backend.batch():
+            backend.write_pets(pets)
+            backend.write_users(users)
+        leaderboards = get_leaderboards()
+        for username, _ in users:
+            get_user_index().add(username)
+            leaderboards.update_user(username, self._users[username])
+        for filename, _ in pets:
+            leaderboards.update_pet(filename, self._pets[filename])
+
+        if _cache is not None:
+            for filename, payload in pets:
+                _cache.put(('pet', filename), self._pets[filename], len(payload), backend.pet_version(filename))
+            for username, payload in users:
+                _cache.put(('user', username), self._users[username], len(payload), backend.user_version(username))
+
+        written = sum(len(payload) for _, payload in records)
+        skipped = self.stats['saves_requested'] - self.stats['records_written'] - len(records)
+        self.stats['records_written'] += len(records)
+        self.stats['bytes_written'] += written
+        if records:
+            # Skipped saves would have rewritten records of about the same size
+            self.stats['bytes_saved'] += skipped * written // len(records)
+        self.stats['syscalls_saved'] += skipped * SYSCALLS_PER_SAVE
+        metrics = instrumentation.registry
+        if metrics is not None:
+            metrics.increment('data_handler.session.records_written', len(records))
+            metrics.increment('data_handler.session.saves_coalesced', skipped)
+
+        self._pets.clear()
+        self._users.clear()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def summary(self):
+        """Return a one-line description of the session's savings"""
+        return (f"{self.stats['records_written']} of {self.stats['saves_requested']} saves written "
+                f"({self.stats['bytes_written']} bytes); saved ~{self.stats['bytes_saved']} bytes "
+                f"and ~{self.stats['syscalls_saved']} system calls")
+
+
+def after_save(callback):
+    """
+    Run a callback once pending saves are on disk.
+
+    Runs immediately unless a Session is active, in which case it runs after
+    the session commits.
+
+    Args:
+        callback (callable): Function called with no arguments
+    """
+    if _active_session is not None:
+        _active_session.after_commit(callback)
+    else:
+        callback()
+
+
+@instrumented('data_handler.save_pet')
+def save_pet(pet, filename=PET_DATA_PATH, quiet=False):
     """
     Save pet data to file.
 
     Args:
         pet (Pet): Pet instance to save
         filename (str): Path to save file
+        quiet (bool): Skip the confirmation message
     """
-    directory = os.path.dirname(filename)
-    if directory:
-        os.makedirs(directory, exist_ok=True)
-
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(pet.to_dict(), f, indent=2)
-    print(f"Game saved to {filename}!")
+    if _active_session is not None:
+        _active_session.add_pet(pet, filename)
+    else:
+        if _cache is not None:
+            _cache.put(('pet', filename), pet, dirty=True)
+        else:
+            get_backend().write_pet(filename, _encode_pet(pet))
+        get_leaderboards().update_pet(filename, pet)
+    if not quiet:
+        print(f"Game saved to {filename}!")
 
 
-def load_pet(filename=PET_DATA_PATH):
+@instrumented('data_handler.load_pet')
+def load_pet(filename=PET_DATA_PATH, quiet=False):
     """
     Load pet data from file.
 
     Args:
         filename (str): Path to save file
+        quiet (bool): Skip the error message for invalid files
 
     Returns:
         Pet | None: Loaded Pet instance or None if file doesn't exist or is invalid
     """
-    if not os.path.exists(filename):
+    if _active_session is not None and filename in _active_session._pets:
+        # Read back the unsaved copy
+        return Pet.from_dict(_active_session._pets[filename].to_dict())
+
+    backend = get_backend()
+    version = None
+    if _cache is not None:
+        pet = _cache.get(('pet', filename), lambda: backend.pet_version(filename))
+        if pet is not None:
+            return pet
+        version = backend.pet_version(filename)
+
+    payload = backend.read_pet(filename)
+    if payload is None:
+        return None
+    try:
+        pet = _decode(payload, 'pet')
+    except (ValueError, KeyError, TypeError) as e:
+        if not quiet:
+            print(f"Error loading save file: {e}")
+            print("Starting with a new pet instead.")
+        return None
+    if _cache is not None:
+        _cache.put(('pet', filename), pet, len(payload), version)
+    return pet
+
+
+@instrumented('data_handler.load_pet_header')
+def load_pet_header(filename):
+    """
+    Read just a pet's name, sleep flag and last update time, without building a Pet.
+
+    Args:
+        filename (str): Path to save file
+
+    Returns:
+        dict | None: {'name', 'sleep', 'last_update'} or None if the file doesn't exist or is invalid
+    """
+    payload = get_backend().read_pet(filename)
+    if payload is None:
         return None
+    instrumentation.increment('data_handler.bytes_read', len(payload))
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return Pet.from_dict(data)
-    except (json.JSONDecodeError, ValueError, KeyError, TypeError) as e:
-        print(f"Error loading save file: {e}")
-        print("Starting with a new pet instead.")
+        return detect_codec(payload).decode_pet_header(payload)
+    except (ValueError, KeyError, TypeError):
         return None
 
 
+@instrumented('data_handler.save_user')
 def save_user(user, username=None):
     """
     Save user data to file.
@@ -58,13 +368,18 @@ def save_user(user, username=None):
     if username is None:
         username = user.username
 
-    filename = os.path.join(USERS_PATH, f"{username}.json")
-    os.makedirs(USERS_PATH, exist_ok=True)
-
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(user.to_dict(), f, indent=2)
+    if _active_session is not None:
+        _active_session.add_user(user, username)
+    else:
+        if _cache is not None:
+            _cache.put(('user', username), user, dirty=True)
+        else:
+            get_backend().write_user(username, _encode_user(user))
+        get_user_index().add(username)
+        get_leaderboards().update_user(username, user)
 
 
+@instrumented('data_handler.load_user')
 def load_user(username):
     """
     Load user data from file.
@@ -75,18 +390,32 @@ def load_user(username):
     Returns:
         User | None: Loaded User instance or None if file doesn't exist or is invalid
     """
-    filename = os.path.join(USERS_PATH, f"{username}.json")
-    if not os.path.exists(filename):
+    if _active_session is not None and username in _active_session._users:
+        # Read back the unsaved copy
+        return User.from_dict(_active_session._users[username].to_dict())
+
+    backend = get_backend()
+    version = None
+    if _cache is not None:
+        user = _cache.get(('user', username), lambda: backend.user_version(username))
+        if user is not None:
+            return user
+        version = backend.user_version(username)
+
+    payload = backend.read_user(username)
+    if payload is None:
         return None
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return User.from_dict(data)
-    except (json.JSONDecodeError, ValueError, KeyError, TypeError) as e:
+        user = _decode(payload, 'user')
+    except (ValueError, KeyError, TypeError) as e:
         print(f"Error loading user file: {e}")
         return None
+    if _cache is not None:
+        _cache.put(('user', username), user, len(payload), version)
+    return user
 
 
+@instrumented('data_handler.list_users')
 def list_users():
     """
     List all available users.
@@ -94,12 +423,53 @@ def list_users():
     Returns:
         list[str]: List of usernames
     """
-    if not os.path.exists(USERS_PATH):
-        return []
+    return get_backend().list_users()
+
+
+@instrumented('data_handler.user_exists')
+def user_exists(username):
+    """
+    Check whether a user has been saved.
+
+    The user index answers most lookups; a username it doesn't know is
+    confirmed against storage, so a user saved without reaching the index
+    is never reported as free.
+
+    Args:
+        username (str): Username to check
+
+    Returns:
+        bool: True if the user exists
+    """
+    if get_user_index().contains(username):
+        return True
+    if _active_session is not None and username in _active_session._users:
+        return True
+    return get_backend().read_user(username) is not None
 
-    users = []
-    for filename in os.listdir(USERS_PATH):
-        if filename.endswith('.json'):
-            username = filename[:-5]  # Remove .json extension
-            users.append(username)
-    return users
+
+@instrumented('data_handler.search_users')
+def search_users(prefix='', after=None, limit=20):
+    """
+    List saved usernames in sorted order, one page at a time.
+
+    Args:
+        prefix (str): Only return usernames starting with this
+        after (str, optional): Last username of the previous page
+        limit (int): Page size
+
+    Returns:
+        list[str]: Usernames on this page
+    """
+    return get_user_index().search(prefix, after, limit)
+
+
+@instrumented('data_handler.list_pets')
+def list_pets():
+    """
+    List all saved pet files.
+
+    Returns:
+        list[str]: List of pet filenames (e.g., 'fluffy.json')
+    """
+    return get_backend().list_pets()
@@ -0,0 +1,275 @@
+"""
+Headless command engine for the pet game.
+
+GameEngine carries out structured commands against one user and pet and
+returns structured results, without reading input or printing. The terminal
+game loop, the server and the session replayer are all thin adapters over it.
+
+Commands are dictionaries with an 'action' and its arguments:
+
+    {'action': 'status'}
+    {'action': 'feed', 'food': 1}
+    {'action': 'sleep'}
+    {'action': 'wake'}
+    {'action': 'play', 'guesses': ['l', 'r', 'l', 'l', 'r']}
+    {'action': 'user_info'}
+    {'action': 'save'}
+
+A command may also carry 'time' (ISO timestamp) to run it at a given moment
+instead of now; the recorder stores it so replays are deterministic. 'play'
+accepts 'answers' for the same reason.
+
+'status', 'feed', 'sleep' and 'play' bring the pet's stats up to the
+command's time before checking whether the action is allowed. The terminal
+game used to check feed and sleep against the stats as of the last status
+view, so, for example, a pet that has since woken up by itself can now be fed.
+'wake' credits the whole sleep itself and doesn't update first.
+
+Results are {'ok': True, 'action': ..., 'messages': [...], ...} or
+{'ok': False, 'action': ..., 'error': ...}.
+"""
+import datetime
+import random
+import time
+from src import clock
+from src import instrumentation
+from src.config import FOODS, MAX_STAT, TOTAL_GAME_COUNT, DIRECTIONS
+from src.data_handler import save_pet, save_user, after_save
+from src.games.which_way import DIRECTION_KEYS, draw_answers, score_game
+
+# Actions that change when the pet's next events happen
+RESCHEDULING_ACTIONS = frozenset(['feed', 'sleep', 'wake'])
+
+
+class CommandError(Exception):
+    """A command that can't be carried out; the message explains why"""
+
+
+def pet_state(pet):
+    """
+    Summarize a pet's current state.
+
+    Args:
+        pet (Pet): Pet to summarize
+
+    Returns:
+        dict: name, age, fullness, energy, sleep and auto_sleep
+    """
+    return {
+        'name': pet.name,
+        'age': pet.age,
+        'fullness': round(pet.fullness, 2),
+        'energy': round(pet.energy, 2),
+        'sleep': pet.sleep,
+        'auto_sleep': pet.auto_sleep
+    }
+
+
+def user_info(user):
+    """
+    Summarize a user's profile.
+
+    Args:
+        user (User): User to summarize
+
+    Returns:
+        dict: Profile fields, pet names and game stats
+    """
+    return {
+        'username': user.username,
+        'birthday': user.birthday.isoformat(),
+        'current_pet': user.get_current_pet_name(),
+        'pets': [pet['name'] for pet in user.pets],
+        'games_played': user.games_played,
+        'games_won': user.games_won,
+        'win_rate': round(user.get_win_rate(), 1),
+        'current_login_streak': user.current_login_streak,
+        'longest_login_streak': user.longest_login_streak
+    }
+
+
+def _valid_directions(values):
+    """Return True if values is a list of one direction key per round"""
+    return (isinstance(values, list) and len(values) == TOTAL_GAME_COUNT
+            and all(isinstance(value, str) and value in DIRECTIONS for value in values))
+
+
+class GameEngine:
+    """
+    Runs commands for one user and their current pet.
+
+    Attributes:
+        user (User): The current user
+        pet (Pet): The pet being cared for
+        pet_filename (str | None): Path the pet is saved to
+        pet_journal (Journal | None): Journal for pet events
+        user_journal (Journal | None): Journal for user events
+        rng (random.Random): Source of game answers
+        persist (bool): Whether 'save' writes to storage (off for replays)
+        recorder (SessionRecorder | None): Receives every command and its result
+        scheduler (EventScheduler | None): Re-predicts the pet's events after feed/sleep/wake
+    """
+
+    def __init__(self, user, pet, pet_filename=None, pet_journal=None, user_journal=None,
+                 rng=None, persist=True, recorder=None, scheduler=None):
+        self.user = user
+        self.pet = pet
+        self.pet_filename = pet_filename
+        self.pet_journal = pet_journal
+        self.user_journal = user_journal
+        self.rng = rng or random.Random()
+        self.persist = persist
+        self.recorder = recorder
+        self.scheduler = scheduler
+        self._commands = {
+            'status': self.status,
+            'feed': self.feed,
+            'sleep': self.sleep,
+            'wake': self.wake,
+            'play': self.play,
+            'user_info': self.user_info,
+            'save': self.save
+        }
+
+    def execute(self, command):
+        """
+        Carry out one command.
+
+        Args:
+            command (dict): Command with an 'action' and its arguments
+
+        Returns:
+            dict: Result with 'ok' and either the action's fields or an 'error'
+        """
+        metrics = instrumentation.registry
+        if metrics is not None:
+            started = time.perf_counter()
+        action = command.get('action')
+        now = clock.now()
+        handler = self._commands.get(action) if isinstance(action, str) else None
+        try:
+            if handler is None:
+                raise CommandError(f"Unknown action: {action!r}")
+            if command.get('time'):
+                try:
+                    now = datetime.datetime.fromisoformat(command['time'])
+                except (TypeError, ValueError):
+                    raise CommandError(f"Invalid time: {command['time']!r}")
+            result = {'ok': True, 'action': action}
+            result.update(handler(command, now))
+        except CommandError as e:
+            result = {'ok': False, 'action': action, 'error': str(e)}
+        if self.recorder is not None:
+            self.recorder.record(command, result, now)
+        if self.scheduler is not None and result['ok'] and action in RESCHEDULING_ACTIONS:
+            self.scheduler.schedule(self.pet_filename, self.pet)
+        if metrics is not None and handler is not None:
+            metrics.observe(f'engine.{action}.seconds', time.perf_counter() - started)
+        return result
+
+    def _update(self, now):
+        """Bring the pet's stats up to now and journal it"""
+        self.pet.update_stats(now)
+        if self.pet_journal:
+            self.pet_journal.append('update', timestamp=now)
+
+    def status(self, command, now):
+        self._update(now)
+        return {'messages': [], 'pet': pet_state(self.pet)}
+
+    def check_can_feed(self):
+        """
+        Check whether the pet can eat right now.
+
+        Raises:
+            CommandError: If the pet is full or sleeping
+        """
+        if self.pet.fullness >= MAX_STAT:
+            raise CommandError(f"{self.pet.name} is already full!")
+        if self.pet.sleep:
+            raise CommandError(f"{self.pet.name} is sleeping and can't eat right now!")
+
+    def feed(self, command, now):
+        pet = self.pet
+        self._update(now)
+        self.check_can_feed()
+        food = command.get('food')
+        if not isinstance(food, int) or isinstance(food, bool) or food not in FOODS:
+            raise CommandError("Invalid food selection!")
+
+        food_data = FOODS[food]
+        pet.feed(food_data['fill_value'])
+        if self.pet_journal:
+            self.pet_journal.append('feed', fill_value=food_data['fill_value'])
+        return {
+            'messages': [f"{pet.name} ate a {food_data['name'].lower()}!",
+                         f"{pet.name} is at {int(pet.fullness)}% fullness!"],
+            'pet': pet_state(pet)
+        }
+
+    def sleep(self, command, now):
+        pet = self.pet
+        self._update(now)
+        if pet.sleep:
+            raise CommandError(f"{pet.name} is sleeping already!")
+        pet.go_to_bed(now)
+        if self.pet_journal:
+            self.pet_journal.append('sleep', timestamp=now)
+        return {'messages': [f"{pet.name} is now sleeping!"], 'pet': pet_state(pet)}
+
+    def wake(self, command, now):
+        # wake_up credits the whole sleep itself, so stats aren't brought up to date first
+        pet = self.pet
+        if not pet.sleep:
+            raise CommandError(f"{pet.name} is not sleeping!")
+        pet.wake_up(now)
+        if self.pet_journal:
+            self.pet_journal.append('wake', timestamp=now)
+        return {'messages': [f"{pet.name} is at {int(pet.energy)}% energy!"], 'pet': pet_state(pet)}
+
+    def draw_answers(self):
+        """
+        Pick where the pet hides in each round of Which Way.
+
+        Returns:
+            list[str]: One direction key per round
+        """
+        return draw_answers(self.rng)
+
+    def play(self, command, now):
+        """Play Which Way with the command's guesses, one per round"""
+        pet = self.pet
+        self._update(now)
+        if pet.sleep:
+            raise CommandError(f"{pet.name} is sleeping and can't play games!")
+        guesses = command.get('guesses')
+        if not _valid_directions(guesses):
+            raise CommandError(f"Send {TOTAL_GAME_COUNT} guesses, each one of {list(DIRECTION_KEYS)}")
+        answers = command.get('answers') or self.draw_answers()
+        if not _valid_directions(answers):
+            raise CommandError(f"Expected {TOTAL_GAME_COUNT} answers, each one of {list(DIRECTION_KEYS)}")
+
+        correct_count, won = score_game(guesses, answers)
+        self.user.update_game_stats(won)
+        if self.user_journal:
+            self.user_journal.append('game', won=won)
+        return {
+            'messages': [f"{pet.name}: You won {correct_count} times, which means...",
+                         f"{pet.name}: YOU WIN!" if won else f"{pet.name}: I WIN!"],
+            'answers': answers,
+            'correct': correct_count,
+            'won': won
+        }
+
+    def user_info(self, command, now):
+        return {'messages': [], 'user': user_info(self.user)}
+
+    def save(self, command, now):
+        if self.persist:
+            save_pet(self.pet, self.pet_filename, quiet=True)
+            save_user(self.user)
+            if self.pet_journal:
+                after_save(self.pet_journal.mark_saved)
+            if self.user_journal:
+                after_save(self.user_journal.mark_saved)
+        return {'messages': [f"Game saved to {self.pet_filename}!"]}
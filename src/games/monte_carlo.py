@@ -0,0 +1,282 @@
+"""
+Monte Carlo runner for Which Way balance checks.
+
+Simulates millions of games to see how often a strategy wins with the
+current TOTAL_GAME_COUNT, and what that means for User.games_won and
+User.get_win_rate. Requires NumPy.
+
+Rounds are generated a chunk at a time as (games x rounds) arrays, and the
+built-in strategies are vectorized over them. Chunks get independent seeds
+from one SeedSequence, so the same seed gives the same counts whatever the
+number of worker processes. Any strategy function from which_way can also be
+run through the pure game engine (slower, but exercises the real game code).
+
+Usage: python -m src.games.monte_carlo --games 10000000 --strategy random --workers 8
+"""
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.config import TOTAL_GAME_COUNT
+from src.games.which_way import DIRECTION_KEYS, STRATEGIES, play_rounds
+
+# Games generated per chunk; bounds memory at about rounds x 8 bytes x this
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+# Game counts shown in the per-player outlook
+PLAYER_GAME_COUNTS = (10, 100, 1000)
+
+
+def _vectorized_guesses(strategy, answers, rng):
+    """Guesses for every game at once, matching the which_way strategy of the same name"""
+    games, rounds = answers.shape
+    choices = len(DIRECTION_KEYS)
+    if strategy == 'random':
+        return rng.integers(0, choices, size=answers.shape)
+    if strategy == 'left':
+        return np.zeros_like(answers)
+    if strategy == 'alternate':
+        return np.broadcast_to(np.arange(rounds) % choices, answers.shape)
+    guesses = np.empty_like(answers)
+    guesses[:, 0] = rng.integers(0, choices, size=games)
+    if strategy == 'repeat':
+        guesses[:, 1:] = answers[:, :-1]
+    elif strategy == 'switch':
+        guesses[:, 1:] = (answers[:, :-1] + 1) % choices
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    return guesses
+
+
+def simulate_chunk(games, strategy, rounds, weights, seed):
+    """
+    Simulate one chunk of games with NumPy.
+
+    Args:
+        games (int): Games in the chunk
+        strategy (str): Name of a built-in strategy
+        rounds (int): Rounds per game
+        weights (list[float] | None): Chance of hiding in each direction (uniform if None)
+        seed (numpy.random.SeedSequence | int): Seed for the chunk
+
+    Returns:
+        numpy.ndarray: Games by number of rounds guessed correctly (length rounds + 1)
+    """
+    rng = np.random.default_rng(seed)
+    answers = rng.choice(len(DIRECTION_KEYS), size=(games, rounds), p=weights)
+    guesses = _vectorized_guesses(strategy, answers, rng)
+    correct = np.count_nonzero(guesses == answers, axis=1)
+    return np.bincount(correct, minlength=rounds + 1)
+
+
+def simulate_with_engine(games, strategy, rounds, weights, seed):
+    """
+    Simulate games one at a time through which_way.play_rounds.
+
+    Args:
+        games (int): Games to play
+        strategy (callable | str): Strategy function, or the name of a built-in one
+        rounds (int): Rounds per game
+        weights (list[float] | None): Chance of hiding in each direction (uniform if None)
+        seed (int): Random seed
+
+    Returns:
+        numpy.ndarray: Games by number of rounds guessed correctly (length rounds + 1)
+    """
+    if isinstance(strategy, str):
+        strategy = STRATEGIES[strategy]
+    rng = random.Random(seed)
+    counts = np.zeros(rounds + 1, dtype=np.int64)
+    for _ in range(games):
+        answers = rng.choices(DIRECTION_KEYS, weights=weights, k=rounds) if weights else None
+        counts[play_rounds(strategy, rng, rounds, answers)['correct']] += 1
+    return counts
+
+
+def _run_chunk(args):
+    return simulate_chunk(*args)
+
+
+def summarize(distribution, strategy, rounds, weights, seconds):
+    """Build the result dict for a distribution of rounds guessed correctly"""
+    games = int(distribution.sum())
+    wins = int(distribution[rounds // 2 + 1:].sum())
+    return {
+        'games': games,
+        'strategy': strategy,
+        'rounds': rounds,
+        'weights': weights,
+        'distribution': distribution.tolist(),
+        'wins': wins,
+        'win_rate': wins / games if games else 0.0,
+        'seconds': seconds
+    }
+
+
+def run_monte_carlo(games, strategy='random', rounds=TOTAL_GAME_COUNT, weights=None, seed=0,
+                    workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Simulate many games and summarize the results.
+
+    Args:
+        games (int): Games to simulate
+        strategy (str): Name of a built-in strategy (see which_way.STRATEGIES)
+        rounds (int): Rounds per game
+        weights (list[float], optional): Chance of hiding in each direction (uniform if None)
+        seed (int): Random seed; the same seed gives the same counts for any number of workers
+        workers (int): Worker processes (1 runs in this process)
+        chunk_size (int): Games generated per chunk
+
+    Returns:
+        dict: Parameters, 'distribution' (games by rounds correct), 'wins', 'win_rate'
+            and 'seconds'
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    started = time.perf_counter()
+    sizes = [chunk_size] * (games // chunk_size)
+    if games % chunk_size or not sizes:
+        sizes.append(games % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(size, strategy, rounds, weights, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_run_chunk, jobs))
+    else:
+        parts = [_run_chunk(job) for job in jobs]
+    distribution = np.sum(parts, axis=0) if parts else np.zeros(rounds + 1, dtype=np.int64)
+    return summarize(distribution, strategy, rounds, weights, time.perf_counter() - started)
+
+
+def expected_win_rate(rounds=TOTAL_GAME_COUNT, p_correct=1 / len(DIRECTION_KEYS)):
+    """
+    Exact chance of winning when each round is guessed right independently.
+
+    Args:
+        rounds (int): Rounds per game
+        p_correct (float): Chance of guessing one round right
+
+    Returns:
+        float: Chance of getting more than half the rounds right
+    """
+    return sum(math.comb(rounds, k) * p_correct ** k * (1 - p_correct) ** (rounds - k)
+               for k in range(rounds // 2 + 1, rounds + 1))
+
+
+def binomial_interval(trials, p, coverage=0.95):
+    """
+    Central interval of a binomial distribution.
+
+    Args:
+        trials (int): Number of trials
+        p (float): Chance of success per trial
+        coverage (float): Share of outcomes inside the interval
+
+    Returns:
+        tuple[int, int]: Lowest and highest success counts in the interval
+    """
+    tail = (1 - coverage) / 2
+    low = high = None
+    cumulative = 0.0
+    for k in range(trials + 1):
+        cumulative += math.comb(trials, k) * p ** k * (1 - p) ** (trials - k)
+        if low is None and cumulative > tail:
+            low = k
+        if cumulative >= 1 - tail:
+            high = k
+            break
+    return low, high if high is not None else trials
+
+
+def player_outlook(win_rate, game_counts=PLAYER_GAME_COUNTS):
+    """
+    What a player's User.games_won and get_win_rate() should look like.
+
+    Args:
+        win_rate (float): Chance of winning one game
+        game_counts (iterable[int]): Values of User.games_played to describe
+
+    Returns:
+        list[dict]: Per game count: expected games_won and the 95% range of
+            games_won and of get_win_rate()
+    """
+    rows = []
+    for played in game_counts:
+        low, high = binomial_interval(played, win_rate)
+        rows.append({
+            'games_played': played,
+            'expected_games_won': played * win_rate,
+            'games_won_range': (low, high),
+            'win_rate_range': (low / played, high / played)
+        })
+    return rows
+
+
+def print_report(result):
+    """Print the simulated distribution and how it compares with the exact odds"""
+    games, rounds = result['games'], result['rounds']
+    print(f"{games:,} games of {rounds} rounds, strategy '{result['strategy']}' "
+          f"in {result['seconds']:.2f}s")
+    print(f"{'correct':>8}{'games':>14}{'share':>9}")
+    for correct, count in enumerate(result['distribution']):
+        marker = "  win" if correct > rounds // 2 else ""
+        print(f"{correct:>8}{count:>14,}{count / games:>9.2%}{marker}")
+
+    win_rate = result['win_rate']
+    print(f"Win rate: {win_rate:.4%} (+/- {1.96 * math.sqrt(win_rate * (1 - win_rate) / games):.4%})")
+    if result['weights'] is None:
+        expected = expected_win_rate(rounds)
+        error = math.sqrt(expected * (1 - expected) / games)
+        z = (win_rate - expected) / error if error else 0.0
+        print(f"Exact win rate for independent guesses: {expected:.4%} (z = {z:+.2f})")
+
+    print(f"{'games_played':>13}{'expected games_won':>20}{'95% games_won':>16}{'95% get_win_rate':>20}")
+    for row in player_outlook(win_rate):
+        low, high = row['games_won_range']
+        rate_low, rate_high = row['win_rate_range']
+        print(f"{row['games_played']:>13,}{row['expected_games_won']:>20.1f}{f'{low}-{high}':>16}"
+              f"{f'{rate_low:.0%}-{rate_high:.0%}':>20}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Which Way games to check win rates.")
+    parser.add_argument("--games", type=int, default=1_000_000, help="games to simulate")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="random", help="guessing strategy")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[TOTAL_GAME_COUNT],
+                        help="rounds per game (several values compare game lengths)")
+    parser.add_argument("--weights", type=float, nargs="+",
+                        help=f"chance of hiding in each direction {list(DIRECTION_KEYS)}")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="games per chunk")
+    parser.add_argument("--engine", action="store_true",
+                        help="play every game through the pure game engine instead of NumPy (slow)")
+    args = parser.parse_args()
+
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if min(args.rounds) < 1 or args.workers < 1 or args.chunk_size < 1:
+        parser.error("--rounds, --workers and --chunk-size must be at least 1")
+    if args.weights and len(args.weights) != len(DIRECTION_KEYS):
+        parser.error(f"--weights needs one value per direction {list(DIRECTION_KEYS)}")
+    if args.weights and not (all(w >= 0 for w in args.weights) and 0 < sum(args.weights) < math.inf):
+        parser.error("--weights must be non-negative numbers with a positive sum")
+    weights = [w / sum(args.weights) for w in args.weights] if args.weights else None
+
+    for rounds in args.rounds:
+        if args.engine:
+            started = time.perf_counter()
+            distribution = simulate_with_engine(args.games, args.strategy, rounds, weights, args.seed)
+            result = summarize(distribution, args.strategy, rounds, weights, time.perf_counter() - started)
+        else:
+            result = run_monte_carlo(args.games, args.strategy, rounds, weights, args.seed,
+                                     args.workers, args.chunk_size)
+        print_report(result)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,127 @@
+"""
+Which Way: guess which way the pet went, TOTAL_GAME_COUNT rounds per game.
+
+The game logic is pure and seeded: draw_answers() picks where the pet hides,
+play_rounds() drives a game with a strategy function, and score_game() decides
+the result. The terminal prompts, GameEngine and the Monte Carlo runner
+(src/games/monte_carlo.py) all build on these.
+
+A strategy is called as strategy(previous_answers, rng) before each round and
+returns a direction key.
+"""
 import random
 from src.config import TOTAL_GAME_COUNT, DIRECTIONS
 
-def play_which_way(pet):
+DIRECTION_KEYS = tuple(DIRECTIONS)
+
+
+def draw_answers(rng=random, rounds=TOTAL_GAME_COUNT):
     """
-    Your game description.
-    
+    Pick where the pet hides in each round.
+
+    Args:
+        rng (random.Random): Random source (the module-level one by default)
+        rounds (int): Rounds per game
+
+    Returns:
+        list[str]: One direction key per round
+    """
+    return [rng.choice(DIRECTION_KEYS) for _ in range(rounds)]
+
+
+def count_correct(guesses, answers):
+    """Number of rounds where the guess matched where the pet went"""
+    return sum(guess == answer for guess, answer in zip(guesses, answers))
+
+
+def is_win(correct_count, rounds=TOTAL_GAME_COUNT):
+    """A game is won by getting more than half the rounds right"""
+    return correct_count > rounds // 2
+
+
+def score_game(guesses, answers):
+    """
+    Score a finished game.
+
+    Args:
+        guesses (list[str]): The player's guesses, one per round
+        answers (list[str]): Where the pet hid in each round
+
+    Returns:
+        tuple[int, bool]: Rounds guessed correctly, and whether the game was won
+    """
+    correct_count = count_correct(guesses, answers)
+    return correct_count, is_win(correct_count, len(answers))
+
+
+def play_rounds(strategy, rng, rounds=TOTAL_GAME_COUNT, answers=None):
+    """
+    Play one game with a strategy instead of a person.
+
+    Args:
+        strategy (callable): Called as strategy(previous_answers, rng); returns a direction key
+        rng (random.Random): Random source for the answers and the strategy
+        rounds (int): Rounds per game
+        answers (list[str], optional): Fixed answers instead of drawing them
+
+    Returns:
+        dict: 'answers', 'guesses', 'correct' and 'won'
+    """
+    if answers is None:
+        answers = draw_answers(rng, rounds)
+    guesses = []
+    for index in range(len(answers)):
+        guesses.append(strategy(answers[:index], rng))
+    correct_count, won = score_game(guesses, answers)
+    return {'answers': answers, 'guesses': guesses, 'correct': correct_count, 'won': won}
+
+
+def guess_randomly(previous_answers, rng):
+    """Strategy: pick a direction at random"""
+    return rng.choice(DIRECTION_KEYS)
+
+
+def guess_left(previous_answers, rng):
+    """Strategy: always guess the first direction"""
+    return DIRECTION_KEYS[0]
+
+
+def guess_alternating(previous_answers, rng):
+    """Strategy: alternate directions, starting with the first"""
+    return DIRECTION_KEYS[len(previous_answers) % len(DIRECTION_KEYS)]
+
+
+def guess_repeat(previous_answers, rng):
+    """Strategy: guess the pet goes where it went last round (random for the first)"""
+    return previous_answers[-1] if previous_answers else rng.choice(DIRECTION_KEYS)
+
+
+def guess_switch(previous_answers, rng):
+    """Strategy: guess the pet goes the other way from last round (random for the first)"""
+    if not previous_answers:
+        return rng.choice(DIRECTION_KEYS)
+    return DIRECTION_KEYS[(DIRECTION_KEYS.index(previous_answers[-1]) + 1) % len(DIRECTION_KEYS)]
+
+
+STRATEGIES = {
+    'random': guess_randomly,
+    'left': guess_left,
+    'alternate': guess_alternating,
+    'repeat': guess_repeat,
+    'switch': guess_switch
+}
+
+
+def prompt_which_way_guesses(pet, answers):
+    """
+    Ask the player for a guess each round and show whether it was right.
+
     Args:
         pet (Pet): The current pet
-    
+        answers (list[str]): Where the pet hides in each round
+
     Returns:
-        bool: True if game completed successfully
+        list[str]: The player's guesses, one per round
     """
     while True:
         game_instructions = input("Do you want to read the game instruction? (y/n) ").strip()
@@ -22,14 +134,11 @@ def play_which_way(pet):
         else:
             print("Invalid answer. Please enter 'y' or 'n'")
 
-    game_count = 0
-    correct_count = 0
+    guesses = []
 
-    while game_count < TOTAL_GAME_COUNT:
-        game_count += 1
+    for game_count, correct in enumerate(answers, 1):
         print("-" * 50)
         print(f"Game: {game_count}/{TOTAL_GAME_COUNT}")
-        correct = random.choice(list(DIRECTIONS.keys()))
 
         while True:
             user_answer = input(f"Which way did {pet.name} go? (l/r) ").strip()
@@ -39,22 +148,38 @@ def play_which_way(pet):
                 print("Invalid answer. Please enter a valid direction.")
 
         print(f"You look {DIRECTIONS[user_answer]}...")
-        
+        guesses.append(user_answer)
+
         if correct == user_answer:
             print(f"{pet.name}: Boo! You found me!")
             print(f">> Hooray! You found {pet.name}!")
-            
-            correct_count += 1
         else:
             print(f"{pet.name}: The correct answer was '{DIRECTIONS[correct]}'!")
             print(">> Better luck next time!")
-    
+
     print("-" * 50)
+    return guesses
+
+
+def play_which_way(pet):
+    """
+    Your game description.
+
+    Args:
+        pet (Pet): The current pet
+
+    Returns:
+        bool: True if game completed successfully
+    """
+    answers = draw_answers()
+    guesses = prompt_which_way_guesses(pet, answers)
+    correct_count, won = score_game(guesses, answers)
+
     print(f"{pet.name}: You won {correct_count} times, which means...")
 
-    if correct_count > (TOTAL_GAME_COUNT // 2):
+    if won:
         print(f"{pet.name}: YOU WIN!")
         return True
     else:
         print(f"{pet.name}: I WIN!")
-        return False
\ No newline at end of file
+        return False
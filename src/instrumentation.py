@@ -0,0 +1,317 @@
+"""
+Opt-in latency and I/O instrumentation.
+
+While disabled (the default) `registry` is None and every hook is a single
+`is None` check. enable() installs a Registry that collects:
+
+- Histograms: HDR-style log-linear buckets (about 1.5% relative precision)
+  with exact count, sum, min and max, e.g. 'data_handler.load_pet.seconds'
+- Counters: running totals, e.g. 'data_handler.bytes_read'
+
+Metrics can be written as JSON or Prometheus text format on exit, or at any
+time with SIGUSR1 (see start()).
+"""
+import atexit
+import functools
+import json
+import math
+import os
+import signal
+import sys
+import threading
+import time
+
+# Sub-buckets per power of two; bucket width is 1/SUB_BUCKETS of the value (~1.5%)
+SUB_BUCKETS = 64
+
+# Percentiles included in JSON output
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Prefix for Prometheus metric names
+PROMETHEUS_PREFIX = "pet_game_"
+
+registry = None
+
+
+class Histogram:
+    """
+    Log-linear histogram of non-negative values.
+
+    Values are counted in buckets whose width grows with the value, so memory
+    stays small however wide the range, and any percentile is accurate to the
+    bucket width.
+
+    Attributes:
+        count (int): Number of values recorded
+        total (float): Sum of the values
+        min (float | None): Smallest value
+        max (float | None): Largest value
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', '_zeros', '_buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._zeros = 0
+        self._buckets = {}
+
+    def record(self, value):
+        """
+        Record one value.
+
+        Args:
+            value (float): Value to record (negative values count as 0)
+        """
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value <= 0:
+            self._zeros += 1
+            return
+        mantissa, exponent = math.frexp(value)
+        key = (exponent, int((mantissa - 0.5) * 2 * SUB_BUCKETS))
+        self._buckets[key] = self._buckets.get(key, 0) + 1
+
+    @staticmethod
+    def _upper_bound(key):
+        exponent, sub_bucket = key
+        return math.ldexp(0.5 + (sub_bucket + 1) / (2 * SUB_BUCKETS), exponent)
+
+    def percentile(self, percent):
+        """
+        Estimate a percentile.
+
+        Args:
+            percent (float): Percentile between 0 and 100
+
+        Returns:
+            float | None: Upper bound of the bucket holding the percentile, or None if empty
+        """
+        if self.count == 0:
+            return None
+        rank = math.ceil(percent / 100 * self.count)
+        seen = self._zeros
+        if seen >= rank:
+            return 0.0
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if seen >= rank:
+                return min(self._upper_bound(key), self.max)
+        return self.max
+
+    def cumulative_buckets(self):
+        """
+        Cumulative counts at each power of two, for Prometheus buckets.
+
+        Returns:
+            list[tuple[float, int]]: (upper bound, count of values at or below it)
+        """
+        per_octave = {}
+        for (exponent, _), count in self._buckets.items():
+            per_octave[exponent] = per_octave.get(exponent, 0) + count
+        result = []
+        seen = self._zeros
+        for exponent in sorted(per_octave):
+            seen += per_octave[exponent]
+            result.append((math.ldexp(1.0, exponent), seen))
+        return result
+
+    def to_dict(self):
+        """Summarize the histogram: count, sum, min, max, mean and percentiles"""
+        summary = {
+            'count': self.count,
+            'sum': self.total,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total / self.count if self.count else None
+        }
+        for percent in PERCENTILES:
+            summary[f'p{percent:g}'] = self.percentile(percent)
+        return summary
+
+
+class Registry:
+    """
+    Named histograms and counters.
+
+    Attributes:
+        histograms (dict[str, Histogram]): Histograms by metric name
+        counters (dict[str, float]): Counter totals by metric name
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value):
+        """Record a value in the named histogram"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(value)
+
+    def increment(self, name, amount=1):
+        """Add to the named counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_json(self):
+        """
+        Render every metric as JSON.
+
+        Returns:
+            str: {'histograms': {name: summary}, 'counters': {name: total}}
+        """
+        with self._lock:
+            data = {
+                'histograms': {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+                'counters': dict(sorted(self.counters.items()))
+            }
+        return json.dumps(data, indent=2)
+
+    def to_prometheus(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        lines = []
+        with self._lock:
+            for name, total in sorted(self.counters.items()):
+                metric = prometheus_name(name) + "_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {total}")
+            for name, histogram in sorted(self.histograms.items()):
+                metric = prometheus_name(name)
+                lines.append(f"# TYPE {metric} histogram")
+                for bound, count in histogram.cumulative_buckets():
+                    lines.append(f'{metric}_bucket{{le="{bound!r}"}} {count}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum {histogram.total}")
+                lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def prometheus_name(name):
+    """Turn a dotted metric name into a Prometheus metric name"""
+    return PROMETHEUS_PREFIX + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def enable():
+    """
+    Start collecting metrics.
+
+    Returns:
+        Registry: The active registry
+    """
+    global registry
+    if registry is None:
+        registry = Registry()
+    return registry
+
+
+def disable():
+    """Stop collecting metrics and drop what was collected"""
+    global registry
+    registry = None
+
+
+def observe(name, value):
+    """Record a value in a histogram, if instrumentation is on"""
+    if registry is not None:
+        registry.observe(name, value)
+
+
+def increment(name, amount=1):
+    """Add to a counter, if instrumentation is on"""
+    if registry is not None:
+        registry.increment(name, amount)
+
+
+def instrumented(name):
+    """
+    Decorator that records a function's latency in '<name>.seconds'.
+
+    When instrumentation is off the wrapper just calls the function.
+
+    Args:
+        name (str): Metric name prefix, e.g. 'data_handler.load_pet'
+    """
+    metric = name + ".seconds"
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            active = registry
+            if active is None:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                active.observe(metric, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def dump(path):
+    """
+    Write the collected metrics to '<path>.json' and '<path>.prom'.
+
+    Args:
+        path (str): Output path without extension
+    """
+    if registry is None:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + ".json", 'w', encoding='utf-8') as f:
+        f.write(registry.to_json())
+    with open(path + ".prom", 'w', encoding='utf-8') as f:
+        f.write(registry.to_prometheus())
+
+
+def dump_in_background(path):
+    """
+    Run dump() on a new thread.
+
+    Signal handlers run on the main thread between bytecodes, possibly while
+    it holds the registry lock, so the SIGUSR1 handler must not dump itself.
+
+    Args:
+        path (str): Output path without extension (see dump())
+
+    Returns:
+        threading.Thread: The started thread
+    """
+    thread = threading.Thread(target=dump, args=(path,), name="instrumentation-dump", daemon=True)
+    thread.start()
+    return thread
+
+
+def start(path):
+    """
+    Enable instrumentation and dump metrics to path on exit and on SIGUSR1.
+
+    Args:
+        path (str): Output path without extension (see dump())
+
+    Returns:
+        Registry: The active registry
+    """
+    active = enable()
+    atexit.register(dump, path)
+    if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, lambda signum, frame: dump_in_background(path))
+    print(f"Instrumentation on; metrics go to {path}.json and {path}.prom", file=sys.stderr)
+    return active
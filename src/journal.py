@@ -0,0 +1,269 @@
+"""
+Append-only event journal for pet and user actions.
+
+Each pet and user gets its own journal file of newline-delimited JSON records:
+one small record per action (feed, sleep, wake, game result, login, ...),
+'saved' markers and occasional snapshots of the full state. Every record
+carries a sequence number and timestamp.
+
+After a clean save the journal is cut down to a single 'saved' marker, so
+the save file is the base the next session's events build on and starting
+a session writes nothing. Only when there is no such base (a new pet or user,
+or state recovered from the journal) does begin() write a snapshot.
+
+If a journal doesn't end with a 'saved' marker, the previous session ended
+without saving, and the state is rebuilt by replaying the events after the
+last snapshot (or the last 'saved' marker, on top of the save file). Every
+JOURNAL_SNAPSHOT_INTERVAL events the journal is compacted into a single new
+snapshot.
+
+Events are flushed to the operating system as they are written, which
+survives the game crashing. Set JOURNAL_FSYNC to also survive power loss,
+at the cost of a disk flush per action.
+"""
+import datetime
+import json
+import os
+from src import clock
+from src.pet import Pet
+from src.user import User
+from src.data_handler import load_pet, load_user
+from src.config import JOURNAL_PATH, JOURNAL_SNAPSHOT_INTERVAL, JOURNAL_FSYNC
+
+
+class Journal:
+    """
+    Journal of events for a single pet or user.
+
+    Attributes:
+        path (str): Journal file path
+        state_fn (callable | None): Returns the current state dict, used for snapshots
+        snapshot_interval (int): Events appended between automatic snapshots
+        fsync (bool): Force every write to disk before returning
+    """
+
+    def __init__(self, path, state_fn=None, snapshot_interval=JOURNAL_SNAPSHOT_INTERVAL, fsync=JOURNAL_FSYNC):
+        self.path = path
+        self.state_fn = state_fn
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+        self._next_seq = None
+        self._events_since_snapshot = 0
+
+    @classmethod
+    def for_pet(cls, pet_filename, state_fn=None):
+        """Journal for the pet saved under pet_filename"""
+        return cls(os.path.join(JOURNAL_PATH, "pets", os.path.basename(pet_filename) + ".log"), state_fn)
+
+    @classmethod
+    def for_user(cls, username, state_fn=None):
+        """Journal for the given user"""
+        return cls(os.path.join(JOURNAL_PATH, "users", f"{username}.log"), state_fn)
+
+    def read(self):
+        """
+        Read every record in the journal.
+
+        A partially written last line (from a crash mid-append) is ignored.
+
+        Returns:
+            list[dict]: Journal records in order
+        """
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return records
+
+    def _seq(self):
+        if self._next_seq is None:
+            records = self.read()
+            self._next_seq = records[-1]['seq'] + 1 if records else 0
+        seq = self._next_seq
+        self._next_seq += 1
+        return seq
+
+    def _record(self, event, timestamp=None, **data):
+        record = {
+            'seq': self._seq(),
+            'timestamp': (timestamp or clock.now()).isoformat(),
+            'event': event
+        }
+        record.update(data)
+        return json.dumps(record) + "\n"
+
+    def _write(self, f, text):
+        f.write(text)
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def begin(self, state):
+        """
+        Start a session from the given state.
+
+        Nothing is written if the journal ends with a 'saved' marker, since the
+        save file already holds the state; otherwise a snapshot is taken so
+        the session's events have a base to replay onto.
+
+        Args:
+            state (dict): Full state at the start of the session, as returned by to_dict()
+        """
+        records = self.read()
+        self._next_seq = records[-1]['seq'] + 1 if records else 0
+        if not records or records[-1]['event'] != 'saved':
+            self.snapshot(state)
+
+    def append(self, event, timestamp=None, **data):
+        """
+        Append an event and flush it.
+
+        Takes a snapshot afterwards once snapshot_interval events have
+        accumulated and a state_fn is set.
+
+        Args:
+            event (str): Event name (e.g. 'feed')
+            timestamp (datetime.datetime, optional): When the event happened, defaults to now
+            **data: Event fields (e.g. fill_value=20)
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            self._write(f, self._record(event, timestamp, **data))
+
+        self._events_since_snapshot += 1
+        if self.state_fn and self._events_since_snapshot >= self.snapshot_interval:
+            self.snapshot(self.state_fn())
+
+    def snapshot(self, state):
+        """
+        Compact the journal into a single snapshot of the given state.
+
+        The new journal is written to a temporary file and renamed into place,
+        so a crash leaves either the old or the new journal intact.
+
+        Args:
+            state (dict): Full state, as returned by to_dict()
+        """
+        self._replace(self._record('snapshot', state=state))
+
+    def mark_saved(self):
+        """Record that the full save file now reflects every event so far, dropping those events"""
+        self._replace(self._record('saved'))
+
+    def _replace(self, text):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            self._write(f, text)
+        os.replace(temp_path, self.path)
+        self._events_since_snapshot = 0
+
+    def pending_events(self):
+        """
+        Find the state to recover from if the last session didn't save.
+
+        Returns:
+            tuple[dict | None, list[dict]] | None: Last snapshot state (None to
+                start from the save file) and the events after it, or None if
+                the journal is empty or ends with a 'saved' marker
+        """
+        records = self.read()
+        if not records or records[-1]['event'] == 'saved':
+            return None
+
+        for i in range(len(records) - 1, -1, -1):
+            if records[i]['event'] == 'snapshot':
+                return records[i]['state'], records[i + 1:]
+            if records[i]['event'] == 'saved':
+                return None, records[i + 1:]
+        # Events with no base, from before begin() wrote one; replay them on the save file
+        return None, records
+
+
+def _timestamp(record):
+    return datetime.datetime.fromisoformat(record['timestamp'])
+
+
+def apply_pet_event(pet, record):
+    """
+    Apply one journal record to a pet.
+
+    Args:
+        pet (Pet): Pet to update
+        record (dict): Journal record
+    """
+    event = record['event']
+    if event == 'update':
+        pet.update_stats(_timestamp(record))
+    elif event == 'feed':
+        pet.feed(record['fill_value'])
+    elif event == 'sleep':
+        pet.go_to_bed(_timestamp(record))
+    elif event == 'wake':
+        pet.wake_up(_timestamp(record))
+
+
+def apply_user_event(user, record):
+    """
+    Apply one journal record to a user.
+
+    Args:
+        user (User): User to update
+        record (dict): Journal record
+    """
+    event = record['event']
+    if event == 'game':
+        user.update_game_stats(record['won'])
+    elif event == 'login':
+        user.last_login_date = datetime.date.fromisoformat(record['last_login_date'])
+        user.current_login_streak = record['current_login_streak']
+        user.longest_login_streak = record['longest_login_streak']
+
+
+def recover_pet(pet_filename):
+    """
+    Rebuild a pet from its journal if the last session ended without saving.
+
+    Args:
+        pet_filename (str): Pet save filename
+
+    Returns:
+        Pet | None: Recovered pet, or None if there is nothing to recover
+    """
+    pending = Journal.for_pet(pet_filename).pending_events()
+    if pending is None:
+        return None
+    state, events = pending
+    pet = Pet.from_dict(state) if state is not None else load_pet(pet_filename, quiet=True)
+    if pet is None:
+        return None
+    for record in events:
+        apply_pet_event(pet, record)
+    return pet
+
+
+def recover_user(username):
+    """
+    Rebuild a user from their journal if the last session ended without saving.
+
+    Args:
+        username (str): Username to recover
+
+    Returns:
+        User | None: Recovered user, or None if there is nothing to recover
+    """
+    pending = Journal.for_user(username).pending_events()
+    if pending is None:
+        return None
+    state, events = pending
+    user = User.from_dict(state) if state is not None else load_user(username)
+    if user is None:
+        return None
+    for record in events:
+        apply_user_event(user, record)
+    return user
@@ -0,0 +1,126 @@
+"""
+Lazy pet proxies for users who own many pets.
+
+A LazyPet stands in for a Pet listed in User.pets. It reads and parses the
+save file only when a pet attribute is first used, and catches up on stats
+before the first stat read, method call or assignment, so it behaves like a
+Pet loaded and updated eagerly. Listings can use header() to get a pet's
+name, sleep flag and last update time without building the Pet at all.
+Login uses load_current_pet() so only the pet being played is read.
+"""
+import os
+from src.config import PETS_PATH
+from src.data_handler import load_pet, load_pet_header
+
+# Fields that don't change as time passes; using anything else brings the stats up to date first
+STATIC_ATTRIBUTES = frozenset(['name', 'owner', 'birthday'])
+
+
+class LazyPet:
+    """
+    Proxy that loads a Pet from its save file on first use.
+
+    Attributes:
+        filename (str): Path to the pet's save file
+    """
+
+    __slots__ = ('filename', '_pet', '_stats_updated', '_header')
+
+    def __init__(self, filename):
+        object.__setattr__(self, 'filename', filename)
+        object.__setattr__(self, '_pet', None)
+        object.__setattr__(self, '_stats_updated', False)
+        object.__setattr__(self, '_header', None)
+
+    @property
+    def loaded(self):
+        """bool: Whether the save file has been read and parsed"""
+        return self._pet is not None
+
+    def resolve(self):
+        """
+        Load the pet if it hasn't been loaded yet.
+
+        Returns:
+            Pet: The loaded pet
+
+        Raises:
+            LookupError: If the save file is missing or invalid
+        """
+        if self._pet is None:
+            pet = load_pet(self.filename, quiet=True)
+            if pet is None:
+                raise LookupError(f"Could not load pet file {self.filename}")
+            object.__setattr__(self, '_pet', pet)
+        return self._pet
+
+    def header(self):
+        """
+        Read the pet's name, sleep flag and last update time.
+
+        Uses the loaded pet if there is one; otherwise reads only the save
+        file's header fields without building a Pet.
+
+        Returns:
+            dict | None: {'name', 'sleep', 'last_update'} or None if the file is missing or invalid
+        """
+        if self._pet is not None:
+            return {'name': self._pet.name, 'sleep': self._pet.sleep, 'last_update': self._pet.last_update}
+        if self._header is None:
+            object.__setattr__(self, '_header', load_pet_header(self.filename))
+        return self._header
+
+    def _current(self, name=None):
+        """The loaded pet, with its stats caught up unless name is a static field"""
+        pet = self.resolve()
+        if name not in STATIC_ATTRIBUTES and not self._stats_updated:
+            pet.update_stats()
+            object.__setattr__(self, '_stats_updated', True)
+        return pet
+
+    def __getattr__(self, name):
+        return getattr(self._current(name), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._current(name), name, value)
+
+    def __str__(self):
+        return str(self._current())
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<LazyPet {self.filename} ({state})>"
+
+
+def pet_proxies(user):
+    """
+    Get a lazy proxy for every pet a user owns, without loading any of them.
+
+    Args:
+        user (User): Owner of the pets
+
+    Returns:
+        dict[str, LazyPet]: Proxies by pet filename, in the order the pets were added
+    """
+    return {pet['filename']: LazyPet(os.path.join(PETS_PATH, pet['filename'])) for pet in user.pets}
+
+
+def load_current_pet(user, pet_filename=None):
+    """
+    Load the pet a user is playing, and none of their other pets.
+
+    Args:
+        user (User): Owner of the pet
+        pet_filename (str, optional): Pet to load (defaults to the user's current pet)
+
+    Returns:
+        Pet | None: The pet with its stats up to date, or None if there is no such
+            pet or its save file is missing or invalid
+    """
+    pet_filename = pet_filename or user.current_pet
+    if not pet_filename:
+        return None
+    try:
+        return LazyPet(os.path.join(PETS_PATH, pet_filename))._current()
+    except LookupError:
+        return None
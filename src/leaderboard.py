@@ -0,0 +1,608 @@
+"""
+Incrementally maintained leaderboards.
+
+Boards:
+
+- 'games_won':      most games won
+- 'win_rate':       best win rate, among users with at least LEADERBOARD_MIN_GAMES games
+- 'longest_streak': longest login streak
+- 'oldest_pet':     pets by birthday, oldest first
+
+save_user/save_pet hand each saved record to the leaderboards, which update
+only that entry. Each board is a bucketed sorted list with a Fenwick tree over
+the bucket sizes, so updates, rank-of queries and top-K pages cost
+O(log n + bucket size) however many users there are.
+
+The entries behind the boards live in LEADERBOARD_PATH as a snapshot plus an
+append-only log of changes since; the log is folded into the snapshot once it
+passes LEADERBOARD_LOG_LIMIT lines. If neither exists the boards are rebuilt
+from stored users and pets, across worker processes.
+
+Several processes may share LEADERBOARD_PATH (the server, world ticks, bulk
+imports). Appends, snapshots and rebuilds hold a lock on leaderboard.lock, and
+each process reads the changes others have logged before writing its own, so
+nothing another process recorded is lost. Every log starts with a random
+generation line; a process that finds a different generation knows another
+process took a new snapshot and reloads it.
+
+Usage: python -m src.leaderboard games_won [--top 10] [--rank USERNAME] [--rebuild]
+"""
+import argparse
+import bisect
+import contextlib
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.storage import get_backend
+from src.serialization import detect_codec
+from src.config import PETS_PATH, LEADERBOARD_PATH, LEADERBOARD_MIN_GAMES, LEADERBOARD_LOG_LIMIT
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are locked out
+    fcntl = None
+
+BOARDS = ('games_won', 'win_rate', 'longest_streak', 'oldest_pet')
+
+# Keys per bucket before it is split in two
+BUCKET_SIZE = 512
+
+# Records per task when rebuilding in parallel
+REBUILD_CHUNK_SIZE = 1000
+
+
+class SortedBoard:
+    """
+    Members ordered by score, highest first (ties by member name).
+
+    Attributes:
+        name (str): Board name
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._buckets = []
+        self._maxes = []
+        self._tree = None
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, member):
+        return member in self._keys
+
+    def set(self, member, score):
+        """
+        Add a member or change its score.
+
+        Args:
+            member (str): Member name
+            score (float): New score (higher ranks first)
+        """
+        key = (-score, member)
+        old = self._keys.get(member)
+        if old == key:
+            return
+        if old is not None:
+            self._remove(old)
+        self._insert(key)
+        self._keys[member] = key
+
+    def discard(self, member):
+        """Remove a member if present"""
+        key = self._keys.pop(member, None)
+        if key is not None:
+            self._remove(key)
+
+    def score(self, member):
+        """A member's score, or None if it isn't on the board"""
+        key = self._keys.get(member)
+        return None if key is None else -key[0]
+
+    def _insert(self, key):
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._tree = None
+            return
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._buckets):
+            i -= 1
+            self._buckets[i].append(key)
+            self._maxes[i] = key
+        else:
+            bisect.insort(self._buckets[i], key)
+        bucket = self._buckets[i]
+        if len(bucket) > 2 * BUCKET_SIZE:
+            self._buckets[i:i + 1] = [bucket[:BUCKET_SIZE], bucket[BUCKET_SIZE:]]
+            self._maxes[i:i + 1] = [bucket[BUCKET_SIZE - 1], bucket[-1]]
+            self._tree = None
+        else:
+            self._tree_add(i, 1)
+
+    def _remove(self, key):
+        i = bisect.bisect_left(self._maxes, key)
+        bucket = self._buckets[i]
+        del bucket[bisect.bisect_left(bucket, key)]
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+            self._tree = None
+
+    def _tree_add(self, i, amount):
+        tree = self._tree
+        if tree is None:
+            return
+        i += 1
+        while i < len(tree):
+            tree[i] += amount
+            i += i & -i
+
+    def _before(self, i):
+        """Number of members in buckets before bucket i"""
+        if self._tree is None:
+            # Fenwick tree over bucket sizes, rebuilt only after a split or an emptied bucket
+            tree = [0] * (len(self._buckets) + 1)
+            for j, bucket in enumerate(self._buckets, 1):
+                tree[j] += len(bucket)
+                parent = j + (j & -j)
+                if parent < len(tree):
+                    tree[parent] += tree[j]
+            self._tree = tree
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def rank(self, member):
+        """
+        A member's position on the board.
+
+        Returns:
+            int | None: 1 for the top member, or None if it isn't on the board
+        """
+        key = self._keys.get(member)
+        if key is None:
+            return None
+        i = bisect.bisect_left(self._maxes, key)
+        return self._before(i) + bisect.bisect_left(self._buckets[i], key) + 1
+
+    def top(self, count=10, offset=0):
+        """
+        One page of the board.
+
+        Args:
+            count (int): Members to return
+            offset (int): Members to skip (0 starts at the top)
+
+        Returns:
+            list[tuple[str, float]]: (member, score) pairs, best first
+        """
+        # Find the bucket holding position offset by walking the Fenwick tree down
+        self._before(0)
+        tree = self._tree
+        i, remaining = 0, offset
+        step = 1 << (len(tree).bit_length() - 1)
+        while step:
+            if i + step < len(tree) and tree[i + step] <= remaining:
+                i += step
+                remaining -= tree[i]
+            step >>= 1
+
+        page = []
+        while i < len(self._buckets) and len(page) < count:
+            for negative_score, member in self._buckets[i][remaining:remaining + count - len(page)]:
+                page.append((member, -negative_score))
+            i += 1
+            remaining = 0
+        return page
+
+
+def user_entry(user):
+    """Leaderboard fields of a user: [games_won, games_played, longest_login_streak]"""
+    return [user.games_won, user.games_played, user.longest_login_streak]
+
+
+def pet_entry(pet):
+    """Leaderboard fields of a pet: [owner, birthday as an ordinal day]"""
+    return [pet.owner, pet.birthday.toordinal()]
+
+
+def pet_key(filename):
+    """Pets are ranked by save filename, wherever the file lives"""
+    return os.path.basename(filename)
+
+
+def _read_users(usernames):
+    """Load a chunk of stored users and return their leaderboard entries"""
+    backend = get_backend()
+    entries = {}
+    for username in usernames:
+        payload = backend.read_user(username)
+        if payload is None:
+            continue
+        try:
+            entries[username] = user_entry(detect_codec(payload).decode_user(payload))
+        except (ValueError, KeyError, TypeError):
+            continue
+    return entries
+
+
+def _read_pets(filenames):
+    """Load a chunk of stored pets and return their leaderboard entries"""
+    backend = get_backend()
+    entries = {}
+    for filename in filenames:
+        payload = backend.read_pet(os.path.join(PETS_PATH, filename))
+        if payload is None:
+            continue
+        try:
+            entries[filename] = pet_entry(detect_codec(payload).decode_pet(payload))
+        except (ValueError, KeyError, TypeError):
+            continue
+    return entries
+
+
+def _parse_generation(header):
+    """The generation named by a log's first line, or None if it has none"""
+    if not header.startswith(b'{'):
+        return None
+    try:
+        return json.loads(header)['generation']
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class Leaderboards:
+    """
+    Every leaderboard, kept up to date one saved record at a time.
+
+    Attributes:
+        path (str): Directory holding the snapshot and change log
+        min_games (int): Games a user needs before appearing on 'win_rate'
+        log_limit (int): Change log lines that trigger a new snapshot
+        boards (dict[str, SortedBoard]): Boards by name
+    """
+
+    def __init__(self, path=LEADERBOARD_PATH, min_games=LEADERBOARD_MIN_GAMES, log_limit=LEADERBOARD_LOG_LIMIT):
+        self.path = path
+        self.min_games = min_games
+        self.log_limit = log_limit
+        os.makedirs(path, exist_ok=True)
+        self._snapshot_path = os.path.join(path, "leaderboard.json")
+        self._log_path = os.path.join(path, "leaderboard.log")
+        self._lock_path = os.path.join(path, "leaderboard.lock")
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._reset()
+        with self._locked():
+            self._load()
+
+    def _reset(self):
+        self.boards = {name: SortedBoard(name) for name in BOARDS}
+        self._users = {}
+        self._pets = {}
+        self._log_lines = 0
+        self._log_offset = 0
+        self._generation = None
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the thread lock and, outermost, the lock file shared with other processes"""
+        with self._lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                if self._lock_file is None:
+                    self._lock_file = open(self._lock_path, 'a')
+                # lockf locks belong to the process, so pools forked from here don't share them
+                fcntl.lockf(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and fcntl is not None:
+                    fcntl.lockf(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def exists(self):
+        """Return True if the leaderboards have been saved before"""
+        return os.path.exists(self._snapshot_path) or os.path.exists(self._log_path)
+
+    def _load(self):
+        if os.path.exists(self._snapshot_path):
+            with open(self._snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            for username, entry in snapshot['users'].items():
+                self._apply_user(username, entry)
+            for filename, entry in snapshot['pets'].items():
+                self._apply_pet(filename, entry)
+        self._read_log()
+
+    def _read_log(self):
+        """
+        Apply log lines written since the last read, by this process or any other.
+
+        Returns:
+            bool: False if the log was replaced by a new snapshot since the last read
+        """
+        try:
+            f = open(self._log_path, 'rb')
+        except FileNotFoundError:
+            return self._log_offset == 0
+        with f:
+            header = f.readline()
+            generation = _parse_generation(header)
+            if self._log_offset == 0:
+                self._generation = generation
+                self._log_offset = 0 if generation is None else len(header)
+            elif generation != self._generation:
+                return False
+            f.seek(self._log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._log_offset += len(line)
+                try:
+                    kind, name, entry = json.loads(line)
+                except ValueError:
+                    # A write cut short by a crash; the lines around it still count
+                    continue
+                if kind == 'user':
+                    self._apply_user(name, entry)
+                else:
+                    self._apply_pet(name, entry)
+                self._log_lines += 1
+        return True
+
+    def _sync(self):
+        """Catch up with changes other processes have saved (call with the lock held)"""
+        if not self._read_log():
+            # Another process wrote a new snapshot, which holds everything logged before it
+            self._reset()
+            self._load()
+
+    def _apply_user(self, username, entry):
+        won, played, streak = entry
+        self._users[username] = entry
+        self.boards['games_won'].set(username, won)
+        self.boards['longest_streak'].set(username, streak)
+        if played >= self.min_games:
+            self.boards['win_rate'].set(username, won / played)
+        else:
+            self.boards['win_rate'].discard(username)
+
+    def _apply_pet(self, filename, entry):
+        self._pets[filename] = entry
+        # Earlier birthdays rank higher
+        self.boards['oldest_pet'].set(filename, -entry[1])
+
+    def _append(self, kind, name, entry):
+        line = (json.dumps([kind, name, entry]) + "\n").encode('utf-8')
+        with open(self._log_path, 'ab') as f:
+            if f.tell() == 0:
+                self._start_log(f)
+            f.write(line)
+        self._log_offset += len(line)
+        self._log_lines += 1
+        if self._log_lines >= self.log_limit:
+            self._write_snapshot()
+
+    def update_user(self, username, user):
+        """
+        Record a saved user's current stats.
+
+        Args:
+            username (str): Username it was saved under
+            user (User): The saved user
+        """
+        entry = user_entry(user)
+        with self._locked():
+            self._sync()
+            if self._users.get(username) == entry:
+                return
+            self._apply_user(username, entry)
+            self._append('user', username, entry)
+
+    def update_pet(self, filename, pet):
+        """
+        Record a saved pet.
+
+        Args:
+            filename (str): Path it was saved to
+            pet (Pet): The saved pet
+        """
+        filename = pet_key(filename)
+        entry = pet_entry(pet)
+        with self._locked():
+            self._sync()
+            if self._pets.get(filename) == entry:
+                return
+            self._apply_pet(filename, entry)
+            self._append('pet', filename, entry)
+
+    def compact(self):
+        """Write every entry, including other processes' changes, to a new snapshot and empty the change log"""
+        with self._locked():
+            self._sync()
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        """Replace the snapshot with the entries held here (call with the lock held)"""
+        self._replace(self._snapshot_path, lambda f: f.write(
+            json.dumps({'users': self._users, 'pets': self._pets}).encode('utf-8')))
+        # Start an empty log of a new generation, so other processes know to reload
+        self._replace(self._log_path, self._start_log)
+        self._log_lines = 0
+
+    def _replace(self, path, write):
+        """Write a file through a uniquely named temporary file"""
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=self.path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+
+    def _start_log(self, f):
+        """Write a new generation line to the start of an empty log"""
+        self._generation = os.urandom(8).hex()
+        header = (json.dumps({'generation': self._generation}) + "\n").encode('utf-8')
+        f.write(header)
+        self._log_offset = len(header)
+
+    def rebuild(self, workers=None, chunk_size=REBUILD_CHUNK_SIZE):
+        """
+        Rebuild every board from the stored users and pets.
+
+        Other processes' saves wait until the rebuild is written.
+
+        Args:
+            workers (int, optional): Worker processes (defaults to the CPU count; 1 reads in this process)
+            chunk_size (int): Records per task
+        """
+        with self._locked():
+            self._rebuild(workers, chunk_size)
+
+    def _rebuild(self, workers, chunk_size):
+        backend = get_backend()
+        usernames = backend.list_users()
+        filenames = backend.list_pets()
+        user_chunks = [usernames[i:i + chunk_size] for i in range(0, len(usernames), chunk_size)]
+        pet_chunks = [filenames[i:i + chunk_size] for i in range(0, len(filenames), chunk_size)]
+
+        if workers == 1 or len(user_chunks) + len(pet_chunks) <= 1:
+            user_parts = [_read_users(chunk) for chunk in user_chunks]
+            pet_parts = [_read_pets(chunk) for chunk in pet_chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                user_futures = [executor.submit(_read_users, chunk) for chunk in user_chunks]
+                pet_futures = [executor.submit(_read_pets, chunk) for chunk in pet_chunks]
+                user_parts = [future.result() for future in user_futures]
+                pet_parts = [future.result() for future in pet_futures]
+
+        self._reset()
+        for part in user_parts:
+            for username, entry in part.items():
+                self._apply_user(username, entry)
+        for part in pet_parts:
+            for filename, entry in part.items():
+                self._apply_pet(filename, entry)
+        self._write_snapshot()
+
+    def top(self, board, count=10, offset=0):
+        """
+        One page of a board.
+
+        Args:
+            board (str): Board name (see BOARDS)
+            count (int): Entries to return
+            offset (int): Entries to skip
+
+        Returns:
+            list[dict]: {'rank', 'name', 'score'} best first; 'oldest_pet' entries
+                also have 'owner' and a 'birthday' date instead of a score
+        """
+        with self._locked():
+            self._sync()
+            page = self.boards[board].top(count, offset)
+            return [self._describe(board, rank, name, score)
+                    for rank, (name, score) in enumerate(page, offset + 1)]
+
+    def rank(self, board, name):
+        """
+        Where a user (or, for 'oldest_pet', a pet filename) stands on a board.
+
+        Returns:
+            dict | None: {'rank', 'name', 'score', 'of'} or None if not on the board
+        """
+        with self._locked():
+            self._sync()
+            board_entries = self.boards[board]
+            if board == 'oldest_pet':
+                name = pet_key(name)
+            rank = board_entries.rank(name)
+            if rank is None:
+                return None
+            result = self._describe(board, rank, name, board_entries.score(name))
+            result['of'] = len(board_entries)
+            return result
+
+    def _describe(self, board, rank, name, score):
+        if board == 'oldest_pet':
+            owner, ordinal = self._pets[name]
+            return {'rank': rank, 'name': name, 'owner': owner,
+                    'birthday': datetime.date.fromordinal(ordinal).isoformat()}
+        return {'rank': rank, 'name': name, 'score': score}
+
+
+_leaderboards = None
+
+
+def get_leaderboards():
+    """
+    Get the shared leaderboards, rebuilding them from stored data on first use.
+
+    Returns:
+        Leaderboards: The leaderboards
+    """
+    global _leaderboards
+    if _leaderboards is None:
+        leaderboards = Leaderboards()
+        with leaderboards._locked():
+            # Another process may have rebuilt them while we waited for the lock
+            if not leaderboards.exists():
+                leaderboards.rebuild()
+            else:
+                leaderboards._sync()
+        _leaderboards = leaderboards
+    return _leaderboards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the leaderboards.")
+    parser.add_argument("board", choices=BOARDS, help="leaderboard to show")
+    parser.add_argument("--top", type=int, default=10, help="entries to show")
+    parser.add_argument("--offset", type=int, default=0, help="entries to skip")
+    parser.add_argument("--rank", metavar="NAME", help="show where a user (or pet file) stands")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild from the stored users and pets first")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --rebuild")
+    args = parser.parse_args()
+
+    leaderboards = get_leaderboards()
+    if args.rebuild:
+        started = time.perf_counter()
+        leaderboards.rebuild(args.workers)
+        print(f"Rebuilt in {time.perf_counter() - started:.2f}s")
+
+    if args.rank:
+        entry = leaderboards.rank(args.board, args.rank)
+        print(f"{args.rank} is not on the {args.board} board" if entry is None
+              else f"{entry['name']} is #{entry['rank']} of {entry['of']} ({format_value(args.board, entry)})")
+        return
+    for entry in leaderboards.top(args.board, args.top, args.offset):
+        print(f"{entry['rank']:>6}  {entry['name']:<24}{format_value(args.board, entry)}")
+
+
+def format_value(board, entry):
+    """Format an entry's score for display"""
+    if board == 'oldest_pet':
+        return f"born {entry['birthday']} ({entry['owner'] or 'no owner'})"
+    if board == 'win_rate':
+        return f"{entry['score']:.1%}"
+    return f"{entry['score']:g}"
+
+
+if __name__ == "__main__":
+    main()
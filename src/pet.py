@@ -1,14 +1,144 @@
 import datetime
+import time
+from src import clock
+from src import instrumentation
 from src.config import (
     MIN_STAT,
     MAX_STAT,
     SLEEP_RESTORATION_RATE,
     SLEEP_FULLNESS_MULTIPLIER,
+    AUTO_WAKE_ENERGY,
     FULLNESS_DECREASE_RATE,
     ENERGY_DECREASE_RATE,
     DEFAULT_FULLNESS,
     DEFAULT_ENERGY
 )
+from src.schema import SCHEMA_FIELD, PET_SCHEMA_VERSION, upgrade_pet
+
+
+# Timestamps are kept internally as seconds since this naive epoch
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def datetime_to_epoch(value):
+    """Convert a naive datetime to epoch seconds (None stays None)"""
+    if value is None:
+        return None
+    return (value - EPOCH).total_seconds()
+
+
+def epoch_to_datetime(seconds):
+    """Convert epoch seconds to a naive datetime (None stays None)"""
+    if seconds is None:
+        return None
+    return EPOCH + datetime.timedelta(seconds=seconds)
+
+
+# One steady auto-sleep/auto-wake cycle: awake from 10% down to 0%, then asleep back up to 10%
+CYCLE_AWAKE_SECONDS = AUTO_WAKE_ENERGY * ENERGY_DECREASE_RATE
+CYCLE_ASLEEP_SECONDS = AUTO_WAKE_ENERGY * SLEEP_RESTORATION_RATE
+CYCLE_SECONDS = CYCLE_AWAKE_SECONDS + CYCLE_ASLEEP_SECONDS
+CYCLE_FULLNESS_LOSS = (CYCLE_AWAKE_SECONDS / FULLNESS_DECREASE_RATE
+                       + CYCLE_ASLEEP_SECONDS / FULLNESS_DECREASE_RATE * SLEEP_FULLNESS_MULTIPLIER)
+
+
+def advance_stats(sleep, auto_sleep, energy, fullness, elapsed_seconds):
+    """
+    Advance raw pet stats by a span of elapsed time.
+
+    Stats change linearly between auto-sleep (energy hits 0%) and auto-wake
+    (energy back to 10%, or 100% after a manual sleep). Once the pet auto-wakes
+    it is in a steady cycle, so all whole cycles left are skipped in one step.
+    This keeps the cost constant no matter how long the pet was left alone.
+
+    Stats are not capped here; fullness may go below 0.
+
+    Args:
+        sleep (bool): Whether the pet is sleeping at the start
+        auto_sleep (bool): Whether that sleep was triggered automatically
+        energy (float): Energy at the start
+        fullness (float): Fullness at the start
+        elapsed_seconds (float): Seconds to advance
+
+    Returns:
+        tuple: (sleep, auto_sleep, energy, fullness, transition, iterations) where transition
+            is the offset in seconds of the last auto-sleep/auto-wake, or None if there was
+            none, and iterations is the number of linear segments walked
+    """
+    remaining_time = elapsed_seconds
+    offset = 0.0
+    transition = None
+    iterations = 0
+
+    while remaining_time > 0:
+        iterations += 1
+        if sleep:
+            # Auto-wake at 10% if auto-sleep, or at 100% if manual sleep
+            wake_threshold = AUTO_WAKE_ENERGY if auto_sleep else MAX_STAT
+            new_energy = energy + remaining_time / SLEEP_RESTORATION_RATE
+            if new_energy >= wake_threshold and energy < wake_threshold:
+                time_to_wake = (wake_threshold - energy) * SLEEP_RESTORATION_RATE
+                fullness -= (time_to_wake / FULLNESS_DECREASE_RATE) * SLEEP_FULLNESS_MULTIPLIER
+                energy = wake_threshold
+                remaining_time -= time_to_wake
+                offset += time_to_wake
+                transition = offset
+
+                # After an auto-wake the pet repeats the same cycle, so skip whole cycles
+                if auto_sleep:
+                    cycles = int(remaining_time // CYCLE_SECONDS)
+                    if cycles > 0:
+                        fullness -= cycles * CYCLE_FULLNESS_LOSS
+                        remaining_time -= cycles * CYCLE_SECONDS
+                        offset += cycles * CYCLE_SECONDS
+                        transition = offset
+
+                sleep = False
+                auto_sleep = False
+                continue
+
+            fullness -= (remaining_time / FULLNESS_DECREASE_RATE) * SLEEP_FULLNESS_MULTIPLIER
+            energy = new_energy
+            break
+
+        new_energy = energy - remaining_time / ENERGY_DECREASE_RATE
+        if new_energy <= MIN_STAT and energy > MIN_STAT:
+            time_to_zero = energy * ENERGY_DECREASE_RATE
+            fullness -= time_to_zero / FULLNESS_DECREASE_RATE
+            energy = MIN_STAT
+            remaining_time -= time_to_zero
+            offset += time_to_zero
+            transition = offset
+
+            sleep = True
+            auto_sleep = True
+            continue
+
+        fullness -= remaining_time / FULLNESS_DECREASE_RATE
+        energy = new_energy
+        break
+
+    return sleep, auto_sleep, energy, fullness, transition, iterations
+
+
+# Fields every current-version pet record has
+REQUIRED_FIELDS = (
+    'name', 'owner', 'birthday', 'age', 'sleep', 'auto_sleep', 'sleep_start', 'last_update',
+    'fullness', 'energy', 'fullness_zero_since', 'energy_zero_since'
+)
+
+
+def _parse_timestamp(data, field, optional=True):
+    """Parse an ISO timestamp field of a saved pet"""
+    value = data[field]
+    if value is None and optional:
+        return None
+    if not isinstance(value, str):
+        raise TypeError(f"{field} must be a string{' or None' if optional else ''}")
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError(f"Invalid {field} format: {e}")
 
 
 class Pet:
@@ -30,8 +160,16 @@ class Pet:
         last_update (datetime.datetime): When stats were last updated
         fullness (int): Fullness level from 0 (starving) to 100 (full)
         energy (int): Energy level from 0 (exhausted) to 100 (fully energized)
+
+    Timestamps are stored as float epoch seconds and only converted to
+    datetime objects when read through their properties.
     """
 
+    __slots__ = (
+        'name', 'owner', 'birthday', 'age', 'sleep', 'auto_sleep', 'fullness', 'energy',
+        '_last_update', '_sleep_start', '_fullness_zero_since', '_energy_zero_since'
+    )
+
     def __init__(self, name, owner=None):
         """
         Initializes Pet instance
@@ -51,7 +189,8 @@ class Pet:
         self.owner = owner
 
         # life info
-        self.birthday = datetime.datetime.now().date()
+        now = clock.now()
+        self.birthday = now.date()
         self.age = 0
 
         # sleep
@@ -60,7 +199,7 @@ class Pet:
         self.auto_sleep = False  # Track if sleep was automatic (from 0% energy)
 
         # stats
-        self.last_update = datetime.datetime.now()
+        self.last_update = now
         self.fullness = DEFAULT_FULLNESS
         self.energy = DEFAULT_ENERGY
 
@@ -69,87 +208,79 @@ class Pet:
         self.energy_zero_since = None  # timestamp when energy first hit 0
 
 
-    def update_stats(self):
+    @property
+    def last_update(self):
+        """datetime.datetime: When stats were last updated"""
+        return epoch_to_datetime(self._last_update)
+
+    @last_update.setter
+    def last_update(self, value):
+        self._last_update = datetime_to_epoch(value)
+
+    @property
+    def sleep_start(self):
+        """datetime.datetime | None: When the pet started sleeping"""
+        return epoch_to_datetime(self._sleep_start)
+
+    @sleep_start.setter
+    def sleep_start(self, value):
+        self._sleep_start = datetime_to_epoch(value)
+
+    @property
+    def fullness_zero_since(self):
+        """datetime.datetime | None: When fullness hit 0"""
+        return epoch_to_datetime(self._fullness_zero_since)
+
+    @fullness_zero_since.setter
+    def fullness_zero_since(self, value):
+        self._fullness_zero_since = datetime_to_epoch(value)
+
+    @property
+    def energy_zero_since(self):
+        """datetime.datetime | None: When energy hit 0"""
+        return epoch_to_datetime(self._energy_zero_since)
+
+    @energy_zero_since.setter
+    def energy_zero_since(self, value):
+        self._energy_zero_since = datetime_to_epoch(value)
+
+
+    def update_stats(self, now=None):
         """
         Update fullness and energy based on elapsed time.
         Fullness decreases over time (slower while sleeping).
         Energy decreases over time (but not while sleeping).
         If energy hits 0%, pet automatically sleeps until energy reaches 10%.
+
+        Args:
+            now (datetime.datetime, optional): Time to update the stats to.
+                Defaults to the current time.
         """
-        now = datetime.datetime.now()
-        elapsed_seconds = (now - self.last_update).total_seconds()
+        metrics = instrumentation.registry
+        if metrics is not None:
+            started = time.perf_counter()
+        if now is None:
+            now = clock.now()
+        now_seconds = datetime_to_epoch(now)
+        elapsed_seconds = now_seconds - self._last_update
 
         # Store old fullness to calculate when it hit zero
         old_fullness = self.fullness
-
-        # Handle time simulation in chunks if auto-sleep/wake might occur
-        remaining_time = elapsed_seconds
-        current_time = self.last_update
-
-        while remaining_time > 0:
-            # Calculate fullness decrease (slower when sleeping)
-            fullness_multiplier = SLEEP_FULLNESS_MULTIPLIER if self.sleep else 1.0
-            fullness_change = (remaining_time / FULLNESS_DECREASE_RATE) * fullness_multiplier
-            new_fullness = self.fullness - fullness_change
-
-            # Calculate energy change
-            if self.sleep:
-                # Restore energy while sleeping
-                energy_change = remaining_time / SLEEP_RESTORATION_RATE
-                new_energy = self.energy + energy_change
-            else:
-                # Decrease energy while awake
-                energy_change = remaining_time / ENERGY_DECREASE_RATE
-                new_energy = self.energy - energy_change
-
-            # Check if energy will hit 0% (need to auto-sleep)
-            if not self.sleep and new_energy <= MIN_STAT and self.energy > MIN_STAT:
-                # Calculate time until energy hits 0
-                energy_rate = 1.0 / ENERGY_DECREASE_RATE
-                time_to_zero = self.energy / energy_rate
-
-                # Process time until auto-sleep
-                self.fullness -= (time_to_zero / FULLNESS_DECREASE_RATE)
-                self.energy = MIN_STAT
-                self.energy_zero_since = current_time + datetime.timedelta(seconds=time_to_zero)
-
-                # Auto-sleep
-                self.sleep = True
-                self.auto_sleep = True
-                self.sleep_start = current_time + datetime.timedelta(seconds=time_to_zero)
-
-                # Continue with remaining time
-                remaining_time -= time_to_zero
-                current_time = self.sleep_start
-                continue
-
-            # Check if energy will reach wake threshold while sleeping (need to auto-wake)
-            # Auto-wake at 10% if auto-sleep, or at 100% if manual sleep
-            wake_threshold = 10.0 if self.auto_sleep else MAX_STAT
-            if self.sleep and new_energy >= wake_threshold and self.energy < wake_threshold:
-                # Calculate time until energy reaches wake threshold
-                energy_needed = wake_threshold - self.energy
-                time_to_wake = energy_needed * SLEEP_RESTORATION_RATE
-
-                # Process time until auto-wake
-                self.fullness -= (time_to_wake / FULLNESS_DECREASE_RATE) * SLEEP_FULLNESS_MULTIPLIER
-                self.energy = wake_threshold
-                self.energy_zero_since = None
-
-                # Auto-wake
-                self.sleep = False
-                self.auto_sleep = False
-                self.sleep_start = None
-
-                # Continue with remaining time
-                remaining_time -= time_to_wake
-                current_time += datetime.timedelta(seconds=time_to_wake)
-                continue
-
-            # No state change needed, apply full remaining time
-            self.fullness = new_fullness
-            self.energy = new_energy
-            break
+        iterations = 0
+
+        if elapsed_seconds > 0:
+            self.sleep, self.auto_sleep, self.energy, self.fullness, transition, iterations = advance_stats(
+                self.sleep, self.auto_sleep, self.energy, self.fullness, elapsed_seconds
+            )
+
+            # The last auto-sleep/auto-wake decides the sleep and zero-energy timestamps
+            if transition is not None:
+                if self.sleep:
+                    self._sleep_start = self._last_update + transition
+                    self._energy_zero_since = self._sleep_start
+                else:
+                    self._sleep_start = None
+                    self._energy_zero_since = None
 
         # Calculate when fullness hit zero (if it did during this update)
         if old_fullness > MIN_STAT and self.fullness <= MIN_STAT:
@@ -157,43 +288,54 @@ class Pet:
             fullness_multiplier = SLEEP_FULLNESS_MULTIPLIER if self.sleep else 1.0
             fullness_rate = 1.0 / (FULLNESS_DECREASE_RATE * fullness_multiplier)
             seconds_to_zero = old_fullness / fullness_rate
-            self.fullness_zero_since = self.last_update + datetime.timedelta(seconds=seconds_to_zero)
+            self._fullness_zero_since = self._last_update + seconds_to_zero
         elif self.fullness > MIN_STAT:
-            self.fullness_zero_since = None
+            self._fullness_zero_since = None
 
         # Cap the stat values
         self.fullness = max(MIN_STAT, min(MAX_STAT, self.fullness))
         self.energy = max(MIN_STAT, min(MAX_STAT, self.energy))
 
         # Update the last_update timestamp
-        self.last_update = now
+        self._last_update = now_seconds
 
         # Update age
-        self.age = (datetime.datetime.now().date() - self.birthday).days
+        self.age = (now.date() - self.birthday).days
+
+        if metrics is not None:
+            metrics.observe('pet.update_stats.seconds', time.perf_counter() - started)
+            metrics.observe('pet.update_stats.iterations', iterations)
 
 
-    def go_to_bed(self):
+    def go_to_bed(self, now=None):
         """
         Put your pet to sleep
+        Args:
+            now (datetime.datetime, optional): time the pet goes to bed, defaults to now
         Return:
             bool: success status of sleeping
         """
         # Set sleep properties
         self.sleep = True
         self.auto_sleep = False  # Manual sleep
-        self.sleep_start = datetime.datetime.now()
+        self.sleep_start = now if now is not None else clock.now()
         return True
     
 
-    def wake_up(self):
+    def wake_up(self, now=None):
         """
         Wake your pet up from sleep
+        Args:
+            now (datetime.datetime, optional): time the pet wakes up, defaults to now
         Return:
             bool: success status of waking up
         """
+        if now is None:
+            now = clock.now()
+
         # Update energy stat
-        if self.sleep_start is not None:
-            seconds_slept = (datetime.datetime.now() - self.sleep_start).total_seconds()
+        if self._sleep_start is not None:
+            seconds_slept = datetime_to_epoch(now) - self._sleep_start
             energy_restored = seconds_slept / SLEEP_RESTORATION_RATE
             self.energy += energy_restored
 
@@ -202,12 +344,12 @@ class Pet:
 
             # Reset zero stat timer if energy is now above zero
             if self.energy > MIN_STAT:
-                self.energy_zero_since = None
+                self._energy_zero_since = None
 
         # Clear sleep properties
         self.sleep = False
         self.auto_sleep = False
-        self.sleep_start = None
+        self._sleep_start = None
 
         # Return success status
         return True
@@ -246,6 +388,7 @@ class Pet:
     def to_dict(self):
         """Convert pet to dictionary for saving"""
         return {
+            SCHEMA_FIELD: PET_SCHEMA_VERSION,
             'name': self.name,
             'owner': self.owner,
             'birthday': self.birthday.isoformat(),
@@ -262,11 +405,12 @@ class Pet:
 
 
     def __str__(self):
+        now = clock.now()
         result = f"Name: {self.name}\nAge: {self.age}\nFullness: {int(self.fullness)}%\nEnergy: {'Sleeping' if self.sleep else (str(int(self.energy))+ '%')}"
 
         # Add time at 0% for fullness
         if self.fullness_zero_since is not None:
-            duration = datetime.datetime.now() - self.fullness_zero_since
+            duration = now - self.fullness_zero_since
             hours = int(duration.total_seconds() // 3600)
             minutes = int((duration.total_seconds() % 3600) // 60)
             seconds = int(duration.total_seconds() % 60)
@@ -280,7 +424,7 @@ class Pet:
 
         # Add time at 0% for energy
         if self.energy_zero_since is not None:
-            duration = datetime.datetime.now() - self.energy_zero_since
+            duration = now - self.energy_zero_since
             hours = int(duration.total_seconds() // 3600)
             minutes = int((duration.total_seconds() % 3600) // 60)
             seconds = int(duration.total_seconds() % 60)
@@ -295,22 +439,46 @@ class Pet:
         return result
 
 
+    @classmethod
+    def from_fields(cls, name, owner, birthday, age, sleep, auto_sleep, fullness, energy,
+                    last_update, sleep_start=None, fullness_zero_since=None, energy_zero_since=None):
+        """
+        Create pet directly from trusted field values, skipping validation.
+        Only use this for data the game wrote itself.
+        Timestamps are epoch seconds (see datetime_to_epoch) or None.
+        """
+        pet = cls.__new__(cls)
+        pet.name = name
+        pet.owner = owner
+        pet.birthday = birthday
+        pet.age = age
+        pet.sleep = sleep
+        pet.auto_sleep = auto_sleep
+        pet.fullness = fullness
+        pet.energy = energy
+        pet._last_update = last_update
+        pet._sleep_start = sleep_start
+        pet._fullness_zero_since = fullness_zero_since
+        pet._energy_zero_since = energy_zero_since
+        return pet
+
+
     @classmethod
     def from_dict(cls, data):
-        """Create pet from dictionary with validation"""
-        # Validate required fields exist (support both old 'hunger' and new 'fullness' format)
-        required_fields = ['name', 'birthday', 'age', 'sleep', 'energy']
-        for field in required_fields:
+        """
+        Create pet from dictionary with validation.
+        Records from before PET_SCHEMA_VERSION are upgraded first (see src.schema).
+        """
+        if data.get(SCHEMA_FIELD) != PET_SCHEMA_VERSION:
+            data = upgrade_pet(data)
+
+        # Validate required fields exist
+        for field in REQUIRED_FIELDS:
             if field not in data:
                 raise KeyError(f"Missing required field: {field}")
 
-        # Check for either fullness or hunger (backward compatibility)
-        if 'fullness' not in data and 'hunger' not in data:
-            raise KeyError("Missing required field: 'fullness' (or legacy 'hunger')")
-
         # Validate and create pet (name validation happens in __init__)
-        owner = data.get('owner', None)  # Get owner if it exists, None for backward compatibility
-        pet = cls(data['name'], owner)
+        pet = cls(data['name'], data['owner'])
 
         # Validate and set birthday
         if not isinstance(data['birthday'], str):
@@ -331,74 +499,24 @@ class Pet:
         if not isinstance(data['sleep'], bool):
             raise TypeError("sleep must be a boolean")
         pet.sleep = data['sleep']
-
-        # Validate auto_sleep (optional for backward compatibility)
-        if 'auto_sleep' in data:
-            if not isinstance(data['auto_sleep'], bool):
-                raise TypeError("auto_sleep must be a boolean")
-            pet.auto_sleep = data['auto_sleep']
-        else:
-            pet.auto_sleep = False  # Default to False for old save files
-
-        # Validate sleep_start
-        if 'sleep_start' in data and data['sleep_start'] is not None:
-            if not isinstance(data['sleep_start'], str):
-                raise TypeError("sleep_start must be a string or None")
-            try:
-                pet.sleep_start = datetime.datetime.fromisoformat(data['sleep_start'])
-            except ValueError as e:
-                raise ValueError(f"Invalid sleep_start format: {e}")
-        else:
-            pet.sleep_start = None
-
-        # Validate last_update
-        last_update_str = data.get('last_update', datetime.datetime.now().isoformat())
-        if not isinstance(last_update_str, str):
-            raise TypeError("last_update must be a string")
-        try:
-            pet.last_update = datetime.datetime.fromisoformat(last_update_str)
-        except ValueError as e:
-            raise ValueError(f"Invalid last_update format: {e}")
-
-        # Validate fullness (with backward compatibility for 'hunger')
-        if 'fullness' in data:
-            fullness_value = data['fullness']
-        else:
-            # Convert old 'hunger' format to 'fullness' (hunger was inverted: 0=full, 100=starving)
-            fullness_value = MAX_STAT - data['hunger']
-
-        if not isinstance(fullness_value, (int, float)):
-            raise TypeError("fullness must be a number")
-        if not MIN_STAT <= fullness_value <= MAX_STAT:
-            raise ValueError(f"fullness must be between {MIN_STAT} and {MAX_STAT}")
-        pet.fullness = fullness_value
-
-        # Validate energy
-        if not isinstance(data['energy'], (int, float)):
-            raise TypeError("energy must be a number")
-        if not MIN_STAT <= data['energy'] <= MAX_STAT:
-            raise ValueError(f"energy must be between {MIN_STAT} and {MAX_STAT}")
+        if not isinstance(data['auto_sleep'], bool):
+            raise TypeError("auto_sleep must be a boolean")
+        pet.auto_sleep = data['auto_sleep']
+
+        # Validate timestamps
+        pet.last_update = _parse_timestamp(data, 'last_update', optional=False)
+        pet.sleep_start = _parse_timestamp(data, 'sleep_start')
+        pet.fullness_zero_since = _parse_timestamp(data, 'fullness_zero_since')
+        pet.energy_zero_since = _parse_timestamp(data, 'energy_zero_since')
+
+        # Validate stats
+        for field in ('fullness', 'energy'):
+            value = data[field]
+            if not isinstance(value, (int, float)):
+                raise TypeError(f"{field} must be a number")
+            if not MIN_STAT <= value <= MAX_STAT:
+                raise ValueError(f"{field} must be between {MIN_STAT} and {MAX_STAT}")
+        pet.fullness = data['fullness']
         pet.energy = data['energy']
 
-        # Load zero stat tracking fields (optional for backward compatibility)
-        if 'fullness_zero_since' in data and data['fullness_zero_since'] is not None:
-            if not isinstance(data['fullness_zero_since'], str):
-                raise TypeError("fullness_zero_since must be a string or None")
-            try:
-                pet.fullness_zero_since = datetime.datetime.fromisoformat(data['fullness_zero_since'])
-            except ValueError as e:
-                raise ValueError(f"Invalid fullness_zero_since format: {e}")
-        else:
-            pet.fullness_zero_since = None
-
-        if 'energy_zero_since' in data and data['energy_zero_since'] is not None:
-            if not isinstance(data['energy_zero_since'], str):
-                raise TypeError("energy_zero_since must be a string or None")
-            try:
-                pet.energy_zero_since = datetime.datetime.fromisoformat(data['energy_zero_since'])
-            except ValueError as e:
-                raise ValueError(f"Invalid energy_zero_since format: {e}")
-        else:
-            pet.energy_zero_since = None
-
         return pet
\ No newline at end of file
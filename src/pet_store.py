@@ -0,0 +1,637 @@
+"""
+Memory-mapped store of fixed-width pet records.
+
+Every pet is one RECORD_SIZE-byte record in a single file, so a record is
+found by arithmetic and updated in place: a MappedPet is a Pet whose fields
+read and write the mapped bytes directly, and update_stats(), feed(),
+go_to_bed() and wake_up() run unchanged on it without any serialization.
+
+Layout of '<path>':
+
+    header (HEADER_SIZE bytes): magic, version, record size, capacity,
+        records used (high-water mark), head of the free list, and a count
+        of frees so other processes know to re-index
+    records: in_use, sleep, auto_sleep flags; key, name and owner ids;
+        birthday (ordinal) and age; six float64 stats and timestamps
+        (NaN for None); next free slot
+
+Names, owners and keys are interned in '<path>.strings', an append-only
+table of JSON strings; records hold their ids. Deleted records go on a free
+list and are reused before the file grows.
+
+Record locks are byte-range locks on the record (fcntl, so other processes
+see them) plus a striped thread lock within the process.
+
+view() exposes the records as a NumPy structured array over the same
+memory, so batch jobs can scan and update every pet without copying.
+
+Usage: python -m src.pet_store import|tick|stats [--path data/pets.store]
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from src import clock
+from src.pet import Pet
+from src.config import PETS_PATH, PET_STORE_PATH, PET_STORE_INITIAL_CAPACITY
+
+try:
+    import fcntl
+except ImportError:  # Windows: record locks only hold within the process
+    fcntl = None
+
+MAGIC = b"PETSTORE"
+VERSION = 1
+HEADER = struct.Struct('<8sIIQQqQ')
+HEADER_SIZE = 64
+
+RECORD = struct.Struct('<???xIIIiidddddd q')
+RECORD_SIZE = RECORD.size
+
+# Byte offset of each field within a record, and its struct format
+FIELDS = {
+    'in_use': (0, '?'),
+    'sleep': (1, '?'),
+    'auto_sleep': (2, '?'),
+    'key_id': (4, 'I'),
+    'name_id': (8, 'I'),
+    'owner_id': (12, 'I'),
+    'birthday': (16, 'i'),
+    'age': (20, 'i'),
+    'last_update': (24, 'd'),
+    'sleep_start': (32, 'd'),
+    'fullness': (40, 'd'),
+    'energy': (48, 'd'),
+    'fullness_zero_since': (56, 'd'),
+    'energy_zero_since': (64, 'd'),
+    'next_free': (72, 'q')
+}
+_FIELD_STRUCTS = {name: (offset, struct.Struct('<' + fmt)) for name, (offset, fmt) in FIELDS.items()}
+
+# String id for None (a pet without an owner)
+NO_STRING = 0xFFFFFFFF
+
+# Thread lock stripes for record locks
+LOCK_STRIPES = 64
+
+# Records updated per NumPy batch in update_all()
+BATCH_SIZE = 1_000_000
+
+
+def _optional(seconds):
+    return None if math.isnan(seconds) else seconds
+
+
+def _stored(seconds):
+    return math.nan if seconds is None else seconds
+
+
+def _field(name):
+    """Property reading and writing one record field in place"""
+    offset, packer = _FIELD_STRUCTS[name]
+
+    def get(self):
+        return packer.unpack_from(self._buffer, self._offset + offset)[0]
+
+    def set(self, value):
+        packer.pack_into(self._buffer, self._offset + offset, value)
+
+    return property(get, set)
+
+
+def _timestamp_field(name):
+    """Property for an optional epoch timestamp (NaN on disk for None)"""
+    offset, packer = _FIELD_STRUCTS[name]
+
+    def get(self):
+        return _optional(packer.unpack_from(self._buffer, self._offset + offset)[0])
+
+    def set(self, value):
+        packer.pack_into(self._buffer, self._offset + offset, _stored(value))
+
+    return property(get, set)
+
+
+def _string_field(name):
+    """Property for an interned string (name or owner)"""
+    offset, packer = _FIELD_STRUCTS[name]
+
+    def get(self):
+        return self._store.string(packer.unpack_from(self._buffer, self._offset + offset)[0])
+
+    def set(self, value):
+        packer.pack_into(self._buffer, self._offset + offset, self._store.intern(value))
+
+    return property(get, set)
+
+
+class MappedPet(Pet):
+    """
+    A Pet backed by a record in a PetStore.
+
+    Reading or setting any field goes straight to the mapped file, so every
+    Pet method updates the record in place. Hold the record lock (see
+    PetStore.locked) while changing it if other threads or processes might too.
+    A MappedPet stays valid while the store grows, but not after it closes.
+    """
+
+    __slots__ = ('_store', '_offset', 'slot')
+
+    def __init__(self, store, slot):
+        # Pet.__init__ would overwrite the record with a new pet's defaults
+        self._store = store
+        self._offset = HEADER_SIZE + slot * RECORD_SIZE
+        self.slot = slot
+
+    @property
+    def _buffer(self):
+        # The store's current map: growing the file replaces it
+        return self._store._map
+
+    name = _string_field('name_id')
+    owner = _string_field('owner_id')
+    age = _field('age')
+    sleep = _field('sleep')
+    auto_sleep = _field('auto_sleep')
+    fullness = _field('fullness')
+    energy = _field('energy')
+    _last_update = _field('last_update')
+    _sleep_start = _timestamp_field('sleep_start')
+    _fullness_zero_since = _timestamp_field('fullness_zero_since')
+    _energy_zero_since = _timestamp_field('energy_zero_since')
+
+    @property
+    def birthday(self):
+        offset, packer = _FIELD_STRUCTS['birthday']
+        return datetime.date.fromordinal(packer.unpack_from(self._buffer, self._offset + offset)[0])
+
+    @birthday.setter
+    def birthday(self, value):
+        offset, packer = _FIELD_STRUCTS['birthday']
+        packer.pack_into(self._buffer, self._offset + offset, value.toordinal())
+
+    def copy(self):
+        """
+        Detach the pet from the store.
+
+        Returns:
+            Pet: Plain Pet with the record's current state
+        """
+        return Pet.from_fields(self.name, self.owner, self.birthday, self.age, self.sleep, self.auto_sleep,
+                               self.fullness, self.energy, self._last_update, self._sleep_start,
+                               self._fullness_zero_since, self._energy_zero_since)
+
+
+class PetStore:
+    """
+    Fixed-record pet store in one memory-mapped file.
+
+    Attributes:
+        path (str): Record file path (the string table is path + '.strings')
+    """
+
+    def __init__(self, path=PET_STORE_PATH, initial_capacity=PET_STORE_INITIAL_CAPACITY):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        # 'r+b' that creates the file ('a+b' would append every write)
+        self._file = open(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() == 0:
+            self._file.truncate(HEADER_SIZE + initial_capacity * RECORD_SIZE)
+            self._file.seek(0)
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, initial_capacity, 0, -1, 0))
+            self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, record_size = HEADER.unpack_from(self._map, 0)[:3]
+        if magic != MAGIC or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"{path} is not a pet store (or has an incompatible record layout)")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is pet store version {version}; this game reads version {VERSION}")
+
+        self._strings = []
+        self._string_ids = {}
+        self._strings_path = path + ".strings"
+        self._strings_read = 0
+        self._load_strings()
+        self._slots = {}
+        self._scanned = 0
+        self._frees = 0
+        self._scan_records()
+
+    # Header fields
+
+    def _header(self):
+        return HEADER.unpack_from(self._map, 0)[3:]
+
+    def _set_header(self, capacity, used, free_head, frees):
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, RECORD_SIZE, capacity, used, free_head, frees)
+
+    @contextlib.contextmanager
+    def _store_lock(self):
+        """Exclusive lock on the header, for allocation and the string table"""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.lockf(self._file.fileno(), fcntl.LOCK_EX, HEADER_SIZE, 0)
+            try:
+                # Another process may have grown the file
+                if len(self._map) < os.fstat(self._file.fileno()).st_size:
+                    self._remap()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.lockf(self._file.fileno(), fcntl.LOCK_UN, HEADER_SIZE, 0)
+
+    def _remap(self):
+        # The old map isn't closed: another thread may be reading a record
+        # through it, and it still maps the same bytes until it's collected
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    # Strings
+
+    def _load_strings(self):
+        if not os.path.exists(self._strings_path):
+            return
+        with open(self._strings_path, 'rb') as f:
+            f.seek(self._strings_read)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Being written by another process
+                value = json.loads(line)
+                self._string_ids[value] = len(self._strings)
+                self._strings.append(value)
+                self._strings_read += len(line)
+
+    def string(self, string_id):
+        """Look up an interned string by id (None for NO_STRING)"""
+        if string_id == NO_STRING:
+            return None
+        if string_id >= len(self._strings):
+            with self._lock:
+                self._load_strings()
+        return self._strings[string_id]
+
+    def intern(self, value):
+        """
+        Get the id of a string, adding it to the string table if needed.
+
+        Args:
+            value (str | None): String to intern
+
+        Returns:
+            int: String id (NO_STRING for None)
+        """
+        if value is None:
+            return NO_STRING
+        string_id = self._string_ids.get(value)
+        if string_id is not None:
+            return string_id
+        with self._store_lock():
+            self._load_strings()
+            string_id = self._string_ids.get(value)
+            if string_id is None:
+                line = (json.dumps(value) + "\n").encode('utf-8')
+                with open(self._strings_path, 'ab') as f:
+                    f.write(line)
+                string_id = len(self._strings)
+                self._strings.append(value)
+                self._string_ids[value] = string_id
+                self._strings_read += len(line)
+            return string_id
+
+    # Records
+
+    def _key_at(self, slot):
+        """Key of the pet in a slot, or None if the slot is free"""
+        base = HEADER_SIZE + slot * RECORD_SIZE
+        if not self._map[base]:
+            return None
+        offset, key = _FIELD_STRUCTS['key_id']
+        return self.string(key.unpack_from(self._map, base + offset)[0])
+
+    def _scan_records(self):
+        """
+        Index records written by any process since the last scan.
+
+        New slots past the old high-water mark are read one by one; if a
+        record was freed since (its slot may have been reused for another
+        key), every slot is re-read.
+        """
+        _, used, _, frees = self._header()
+        start = self._scanned
+        if frees != self._frees:
+            self._slots = {}
+            start = 0
+        for slot in range(start, used):
+            key = self._key_at(slot)
+            if key is not None:
+                self._slots[key] = slot
+        self._scanned = used
+        self._frees = frees
+
+    def _slot(self, key):
+        slot = self._slots.get(key)
+        if slot is None or self._key_at(slot) != key:
+            with self._store_lock():
+                self._scan_records()
+            slot = self._slots.get(key)
+        return slot
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, key):
+        return self._slot(key) is not None
+
+    def keys(self):
+        """Keys of every stored pet"""
+        return list(self._slots)
+
+    def _allocate(self):
+        """Take a slot from the free list, or the next unused one (growing the file if full)"""
+        capacity, used, free_head, frees = self._header()
+        if free_head >= 0:
+            offset, next_free = _FIELD_STRUCTS['next_free']
+            following = next_free.unpack_from(self._map, HEADER_SIZE + free_head * RECORD_SIZE + offset)[0]
+            self._set_header(capacity, used, following, frees)
+            return free_head
+        if used == capacity:
+            capacity *= 2
+            self._map.flush()
+            self._file.truncate(HEADER_SIZE + capacity * RECORD_SIZE)
+            self._remap()
+        self._set_header(capacity, used + 1, free_head, frees)
+        return used
+
+    def add(self, key, pet):
+        """
+        Store a pet under a key, replacing any pet already stored there.
+
+        Args:
+            key (str): Pet key, e.g. its save filename
+            pet (Pet): Pet to copy into the store
+
+        Returns:
+            MappedPet: The stored record
+        """
+        key_id, name_id, owner_id = self.intern(key), self.intern(pet.name), self.intern(pet.owner)
+        with self._store_lock():
+            self._scan_records()
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._allocate()
+            RECORD.pack_into(self._map, HEADER_SIZE + slot * RECORD_SIZE,
+                             True, pet.sleep, pet.auto_sleep, key_id, name_id, owner_id,
+                             pet.birthday.toordinal(), pet.age, pet._last_update, _stored(pet._sleep_start),
+                             pet.fullness, pet.energy, _stored(pet._fullness_zero_since),
+                             _stored(pet._energy_zero_since), -1)
+            self._slots[key] = slot
+        return MappedPet(self, slot)
+
+    def get(self, key):
+        """
+        Get a live view of a stored pet.
+
+        Args:
+            key (str): Pet key
+
+        Returns:
+            MappedPet | None: The record, or None if there is no such pet
+        """
+        slot = self._slot(key)
+        return None if slot is None else MappedPet(self, slot)
+
+    def load(self, key):
+        """
+        Copy a stored pet out of the store.
+
+        Returns:
+            Pet | None: Detached copy, or None if there is no such pet
+        """
+        pet = self.get(key)
+        return None if pet is None else pet.copy()
+
+    def remove(self, key):
+        """
+        Delete a pet and put its record on the free list.
+
+        Args:
+            key (str): Pet key
+
+        Returns:
+            bool: True if a pet was removed
+        """
+        with self._store_lock():
+            self._scan_records()
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                return False
+            capacity, used, free_head, frees = self._header()
+            base = HEADER_SIZE + slot * RECORD_SIZE
+            self._map[base:base + RECORD_SIZE] = bytes(RECORD_SIZE)
+            offset, next_free = _FIELD_STRUCTS['next_free']
+            next_free.pack_into(self._map, base + offset, free_head)
+            self._set_header(capacity, used, slot, frees + 1)
+            self._frees = frees + 1
+            return True
+
+    @contextlib.contextmanager
+    def locked(self, key):
+        """
+        Hold a pet's record lock and yield its live view.
+
+        Args:
+            key (str): Pet key
+
+        Yields:
+            MappedPet: The record (KeyError if there is no such pet)
+        """
+        while True:
+            slot = self._slot(key)
+            if slot is None:
+                raise KeyError(key)
+            offset = HEADER_SIZE + slot * RECORD_SIZE
+            with contextlib.ExitStack() as stack:
+                stack.enter_context(self._stripes[slot % LOCK_STRIPES])
+                if fcntl is not None:
+                    fcntl.lockf(self._file.fileno(), fcntl.LOCK_EX, RECORD_SIZE, offset)
+                    stack.callback(fcntl.lockf, self._file.fileno(), fcntl.LOCK_UN, RECORD_SIZE, offset)
+                # The pet may have been removed and its slot reused while we waited
+                if self._key_at(slot) == key:
+                    yield MappedPet(self, slot)
+                    return
+
+    # Batch access
+
+    def view(self):
+        """
+        NumPy structured array over every allocated record, sharing the file's memory.
+
+        Rows with in_use False are free slots. The view doesn't see records
+        added after the store grows, and is invalid once it closes. Requires NumPy.
+
+        Returns:
+            numpy.ndarray: One row per record slot, fields as in FIELDS
+        """
+        import numpy as np
+        used = self._header()[1]
+        return np.frombuffer(self._map, dtype=record_dtype(), count=used, offset=HEADER_SIZE)
+
+    def update_all(self, now=None, batch_size=BATCH_SIZE):
+        """
+        Bring every stored pet up to date with vectorized updates, in place.
+
+        Runs PetPopulation.update_stats over batches of records read from the
+        view and writes the results straight back. Each batch holds the record
+        locks of its slots, so it never interleaves with a locked() update in
+        this process or another, and the store lock, so the file can't be
+        grown or remapped under the view. Don't call it while holding
+        locked(). Requires NumPy.
+
+        Args:
+            now (datetime.datetime, optional): Time to update to, defaults to the clock
+            batch_size (int): Records per batch
+
+        Returns:
+            int: Number of pets updated
+        """
+        now = now or clock.now()
+        updated = 0
+        start = 0
+        while True:
+            with self._records_locked(start, batch_size):
+                rows = self.view()[start:start + batch_size]
+                count = len(rows)
+                if count:
+                    updated += _update_rows(rows, now)
+                # Drop the view so an outgrown map can be freed
+                del rows
+            if not count:
+                return updated
+            start += batch_size
+
+    @contextlib.contextmanager
+    def _records_locked(self, first, count):
+        """Hold the record locks of count slots from first, then the store lock"""
+        offset = HEADER_SIZE + first * RECORD_SIZE
+        with contextlib.ExitStack() as stack:
+            # Same order as locked(): stripes, record locks, then the store lock
+            for stripe in self._stripes:
+                stack.enter_context(stripe)
+            if fcntl is not None:
+                fcntl.lockf(self._file.fileno(), fcntl.LOCK_EX, count * RECORD_SIZE, offset)
+                stack.callback(fcntl.lockf, self._file.fileno(), fcntl.LOCK_UN, count * RECORD_SIZE, offset)
+            stack.enter_context(self._store_lock())
+            yield
+
+    def flush(self):
+        """Write changed records to disk"""
+        self._map.flush()
+
+    def close(self):
+        """Flush and unmap the store"""
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+        self._file.close()
+
+
+# Record fields that map one-to-one onto PetPopulation columns
+COLUMN_FIELDS = ('birthday', 'age', 'sleep', 'auto_sleep', 'last_update', 'sleep_start',
+                 'fullness', 'energy', 'fullness_zero_since', 'energy_zero_since')
+
+
+def _update_rows(rows, now):
+    """Run PetPopulation.update_stats over the in-use rows of a record view, writing back in place"""
+    from src.population import PetPopulation
+    live = rows['in_use']
+    population = PetPopulation(0)
+    population.names = [''] * int(live.sum())
+    for name in COLUMN_FIELDS:
+        setattr(population, name, rows[name][live].astype(getattr(population, name).dtype))
+    population.update_stats(now)
+    for name in COLUMN_FIELDS:
+        # rows[name] is a view into the file, so this writes the records in place
+        rows[name][live] = getattr(population, name)
+    return len(population)
+
+
+def record_dtype():
+    """NumPy dtype matching RECORD, with FIELDS' names and offsets"""
+    import numpy as np
+    return np.dtype({
+        'names': list(FIELDS),
+        'formats': ['<' + fmt.replace('?', 'b1').replace('I', 'u4').replace('i', 'i4')
+                    .replace('d', 'f8').replace('q', 'i8') for _, fmt in FIELDS.values()],
+        'offsets': [offset for offset, _ in FIELDS.values()],
+        'itemsize': RECORD_SIZE
+    })
+
+
+def import_pets(store, report=print):
+    """
+    Copy every saved pet into the store, keyed by save filename.
+
+    Args:
+        store (PetStore): Destination
+        report (callable | None): Called with a summary line
+
+    Returns:
+        int: Pets imported
+    """
+    from src.data_handler import list_pets, load_pet
+    started = time.perf_counter()
+    count = 0
+    for filename in list_pets():
+        pet = load_pet(os.path.join(PETS_PATH, filename), quiet=True)
+        if pet is not None:
+            store.add(filename, pet)
+            count += 1
+    store.flush()
+    if report:
+        report(f"Imported {count:,} pets in {time.perf_counter() - started:.2f}s")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped pet store tools.")
+    parser.add_argument("command", choices=("import", "tick", "stats"),
+                        help="'import' copies saved pets in, 'tick' updates every pet, 'stats' summarizes")
+    parser.add_argument("--path", default=PET_STORE_PATH, help="store file")
+    args = parser.parse_args()
+
+    store = PetStore(args.path)
+    try:
+        if args.command == "import":
+            import_pets(store)
+        elif args.command == "tick":
+            started = time.perf_counter()
+            count = store.update_all()
+            store.flush()
+            print(f"Updated {count:,} pets in {time.perf_counter() - started:.2f}s")
+        else:
+            records = store.view()
+            live = records[records['in_use']]
+            print(f"{len(live):,} pets in {len(records):,} slots ({RECORD_SIZE} bytes each)")
+            if len(live):
+                print(f"Sleeping: {int(live['sleep'].sum()):,}  "
+                      f"average fullness {float(live['fullness'].mean()):.1f}  "
+                      f"average energy {float(live['energy'].mean()):.1f}")
+            del records, live
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
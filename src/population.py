@@ -0,0 +1,225 @@
+"""
+Vectorized stat updates for large groups of pets.
+
+PetPopulation keeps pet state as a struct of NumPy arrays and applies the
+same rules as Pet.update_stats to every pet at once. Requires NumPy.
+"""
+import datetime
+import numpy as np
+from src import clock
+from src.pet import Pet, CYCLE_SECONDS, CYCLE_FULLNESS_LOSS, datetime_to_epoch, epoch_to_datetime
+from src.config import (
+    MIN_STAT,
+    MAX_STAT,
+    SLEEP_RESTORATION_RATE,
+    SLEEP_FULLNESS_MULTIPLIER,
+    AUTO_WAKE_ENERGY,
+    FULLNESS_DECREASE_RATE,
+    ENERGY_DECREASE_RATE
+)
+
+# Optional timestamp columns, as epoch seconds
+TIMESTAMP_COLUMNS = ('last_update', 'sleep_start', 'fullness_zero_since', 'energy_zero_since')
+
+# Manual wake, auto-sleep, auto-wake (with cycle skip), auto-sleep, then the final partial span
+MAX_SEGMENTS = 5
+
+
+class PetPopulation:
+    """
+    A population of pets stored column-wise.
+
+    Attributes:
+        names (list[str]): Pet names
+        owners (list[str | None]): Owner usernames
+        birthday (np.ndarray): Birthdays as proleptic Gregorian ordinals
+        age (np.ndarray): Ages in days
+        fullness (np.ndarray): Fullness levels
+        energy (np.ndarray): Energy levels
+        sleep (np.ndarray): Sleeping flags
+        auto_sleep (np.ndarray): Auto-sleep flags
+        last_update (np.ndarray): Last update times in epoch seconds
+        sleep_start (np.ndarray): Sleep start times in epoch seconds (NaN for None)
+        fullness_zero_since (np.ndarray): Times fullness hit 0 in epoch seconds (NaN for None)
+        energy_zero_since (np.ndarray): Times energy hit 0 in epoch seconds (NaN for None)
+    """
+
+    def __init__(self, size=0):
+        self.names = [''] * size
+        self.owners = [None] * size
+        self.birthday = np.zeros(size, dtype=np.int64)
+        self.age = np.zeros(size, dtype=np.int64)
+        self.fullness = np.zeros(size, dtype=np.float64)
+        self.energy = np.zeros(size, dtype=np.float64)
+        self.sleep = np.zeros(size, dtype=bool)
+        self.auto_sleep = np.zeros(size, dtype=bool)
+        self.last_update = np.zeros(size, dtype=np.float64)
+        self.sleep_start = np.full(size, np.nan)
+        self.fullness_zero_since = np.full(size, np.nan)
+        self.energy_zero_since = np.full(size, np.nan)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_pets(cls, pets):
+        """
+        Build a population from Pet instances.
+
+        Args:
+            pets (list[Pet]): Pets to copy
+
+        Returns:
+            PetPopulation: Population holding the pets' state
+        """
+        population = cls(len(pets))
+        for i, pet in enumerate(pets):
+            population.names[i] = pet.name
+            population.owners[i] = pet.owner
+            population.birthday[i] = pet.birthday.toordinal()
+            population.age[i] = pet.age
+            population.fullness[i] = pet.fullness
+            population.energy[i] = pet.energy
+            population.sleep[i] = pet.sleep
+            population.auto_sleep[i] = pet.auto_sleep
+            # None is stored as NaN in the float columns
+            population.last_update[i] = datetime_to_epoch(pet.last_update)
+            population.sleep_start[i] = datetime_to_epoch(pet.sleep_start)
+            population.fullness_zero_since[i] = datetime_to_epoch(pet.fullness_zero_since)
+            population.energy_zero_since[i] = datetime_to_epoch(pet.energy_zero_since)
+        return population
+
+    @classmethod
+    def from_dicts(cls, records):
+        """
+        Build a population from saved pet dictionaries.
+
+        Args:
+            records (list[dict]): Dictionaries in Pet.to_dict format
+
+        Returns:
+            PetPopulation: Population holding the pets' state
+        """
+        return cls.from_pets([Pet.from_dict(record) for record in records])
+
+    def to_dicts(self):
+        """
+        Convert every pet to a dictionary in Pet.to_dict format.
+
+        Returns:
+            list[dict]: One dictionary per pet
+        """
+        return [self.get_pet(i).to_dict() for i in range(len(self))]
+
+    def to_pets(self):
+        """
+        Convert the population back to Pet instances.
+
+        Returns:
+            list[Pet]: One Pet per row
+        """
+        return [self.get_pet(i) for i in range(len(self))]
+
+    def get_pet(self, index):
+        """
+        Build a Pet from one row of the population.
+
+        Args:
+            index (int): Row to convert
+
+        Returns:
+            Pet: Pet with the row's state
+        """
+        pet = Pet(self.names[index], self.owners[index])
+        pet.birthday = datetime.date.fromordinal(int(self.birthday[index]))
+        pet.age = int(self.age[index])
+        pet.fullness = float(self.fullness[index])
+        pet.energy = float(self.energy[index])
+        pet.sleep = bool(self.sleep[index])
+        pet.auto_sleep = bool(self.auto_sleep[index])
+        for field in TIMESTAMP_COLUMNS:
+            seconds = getattr(self, field)[index]
+            # NaN stands for None in the float columns
+            setattr(pet, field, None if np.isnan(seconds) else epoch_to_datetime(float(seconds)))
+        return pet
+
+    def update_stats(self, now=None):
+        """
+        Update every pet's fullness and energy to the given time.
+
+        Applies the same rules as Pet.update_stats, including auto-sleep at 0%
+        energy and auto-wake at 10% (or 100% after a manual sleep), using whole
+        array operations instead of per-pet branches.
+
+        Args:
+            now (datetime.datetime, optional): Time to update the stats to.
+                Defaults to the current time.
+        """
+        if now is None:
+            now = clock.now()
+        now_seconds = datetime_to_epoch(now)
+
+        sleep = self.sleep.copy()
+        auto_sleep = self.auto_sleep.copy()
+        energy = self.energy.copy()
+        fullness = self.fullness.copy()
+        old_fullness = self.fullness.copy()
+        remaining = now_seconds - self.last_update
+        offset = np.zeros(len(self))
+        transition = np.full(len(self), np.nan)
+
+        for _ in range(MAX_SEGMENTS):
+            active = remaining > 0
+            if not active.any():
+                break
+
+            wake_threshold = np.where(auto_sleep, AUTO_WAKE_ENERGY, MAX_STAT)
+            slept_energy = energy + remaining / SLEEP_RESTORATION_RATE
+            awake_energy = energy - remaining / ENERGY_DECREASE_RATE
+
+            wakes = active & sleep & (slept_energy >= wake_threshold) & (energy < wake_threshold)
+            dozes = active & ~sleep & (awake_energy <= MIN_STAT) & (energy > MIN_STAT)
+            ends = active & ~wakes & ~dozes
+
+            # Length of this segment: up to the next transition, or everything left
+            step = np.where(wakes, (wake_threshold - energy) * SLEEP_RESTORATION_RATE,
+                            np.where(dozes, energy * ENERGY_DECREASE_RATE, remaining))
+            step = np.where(active, step, 0.0)
+            fullness_multiplier = np.where(sleep, SLEEP_FULLNESS_MULTIPLIER, 1.0)
+            fullness -= step / FULLNESS_DECREASE_RATE * fullness_multiplier
+
+            energy = np.where(wakes, wake_threshold,
+                              np.where(dozes, MIN_STAT,
+                                       np.where(ends, np.where(sleep, slept_energy, awake_energy), energy)))
+
+            # After an auto-wake, skip whole steady cycles
+            cycles = np.where(wakes & auto_sleep, np.floor((remaining - step) / CYCLE_SECONDS), 0.0)
+            fullness -= cycles * CYCLE_FULLNESS_LOSS
+            step += cycles * CYCLE_SECONDS
+
+            offset += step
+            remaining = np.where(ends, 0.0, remaining - step)
+            transition = np.where(wakes | dozes, offset, transition)
+            sleep = (sleep & ~wakes) | dozes
+            auto_sleep = (auto_sleep & ~wakes) | dozes
+
+        # The last transition decides the sleep and zero-energy timestamps
+        transitioned = ~np.isnan(transition)
+        transition_time = self.last_update + transition
+        self.sleep_start = np.where(transitioned, np.where(sleep, transition_time, np.nan), self.sleep_start)
+        self.energy_zero_since = np.where(transitioned, np.where(sleep, transition_time, np.nan),
+                                          self.energy_zero_since)
+
+        # Work out when fullness hit zero (if it did during this update)
+        fullness_multiplier = np.where(sleep, SLEEP_FULLNESS_MULTIPLIER, 1.0)
+        hit_zero = (old_fullness > MIN_STAT) & (fullness <= MIN_STAT)
+        zero_time = self.last_update + old_fullness * FULLNESS_DECREASE_RATE * fullness_multiplier
+        self.fullness_zero_since = np.where(hit_zero, zero_time,
+                                            np.where(fullness > MIN_STAT, np.nan, self.fullness_zero_since))
+
+        self.sleep = sleep
+        self.auto_sleep = auto_sleep
+        self.fullness = np.clip(fullness, MIN_STAT, MAX_STAT)
+        self.energy = np.clip(energy, MIN_STAT, MAX_STAT)
+        self.last_update = np.full(len(self), now_seconds)
+        self.age = now.date().toordinal() - self.birthday
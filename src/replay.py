@@ -0,0 +1,217 @@
+"""
+Session recording and headless replay.
+
+A session script is newline-delimited JSON. Each session starts with a
+'session' record holding the user and pet as they were when it began,
+followed by one 'command' record per engine command:
+
+    {"type": "session", "user": {...}, "pet": {...}, "pet_filename": "data/pets/mochi.json"}
+    {"type": "command", "command": {"action": "feed", "food": 1, "time": "..."}, "result": {...}}
+
+SessionRecorder writes scripts from live play (set PET_GAME_RECORD to a path
+when running main.py). replay() runs a script through GameEngine with no
+terminal, journals or saves, and reports any result that differs from the
+recording. generate_script() builds synthetic scripts for load testing.
+
+Usage:
+    python -m src.replay sessions.ndjson
+    python -m src.replay --generate 10000 --commands 20
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+from src.pet import Pet
+from src.user import User
+from src.config import FOODS, TOTAL_GAME_COUNT, DIRECTIONS
+from src.engine import GameEngine
+
+# Mismatches kept in a replay report
+MAX_REPORTED_MISMATCHES = 20
+
+
+class SessionRecorder:
+    """
+    Appends sessions and their commands to a script file.
+
+    Attributes:
+        path (str): Script file path
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def start_session(self, user, pet, pet_filename):
+        """
+        Record the state a session starts from.
+
+        Args:
+            user (User): The session's user
+            pet (Pet): The session's pet
+            pet_filename (str): Path the pet is saved to
+        """
+        self._write({'type': 'session', 'user': user.to_dict(), 'pet': pet.to_dict(), 'pet_filename': pet_filename})
+
+    def record(self, command, result, now):
+        """
+        Record one command and its result.
+
+        The command is stored with the time it ran, and with the answers for
+        'play', so replaying it gives the same result.
+
+        Args:
+            command (dict): Command as executed
+            result (dict): Result returned by the engine
+            now (datetime.datetime): Time the command ran at
+        """
+        command = dict(command, time=now.isoformat())
+        if 'answers' in result:
+            command['answers'] = result['answers']
+        self._write({'type': 'command', 'command': command, 'result': result})
+
+    def close(self):
+        """Close the script file"""
+        self._file.close()
+
+
+def read_script(path):
+    """
+    Stream the records of a session script.
+
+    Args:
+        path (str): Script file path
+
+    Yields:
+        dict: One record per line
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def generate_script(sessions, commands=20, seed=0, start=None):
+    """
+    Generate synthetic sessions of random commands.
+
+    Args:
+        sessions (int): Number of sessions
+        commands (int): Commands per session
+        seed (int): Random seed, so the same arguments give the same script
+        start (datetime.datetime, optional): Time the first session starts
+
+    Yields:
+        dict: Script records
+    """
+    rng = random.Random(seed)
+    start = start or datetime.datetime(2024, 1, 1)
+    actions = ['status', 'feed', 'feed', 'sleep', 'wake', 'play', 'user_info']
+    directions = list(DIRECTIONS)
+    foods = list(FOODS)
+
+    for i in range(sessions):
+        now = start + datetime.timedelta(minutes=rng.randrange(60 * 24 * 30))
+        user = User(f"player{i}", "2000-01-01")
+        pet = Pet(f"Pet {i}", owner=user.username)
+        pet.last_update = now - datetime.timedelta(minutes=rng.randrange(60 * 24))
+        yield {'type': 'session', 'user': user.to_dict(), 'pet': pet.to_dict(),
+               'pet_filename': f"pet_{i}.json"}
+
+        for _ in range(commands):
+            now += datetime.timedelta(seconds=rng.randrange(1, 3600))
+            action = rng.choice(actions)
+            command = {'action': action, 'time': now.isoformat()}
+            if action == 'feed':
+                command['food'] = rng.choice(foods)
+            elif action == 'play':
+                command['guesses'] = [rng.choice(directions) for _ in range(TOTAL_GAME_COUNT)]
+                command['answers'] = [rng.choice(directions) for _ in range(TOTAL_GAME_COUNT)]
+            yield {'type': 'command', 'command': command}
+
+
+def replay(records, check=True):
+    """
+    Run session records through the engine as fast as possible.
+
+    Args:
+        records (iterable[dict]): Script records, e.g. from read_script()
+        check (bool): Compare each result with the recorded one, if present
+
+    Returns:
+        dict: sessions, commands, failed (results with ok false), mismatches
+            (count), first_mismatches (details), seconds and commands_per_second
+    """
+    report = {'sessions': 0, 'commands': 0, 'failed': 0, 'mismatches': 0, 'first_mismatches': []}
+    engine = None
+    started = time.perf_counter()
+
+    for record in records:
+        if record['type'] == 'session':
+            report['sessions'] += 1
+            engine = GameEngine(User.from_dict(record['user']), Pet.from_dict(record['pet']),
+                                record.get('pet_filename'), persist=False)
+            continue
+        if engine is None:
+            raise ValueError("Script has a command before its first session")
+
+        result = engine.execute(record['command'])
+        report['commands'] += 1
+        if not result['ok']:
+            report['failed'] += 1
+        if check and 'result' in record and result != record['result']:
+            report['mismatches'] += 1
+            if len(report['first_mismatches']) < MAX_REPORTED_MISMATCHES:
+                report['first_mismatches'].append({
+                    'session': report['sessions'],
+                    'command': record['command'],
+                    'expected': record['result'],
+                    'actual': result
+                })
+
+    report['seconds'] = time.perf_counter() - started
+    report['commands_per_second'] = report['commands'] / report['seconds'] if report['seconds'] else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded or generated game sessions headless.")
+    parser.add_argument("script", nargs="?", help="session script to replay")
+    parser.add_argument("--generate", type=int, metavar="SESSIONS", help="replay generated sessions instead")
+    parser.add_argument("--commands", type=int, default=20, help="commands per generated session")
+    parser.add_argument("--seed", type=int, default=0, help="seed for generated sessions")
+    parser.add_argument("--output", help="write the generated script here instead of replaying it")
+    parser.add_argument("--no-check", action="store_true", help="don't compare results with the recording")
+    args = parser.parse_args()
+
+    if args.generate is not None:
+        records = generate_script(args.generate, args.commands, args.seed)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+            print(f"Wrote {args.generate} sessions to {args.output}")
+            return
+    elif args.script:
+        records = read_script(args.script)
+    else:
+        parser.error("give a script to replay or --generate")
+
+    report = replay(records, check=not args.no_check)
+    print(f"Replayed {report['sessions']} sessions, {report['commands']} commands "
+          f"in {report['seconds']:.2f}s ({report['commands_per_second']:,.0f} commands/s, "
+          f"{report['sessions'] / report['seconds'] if report['seconds'] else 0:,.0f} sessions/s)")
+    print(f"{report['failed']} commands refused by the game rules, {report['mismatches']} mismatches")
+    for mismatch in report['first_mismatches']:
+        print(json.dumps(mismatch))
+    if report['mismatches']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Predicted-event scheduler and notifier.
+
+Pet stats change linearly between transitions, so the exact time of each
+pet's next event can be worked out from its saved state:
+
+- 'starve':   fullness reaches 0%
+- 'pass_out': energy reaches 0% and the pet falls asleep on its own
+- 'wake':     energy climbs back to 10% (after passing out) or 100% (after going to bed)
+
+EventScheduler keeps these predictions for every pet in one heap, so finding
+what is due costs O(log n) per event instead of re-reading every pet on a
+timer. Rescheduling a pet after a feed/sleep/wake only recomputes that pet;
+its old entries are skipped lazily when they reach the top of the heap.
+
+Notifier is a daemon that pops due events and reports them.
+
+Usage: python -m src.scheduler [--once]
+"""
+import argparse
+import heapq
+import os
+import time
+from src import clock
+from src.pet import datetime_to_epoch, epoch_to_datetime
+from src.config import (
+    PETS_PATH,
+    MIN_STAT,
+    MAX_STAT,
+    AUTO_WAKE_ENERGY,
+    SLEEP_RESTORATION_RATE,
+    SLEEP_FULLNESS_MULTIPLIER,
+    FULLNESS_DECREASE_RATE,
+    ENERGY_DECREASE_RATE
+)
+from src.data_handler import load_pet, list_pets
+from src.storage import get_backend
+
+# Longest walk through sleep/wake segments when predicting starvation; fullness
+# drops by a fixed amount every cycle, so a full pet starves within a few
+SEGMENT_LIMIT = 64
+
+# Stat values this close to a threshold count as having reached it, so rounding
+# after an update doesn't predict the same event again a moment later
+STAT_EPSILON = 1e-6
+
+# Stale heap entries allowed per live pet before the heap is rebuilt
+STALE_ENTRY_RATIO = 4
+
+# Seconds between scans for newly created pets
+RESCAN_INTERVAL = 300
+
+EVENT_MESSAGES = {
+    'starve': "{name} is starving!",
+    'pass_out': "{name} ran out of energy and fell asleep.",
+    'wake': "{name} woke up."
+}
+
+
+def _next_transition(sleep, auto_sleep, energy):
+    """Seconds until the next sleep/wake transition, the event's name, and the energy then"""
+    if sleep:
+        threshold = AUTO_WAKE_ENERGY if auto_sleep else MAX_STAT
+        if energy < threshold - STAT_EPSILON:
+            return (threshold - energy) * SLEEP_RESTORATION_RATE, 'wake', threshold
+    elif energy > MIN_STAT + STAT_EPSILON:
+        return energy * ENERGY_DECREASE_RATE, 'pass_out', MIN_STAT
+    return None, None, energy
+
+
+def predict_events(pet):
+    """
+    Work out when a pet's next events happen.
+
+    Predictions start from the pet's stats as of its last update.
+
+    Args:
+        pet (Pet): Pet to predict
+
+    Returns:
+        dict[str, float]: Epoch seconds of the next 'starve', 'pass_out' and/or 'wake'
+            (kinds that won't happen are left out)
+    """
+    start = pet._last_update
+    sleep, auto_sleep, energy, fullness = pet.sleep, pet.auto_sleep, pet.energy, pet.fullness
+    events = {}
+
+    seconds, kind, _ = _next_transition(sleep, auto_sleep, energy)
+    if kind is not None:
+        events[kind] = start + seconds
+
+    # Walk the segments until fullness runs out
+    if fullness > MIN_STAT + STAT_EPSILON:
+        offset = 0.0
+        for _ in range(SEGMENT_LIMIT):
+            rate = (SLEEP_FULLNESS_MULTIPLIER if sleep else 1.0) / FULLNESS_DECREASE_RATE
+            seconds, kind, next_energy = _next_transition(sleep, auto_sleep, energy)
+            if seconds is None or fullness <= seconds * rate:
+                events['starve'] = start + offset + fullness / rate
+                break
+            fullness -= seconds * rate
+            offset += seconds
+            energy = next_energy
+            sleep = auto_sleep = kind == 'pass_out'
+
+    return events
+
+
+class EventScheduler:
+    """
+    Heap of predicted events across many pets.
+
+    Entries are (time, sequence, key, version, kind). Each key has a version; entries
+    from older versions are dropped when they come off the heap.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._versions = {}
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self._versions)
+
+    def __contains__(self, key):
+        return key in self._versions
+
+    def schedule(self, key, pet):
+        """
+        Replace a pet's predicted events.
+
+        Args:
+            key (hashable): Pet identifier, e.g. its save filename
+            pet (Pet): The pet's current state
+        """
+        version = self._versions.get(key, 0) + 1
+        self._versions[key] = version
+        for kind, when in predict_events(pet).items():
+            self._sequence += 1
+            heapq.heappush(self._heap, (when, self._sequence, key, version, kind))
+        if len(self._heap) > STALE_ENTRY_RATIO * len(self._versions) + 1024:
+            self._compact()
+
+    def remove(self, key):
+        """Stop tracking a pet"""
+        self._versions.pop(key, None)
+
+    def _is_live(self, entry):
+        return self._versions.get(entry[2]) == entry[3]
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._is_live(entry)]
+        heapq.heapify(self._heap)
+
+    def next_time(self):
+        """
+        Time of the earliest pending event.
+
+        Returns:
+            float | None: Epoch seconds, or None if nothing is scheduled
+        """
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now_seconds):
+        """
+        Remove and return every event due by a given time.
+
+        Args:
+            now_seconds (float): Current time in epoch seconds
+
+        Returns:
+            list[tuple[float, hashable, str]]: (time, key, kind) in time order
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now_seconds:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                due.append((entry[0], entry[2], entry[4]))
+        return due
+
+
+def print_notification(pet, kind, when):
+    """Default notifier output: one line per event"""
+    owner = f" ({pet.owner})" if pet.owner else ""
+    print(f"[{when:%Y-%m-%d %H:%M}] {EVENT_MESSAGES[kind].format(name=pet.name)}{owner}")
+
+
+class Notifier:
+    """
+    Daemon that reports pet events as they come due.
+
+    When an event comes due the pet's stored version is checked; if it was
+    saved since the prediction was made (the player fed it, say), the pet is
+    re-read and re-predicted instead of the event being reported.
+
+    Attributes:
+        scheduler (EventScheduler): Predicted events for every tracked pet
+        notify (callable): Called as notify(pet, kind, when) for each event
+        rescan_interval (float): Seconds between scans for new pets
+    """
+
+    def __init__(self, scheduler=None, notify=print_notification, rescan_interval=RESCAN_INTERVAL):
+        self.scheduler = scheduler if scheduler is not None else EventScheduler()
+        self.notify = notify
+        self.rescan_interval = rescan_interval
+        self._last_scan = None
+        self._versions = {}
+
+    def track(self, filename):
+        """Load a pet and schedule its events"""
+        self._versions[filename] = get_backend().pet_version(filename)
+        pet = load_pet(filename, quiet=True)
+        if pet is None:
+            self.scheduler.remove(filename)
+            self._versions.pop(filename, None)
+        else:
+            self.scheduler.schedule(filename, pet)
+
+    def scan(self):
+        """Start tracking any saved pets that aren't tracked yet"""
+        for name in list_pets():
+            filename = os.path.join(PETS_PATH, name)
+            if filename not in self.scheduler:
+                self.track(filename)
+        self._last_scan = time.monotonic()
+
+    def run_once(self, now=None):
+        """
+        Report every event due by now.
+
+        Args:
+            now (datetime.datetime, optional): Current time, defaults to the clock
+
+        Returns:
+            int: Number of events reported
+        """
+        now_seconds = datetime_to_epoch(now or clock.now())
+        reported = 0
+        backend = get_backend()
+        for when, filename, kind in self.scheduler.pop_due(now_seconds):
+            if backend.pet_version(filename) != self._versions.get(filename):
+                # Saved since this prediction; predict again from the new state
+                self.track(filename)
+                continue
+            pet = load_pet(filename, quiet=True)
+            if pet is None:
+                self.scheduler.remove(filename)
+                self._versions.pop(filename, None)
+                continue
+            # Bring the saved state up to the event, then predict what comes next
+            moment = epoch_to_datetime(when)
+            pet.update_stats(moment)
+            self.notify(pet, kind, moment)
+            reported += 1
+            self.scheduler.schedule(filename, pet)
+        return reported
+
+    def run_forever(self, max_sleep=60.0):
+        """
+        Report events as they come due, sleeping in between.
+
+        Args:
+            max_sleep (float): Longest single sleep, so new pets and clock changes are noticed
+        """
+        self.scan()
+        while True:
+            self.run_once()
+            if time.monotonic() - self._last_scan >= self.rescan_interval:
+                self.scan()
+            next_time = self.scheduler.next_time()
+            wait = max_sleep if next_time is None else next_time - datetime_to_epoch(clock.now())
+            time.sleep(min(max(wait, 0.0), max_sleep))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report pet events as they come due.")
+    parser.add_argument("--once", action="store_true", help="report events already due and exit")
+    parser.add_argument("--rescan", type=float, default=RESCAN_INTERVAL,
+                        help="seconds between scans for new pets")
+    args = parser.parse_args()
+
+    notifier = Notifier(rescan_interval=args.rescan)
+    if args.once:
+        notifier.scan()
+        notifier.run_once()
+        return
+    try:
+        notifier.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Schema versions of saved pets and users, and the upgrades between them.
+
+Pet.to_dict() and User.to_dict() stamp SCHEMA_FIELD into every record.
+Records without it are version 1, written before versions were tracked.
+Version 1 records may have:
+
+- pets: legacy 'hunger' (0 = full) instead of 'fullness', and no 'owner',
+  'auto_sleep', 'sleep_start', 'last_update' or zero-since fields
+- users: 'pets' as a list of pet names, 'current_pet' as a pet name, and no
+  login streak or game stats
+
+Pet.from_dict and User.from_dict read current-version records directly and
+pass anything older through upgrade_pet/upgrade_user first, so the legacy
+handling lives only here. `python -m src.storage.upgrade` rewrites stored
+records at the current version.
+
+Compact JSON pets and binary pets are versioned by their codec header and
+always hold every field, so they never need upgrading.
+"""
+from src import clock
+from src.config import MAX_STAT
+
+SCHEMA_FIELD = 'schema_version'
+PET_SCHEMA_VERSION = 2
+USER_SCHEMA_VERSION = 2
+
+
+def record_version(data):
+    """
+    Schema version of a saved pet or user dictionary.
+
+    Args:
+        data (dict): Saved record
+
+    Returns:
+        int: Version (1 if the record isn't stamped)
+    """
+    version = data.get(SCHEMA_FIELD, 1)
+    if not isinstance(version, int) or isinstance(version, bool) or version < 1:
+        raise ValueError(f"Invalid {SCHEMA_FIELD}: {version!r}")
+    return version
+
+
+def _pet_1_to_2(data):
+    if 'fullness' not in data and 'hunger' in data:
+        # hunger was inverted: 0 = full, 100 = starving
+        data['fullness'] = MAX_STAT - data['hunger']
+    data.pop('hunger', None)
+    data.setdefault('owner', None)
+    data.setdefault('auto_sleep', False)
+    data.setdefault('sleep_start', None)
+    data.setdefault('last_update', clock.now().isoformat())
+    data.setdefault('fullness_zero_since', None)
+    data.setdefault('energy_zero_since', None)
+
+
+def _legacy_pet_filename(pet_name):
+    return f"{pet_name.lower().replace(' ', '_')}.json"
+
+
+def _user_1_to_2(data):
+    pets = data.get('pets', [])
+    if isinstance(pets, list) and pets and isinstance(pets[0], str):
+        data['pets'] = [{'name': name, 'filename': _legacy_pet_filename(name)} for name in pets]
+    else:
+        data['pets'] = pets
+    current_pet = data.get('current_pet')
+    if current_pet and not current_pet.endswith('.json'):
+        data['current_pet'] = _legacy_pet_filename(current_pet)
+    else:
+        data['current_pet'] = current_pet
+    today = clock.today().isoformat()
+    data.setdefault('first_login_date', today)
+    data.setdefault('last_login_date', today)
+    data.setdefault('longest_login_streak', 0)
+    data.setdefault('current_login_streak', 1)
+    data.setdefault('games_played', 0)
+    data.setdefault('games_won', 0)
+
+
+# Upgrade steps by the version they upgrade from; each edits the record in place
+PET_UPGRADES = {1: _pet_1_to_2}
+USER_UPGRADES = {1: _user_1_to_2}
+
+
+def _upgrade(data, steps, current, kind):
+    version = record_version(data)
+    if version > current:
+        raise ValueError(f"{kind} record is schema version {version}; this game reads up to version {current}")
+    data = dict(data)
+    while version < current:
+        steps[version](data)
+        version += 1
+    data[SCHEMA_FIELD] = current
+    return data
+
+
+def upgrade_pet(data):
+    """
+    Bring a saved pet dictionary up to PET_SCHEMA_VERSION.
+
+    Args:
+        data (dict): Saved pet at any supported version
+
+    Returns:
+        dict: New dictionary at the current version (not validated; see Pet.from_dict)
+    """
+    return _upgrade(data, PET_UPGRADES, PET_SCHEMA_VERSION, 'Pet')
+
+
+def upgrade_user(data):
+    """
+    Bring a saved user dictionary up to USER_SCHEMA_VERSION.
+
+    Args:
+        data (dict): Saved user at any supported version
+
+    Returns:
+        dict: New dictionary at the current version (not validated; see User.from_dict)
+    """
+    return _upgrade(data, USER_UPGRADES, USER_SCHEMA_VERSION, 'User')
@@ -0,0 +1,203 @@
+"""
+Serialization codecs for saved pets and users.
+
+Every format except the original pretty-printed JSON starts with a 4-byte
+header naming the format and its version, so the loader can pick the right
+codec without guessing:
+
+- 'json':         pretty-printed JSON (original format, no header)
+- 'json-compact': b'PGJ1' + JSON without whitespace; pet timestamps are epoch seconds
+- 'binary':       b'PGB1' + fixed struct layout (pets only)
+"""
+import datetime
+import json
+import math
+import struct
+from src.pet import Pet, epoch_to_datetime
+from src.user import User
+
+COMPACT_JSON_HEADER = b'PGJ1'
+BINARY_HEADER = b'PGB1'
+
+# flags, birthday ordinal, age, fullness, energy, last_update, sleep_start,
+# fullness_zero_since, energy_zero_since, name length, owner length
+PET_LAYOUT = struct.Struct('<BIIddddddHH')
+FLAG_SLEEP = 1
+FLAG_AUTO_SLEEP = 2
+FLAG_HAS_OWNER = 4
+
+
+class JsonCodec:
+    """Pretty-printed JSON, as save files were always written"""
+
+    name = 'json'
+
+    def encode_pet(self, pet):
+        return json.dumps(pet.to_dict(), indent=2).encode('utf-8')
+
+    def decode_pet(self, payload):
+        return Pet.from_dict(json.loads(payload))
+
+    def decode_pet_header(self, payload):
+        data = json.loads(payload)
+        last_update = data.get('last_update')
+        return {
+            'name': data['name'],
+            'sleep': data['sleep'],
+            'last_update': datetime.datetime.fromisoformat(last_update) if last_update else None
+        }
+
+    def encode_user(self, user):
+        return json.dumps(user.to_dict(), indent=2).encode('utf-8')
+
+    def decode_user(self, payload):
+        return User.from_dict(json.loads(payload))
+
+
+class CompactJsonCodec:
+    """JSON without whitespace, with pet timestamps as epoch seconds"""
+
+    name = 'json-compact'
+
+    def encode_pet(self, pet):
+        data = {
+            'name': pet.name,
+            'owner': pet.owner,
+            'birthday': pet.birthday.toordinal(),
+            'age': pet.age,
+            'sleep': pet.sleep,
+            'auto_sleep': pet.auto_sleep,
+            'sleep_start': pet._sleep_start,
+            'last_update': pet._last_update,
+            'fullness': pet.fullness,
+            'energy': pet.energy,
+            'fullness_zero_since': pet._fullness_zero_since,
+            'energy_zero_since': pet._energy_zero_since
+        }
+        return COMPACT_JSON_HEADER + json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    def decode_pet(self, payload):
+        data = json.loads(payload[len(COMPACT_JSON_HEADER):])
+        return Pet.from_fields(
+            data['name'], data['owner'], datetime.date.fromordinal(data['birthday']), data['age'],
+            data['sleep'], data['auto_sleep'], data['fullness'], data['energy'], data['last_update'],
+            data['sleep_start'], data['fullness_zero_since'], data['energy_zero_since']
+        )
+
+    def decode_pet_header(self, payload):
+        data = json.loads(payload[len(COMPACT_JSON_HEADER):])
+        return {
+            'name': data['name'],
+            'sleep': data['sleep'],
+            'last_update': epoch_to_datetime(data['last_update'])
+        }
+
+    def encode_user(self, user):
+        return COMPACT_JSON_HEADER + json.dumps(user.to_dict(), separators=(',', ':')).encode('utf-8')
+
+    def decode_user(self, payload):
+        return User.from_dict(json.loads(payload[len(COMPACT_JSON_HEADER):]))
+
+
+def _pack_time(seconds):
+    return math.nan if seconds is None else seconds
+
+
+def _unpack_time(seconds):
+    return None if seconds != seconds else seconds  # NaN marks None
+
+
+class BinaryCodec:
+    """
+    Fixed-layout binary pets.
+
+    Decoding trusts the data and builds the Pet without re-validating each
+    field. Users are not supported; use CompactJsonCodec for them.
+    """
+
+    name = 'binary'
+
+    def encode_pet(self, pet):
+        name = pet.name.encode('utf-8')
+        owner = pet.owner.encode('utf-8') if pet.owner is not None else b''
+        flags = ((FLAG_SLEEP if pet.sleep else 0)
+                 | (FLAG_AUTO_SLEEP if pet.auto_sleep else 0)
+                 | (FLAG_HAS_OWNER if pet.owner is not None else 0))
+        header = PET_LAYOUT.pack(
+            flags, pet.birthday.toordinal(), pet.age, pet.fullness, pet.energy, pet._last_update,
+            _pack_time(pet._sleep_start), _pack_time(pet._fullness_zero_since),
+            _pack_time(pet._energy_zero_since), len(name), len(owner)
+        )
+        return BINARY_HEADER + header + name + owner
+
+    def decode_pet(self, payload):
+        start = len(BINARY_HEADER)
+        try:
+            (flags, birthday, age, fullness, energy, last_update, sleep_start,
+             fullness_zero_since, energy_zero_since, name_length, owner_length) = PET_LAYOUT.unpack_from(payload, start)
+        except struct.error as e:
+            raise ValueError(f"Truncated binary pet record: {e}")
+        position = start + PET_LAYOUT.size
+        name = payload[position:position + name_length].decode('utf-8')
+        position += name_length
+        owner = payload[position:position + owner_length].decode('utf-8') if flags & FLAG_HAS_OWNER else None
+        return Pet.from_fields(
+            name, owner, datetime.date.fromordinal(birthday), age,
+            bool(flags & FLAG_SLEEP), bool(flags & FLAG_AUTO_SLEEP), fullness, energy, last_update,
+            _unpack_time(sleep_start), _unpack_time(fullness_zero_since), _unpack_time(energy_zero_since)
+        )
+
+    def decode_pet_header(self, payload):
+        start = len(BINARY_HEADER)
+        try:
+            fields = PET_LAYOUT.unpack_from(payload, start)
+        except struct.error as e:
+            raise ValueError(f"Truncated binary pet record: {e}")
+        flags, last_update, name_length = fields[0], fields[5], fields[9]
+        position = start + PET_LAYOUT.size
+        return {
+            'name': payload[position:position + name_length].decode('utf-8'),
+            'sleep': bool(flags & FLAG_SLEEP),
+            'last_update': epoch_to_datetime(last_update)
+        }
+
+    def encode_user(self, user):
+        raise ValueError("The binary codec only supports pets")
+
+    def decode_user(self, payload):
+        raise ValueError("The binary codec only supports pets")
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec(), CompactJsonCodec(), BinaryCodec())}
+
+
+def get_codec(name):
+    """
+    Look up a codec by name.
+
+    Args:
+        name (str): 'json', 'json-compact' or 'binary'
+
+    Returns:
+        Codec instance
+    """
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec: {name}")
+    return CODECS[name]
+
+
+def detect_codec(payload):
+    """
+    Pick the codec for a stored payload from its header.
+
+    Args:
+        payload (bytes): Stored record
+
+    Returns:
+        Codec instance
+    """
+    if payload.startswith(BINARY_HEADER):
+        return CODECS['binary']
+    if payload.startswith(COMPACT_JSON_HEADER):
+        return CODECS['json-compact']
+    return CODECS['json']
@@ -0,0 +1,391 @@
+"""
+Asyncio game server for many players in one process.
+
+Clients connect over TCP or a Unix socket and send one JSON request per
+line; every request gets one JSON response line back. The first request on
+a connection must be a login:
+
+    {"action": "login", "username": "meg", "birthday": "2000-01-01", "pet_name": "Mochi"}
+
+'birthday' is only needed to create a new user and 'pet_name' only when the
+user has no pet yet. After that the client can send:
+
+    {"action": "status"}
+    {"action": "feed", "food": 1}
+    {"action": "sleep"}
+    {"action": "wake"}
+    {"action": "play", "guesses": ["l", "r", "l", "l", "r"]}
+    {"action": "user_info"}
+    {"action": "save"}
+
+Responses are GameEngine results: {"ok": true, ...} or {"ok": false, "error": "..."}.
+
+Connections for the same user share one in-memory user and pet, guarded by
+a per-user lock. Loads and saves run in a thread pool so slow storage never
+blocks the event loop. Loaded users and pets are kept in the data_handler
+write-back cache: 'save' requests only cache a copy taken on the event loop,
+and an account is written out when its last connection closes.
+
+Usage:
+    python -m src.server --port 8765
+    python -m src.server --unix /tmp/pet_game.sock
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import traceback
+from src.pet import Pet
+from src.user import User
+from src.config import PETS_PATH, METRICS_PATH
+from src import instrumentation
+from src.data_handler import save_pet, save_user, load_user, enable_cache, disable_cache, flush_cache
+from src.engine import GameEngine, pet_state, user_info
+from src.user_auth import record_login
+from src.lazy_pet import load_current_pet
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_IO_WORKERS = 8
+
+# Longest request line accepted from a client
+MAX_REQUEST_BYTES = 64 * 1024
+
+# Longest username or pet name (matches the User and Pet limits)
+MAX_NAME_LENGTH = 50
+
+
+class RequestError(Exception):
+    """A request that can't be carried out; the message is sent to the client"""
+
+
+class Account:
+    """
+    One logged-in user and their current pet, shared by all of the user's connections.
+
+    Attributes:
+        username (str): Username
+        user (User | None): Loaded user, or None until the first login finishes
+        pet (Pet | None): The user's current pet
+        pet_filename (str | None): Path the pet is saved to
+        engine (GameEngine | None): Runs the account's commands
+        connections (int): Number of open connections logged in as this user
+        lock (asyncio.Lock): Serializes actions and saves for this user
+    """
+
+    def __init__(self, username):
+        self.username = username
+        self.user = None
+        self.pet = None
+        self.pet_filename = None
+        self.engine = None
+        self.connections = 0
+        self.lock = asyncio.Lock()
+
+    def snapshot(self):
+        """
+        Copy the user and pet for saving.
+
+        Call on the event loop with the lock held: the I/O thread pool then
+        encodes and caches the copies, never the objects requests are changing.
+
+        Returns:
+            tuple[User, Pet, str]: Copies of the user and pet, and the pet's save path
+        """
+        return User.from_dict(self.user.to_dict()), Pet.from_dict(self.pet.to_dict()), self.pet_filename
+
+
+def check_name(value, what):
+    """
+    Validate a username or pet name sent by a client before it becomes part of a file name.
+
+    Args:
+        value: Value from the request
+        what (str): What the value is, for the error message
+
+    Returns:
+        str: The name, stripped
+
+    Raises:
+        RequestError: If the name is missing, too long, or could escape the data directory
+    """
+    if not isinstance(value, str) or not value.strip():
+        raise RequestError(f"A {what} is required")
+    value = value.strip()
+    if len(value) > MAX_NAME_LENGTH:
+        raise RequestError(f"The {what} can't be longer than {MAX_NAME_LENGTH} characters")
+    if '/' in value or '\\' in value or '\0' in value or '..' in value:
+        raise RequestError(f"The {what} can't contain path separators or '..'")
+    return value
+
+
+def open_account(username, birthday=None, pet_name=None):
+    """
+    Load or create a user and their current pet, updating the login streak.
+
+    Runs in the I/O thread pool.
+
+    Args:
+        username (str): Username to log in as
+        birthday (str, optional): Birthday (YYYY-MM-DD) for a new user
+        pet_name (str, optional): Name for a new pet if the user has none
+
+    Returns:
+        tuple[User, Pet, str]: User, current pet and the pet's save path
+
+    Raises:
+        RequestError: If a name is invalid, or the user or pet doesn't exist and can't be created
+    """
+    username = check_name(username, "username")
+    if pet_name is not None:
+        pet_name = check_name(pet_name, "pet name")
+    user = load_user(username)
+    if user:
+        record_login(user)
+    elif birthday:
+        try:
+            user = User(username, birthday)
+        except (ValueError, TypeError) as e:
+            raise RequestError(f"Invalid birthday: {e}")
+    else:
+        raise RequestError(f"Unknown user '{username}'; send a birthday to create it")
+
+    # Only the current pet is read, however many the user owns
+    pet = load_current_pet(user)
+    filename = os.path.join(PETS_PATH, user.current_pet) if pet else None
+
+    if pet is None:
+        if not pet_name:
+            raise RequestError(f"'{username}' has no pet; send a pet_name to create one")
+        pet = Pet(pet_name, owner=user.username)
+        pet_filename = user.current_pet or f"{pet.name.lower().replace(' ', '_')}.json"
+        filename = os.path.join(PETS_PATH, pet_filename)
+        if not user.has_pet(pet_filename):
+            user.add_pet(pet_filename, pet.name)
+        save_pet(pet, filename, quiet=True)
+
+    save_user(user)
+    return user, pet, filename
+
+
+def save_account(user, pet, pet_filename):
+    """Save a snapshot of an account's pet and user (see Account.snapshot); runs in the I/O thread pool"""
+    save_pet(pet, pet_filename, quiet=True)
+    save_user(user)
+
+
+def close_account(user, pet, pet_filename):
+    """Save an account whose last connection closed and write it out of the cache; runs in the I/O thread pool"""
+    save_account(user, pet, pet_filename)
+    flush_cache(pet_filenames=[pet_filename], usernames=[user.username])
+
+
+class GameServer:
+    """
+    Serves game sessions over newline-delimited JSON.
+
+    Turns on the data_handler cache while it runs unless created with cache=False.
+
+    Attributes:
+        accounts (dict[str, Account]): Accounts with at least one open connection
+        stats (dict): 'connections' (currently open) and 'requests' (handled) counters
+    """
+
+    def __init__(self, io_workers=DEFAULT_IO_WORKERS, cache=True):
+        self.accounts = {}
+        self.stats = {'connections': 0, 'requests': 0}
+        self._executor = concurrent.futures.ThreadPoolExecutor(io_workers, thread_name_prefix='pet-game-io')
+        self._cache = cache
+        if cache:
+            enable_cache()
+
+    async def _run_io(self, function, *args):
+        """Run a blocking persistence call in the I/O thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    async def login(self, request):
+        """
+        Attach a connection to an account, loading or creating it if needed.
+
+        Args:
+            request (dict): Login request
+
+        Returns:
+            Account: The logged-in account
+        """
+        username = check_name(request.get('username'), "username")
+
+        account = self.accounts.get(username)
+        if account is None:
+            account = self.accounts[username] = Account(username)
+        account.connections += 1
+        try:
+            async with account.lock:
+                if account.user is None:
+                    account.user, account.pet, account.pet_filename = await self._run_io(
+                        open_account, username, request.get('birthday'), request.get('pet_name'))
+                    # Saves go through the I/O pool, not the engine
+                    account.engine = GameEngine(account.user, account.pet, account.pet_filename, persist=False)
+        except BaseException:
+            self._detach(account)
+            raise
+        return account
+
+    def _detach(self, account):
+        """Drop a connection from an account; returns True if it was the last one"""
+        account.connections -= 1
+        if account.connections == 0 and self.accounts.get(account.username) is account:
+            del self.accounts[account.username]
+            return True
+        return False
+
+    async def logout(self, account):
+        """
+        Detach a connection, saving the account if it was the last one.
+
+        The account stays registered until the save finishes, so a login in the
+        meantime reattaches to it instead of loading the not-yet-saved state.
+        """
+        account.connections -= 1
+        if account.connections > 0:
+            return
+        if account.user is not None:
+            async with account.lock:
+                await self._run_io(close_account, *account.snapshot())
+        if account.connections == 0 and self.accounts.get(account.username) is account:
+            del self.accounts[account.username]
+
+    async def handle(self, account, request):
+        """
+        Carry out one request for a logged-in account.
+
+        Args:
+            account (Account): The connection's account
+            request (dict): Decoded request
+
+        Returns:
+            dict: Engine result
+        """
+        # Clients can't choose the time a command runs at or the game's answers
+        request = {key: value for key, value in request.items() if key not in ('time', 'answers')}
+        async with account.lock:
+            if request.get('action') == 'save':
+                await self._run_io(save_account, *account.snapshot())
+            return account.engine.execute(request)
+
+    async def serve_connection(self, reader, writer):
+        """Handle one client connection until it closes"""
+        self.stats['connections'] += 1
+        account = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break  # line too long or connection reset
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                self.stats['requests'] += 1
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError("Requests must be JSON objects")
+                    if request.get('action') == 'login':
+                        if account is not None:
+                            raise RequestError("Already logged in")
+                        account = await self.login(request)
+                        response = {'ok': True, 'action': 'login',
+                                    'user': user_info(account.user), 'pet': pet_state(account.pet)}
+                    elif account is None:
+                        raise RequestError("Log in first")
+                    else:
+                        response = await self.handle(account, request)
+                except json.JSONDecodeError as e:
+                    response = {'ok': False, 'error': f"Invalid JSON: {e}"}
+                except RequestError as e:
+                    response = {'ok': False, 'error': str(e)}
+                except Exception:
+                    # Never drop the connection without a response
+                    traceback.print_exc()
+                    response = {'ok': False, 'error': "Internal server error"}
+
+                writer.write(json.dumps(response).encode('utf-8') + b"\n")
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    break
+        finally:
+            self.stats['connections'] -= 1
+            if account is not None:
+                await self.logout(account)
+            writer.close()
+
+    async def save_all(self):
+        """Save every open account"""
+        for account in list(self.accounts.values()):
+            async with account.lock:
+                if account.user is not None:
+                    await self._run_io(save_account, *account.snapshot())
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        """
+        Start listening.
+
+        Args:
+            host (str): TCP address to bind
+            port (int): TCP port to bind
+            unix_path (str, optional): Listen on this Unix socket instead of TCP
+
+        Returns:
+            asyncio.AbstractServer: The listening server
+        """
+        if unix_path:
+            return await asyncio.start_unix_server(self.serve_connection, unix_path, limit=MAX_REQUEST_BYTES)
+        return await asyncio.start_server(self.serve_connection, host, port, limit=MAX_REQUEST_BYTES)
+
+    def close(self):
+        """Stop the I/O thread pool once pending loads and saves finish, then write out the cache"""
+        self._executor.shutdown(wait=True)
+        if self._cache:
+            disable_cache()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, io_workers=DEFAULT_IO_WORKERS):
+    """Run the game server until cancelled, saving open accounts on the way out"""
+    game_server = GameServer(io_workers)
+    server = await game_server.start(host, port, unix_path)
+    where = unix_path or f"{host}:{port}"
+    print(f"Pet game server listening on {where}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await game_server.save_all()
+        game_server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pet game as a multi-session server.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="TCP address to bind")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to bind")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--io-workers", type=int, default=DEFAULT_IO_WORKERS,
+                        help="threads used for loading and saving")
+    parser.add_argument("--metrics", default=METRICS_PATH, metavar="PATH",
+                        help="collect metrics and write them to PATH.json/PATH.prom on exit or SIGUSR1")
+    args = parser.parse_args()
+    if args.metrics:
+        instrumentation.start(args.metrics)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.io_workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Fast-forward simulation of a player population on a virtual clock.
+
+Each simulated user follows a behavior profile: how likely they are to log
+in on a given day, how many times they feed and play per visit, and whether
+they put their pet to bed at night. Every day's visits are run in time order
+through the login streak logic and GameEngine with a VirtualClock installed,
+so months of play finish in seconds and nothing touches the disk.
+
+Usage: python -m src.simulation --users 1000 --days 90 --seed 1
+"""
+import argparse
+import datetime
+import random
+import time
+from src.pet import Pet
+from src.user import User
+from src.config import FOODS, TOTAL_GAME_COUNT, DIRECTIONS, MIN_STAT
+from src.clock import VirtualClock, use_clock
+from src.engine import GameEngine
+from src.user_auth import record_login
+
+# login_chance: probability of visiting on a given day
+# feeds / games: actions per visit
+# bedtime: hour the pet is put to bed after an evening visit, or None
+DEFAULT_PROFILES = [
+    {'name': 'daily', 'share': 0.3, 'login_chance': 0.95, 'feeds': 3, 'games': 2, 'bedtime': 22},
+    {'name': 'casual', 'share': 0.4, 'login_chance': 0.5, 'feeds': 2, 'games': 1, 'bedtime': None},
+    {'name': 'lapsed', 'share': 0.2, 'login_chance': 0.1, 'feeds': 1, 'games': 1, 'bedtime': None},
+    {'name': 'neglectful', 'share': 0.1, 'login_chance': 0.05, 'feeds': 0, 'games': 0, 'bedtime': None}
+]
+
+
+class SimulatedPlayer:
+    """
+    One simulated user, their pet and the engine that acts for them.
+
+    Attributes:
+        profile (dict): Behavior profile
+        engine (GameEngine): Engine for the user's pet (nothing is persisted)
+    """
+
+    def __init__(self, index, profile, rng):
+        user = User(f"sim{index}")
+        pet = Pet(f"Pet {index}", owner=user.username)
+        user.add_pet(f"pet_{index}.json", pet.name)
+        self.profile = profile
+        self.engine = GameEngine(user, pet, f"pet_{index}.json", rng=rng, persist=False)
+
+    def visit(self, rng):
+        """Log in and run one visit's worth of commands at the current virtual time"""
+        record_login(self.engine.user)
+        execute = self.engine.execute
+        execute({'action': 'wake'})
+        execute({'action': 'status'})
+        for _ in range(self.profile['feeds']):
+            execute({'action': 'feed', 'food': rng.choice(list(FOODS))})
+        directions = list(DIRECTIONS)
+        for _ in range(self.profile['games']):
+            execute({'action': 'play', 'guesses': [rng.choice(directions) for _ in range(TOTAL_GAME_COUNT)]})
+
+
+def choose_profile(profiles, rng):
+    """Pick a profile at random, weighted by 'share'"""
+    return rng.choices(profiles, weights=[profile['share'] for profile in profiles])[0]
+
+
+def simulate(user_count=1000, days=90, seed=0, start=None, profiles=DEFAULT_PROFILES):
+    """
+    Run a population through a number of days.
+
+    Args:
+        user_count (int): Users to simulate
+        days (int): Days to fast-forward
+        seed (int): Random seed, so the same arguments give the same results
+        start (datetime.datetime, optional): Virtual start time, defaults to 2024-01-01
+        profiles (list[dict]): Behavior profiles to draw users from
+
+    Returns:
+        dict: Per-profile summaries (users, average and longest streaks, win rate,
+            average fullness, pets starving), plus visits, commands and timing
+    """
+    rng = random.Random(seed)
+    clock = VirtualClock(start or datetime.datetime(2024, 1, 1))
+    started = time.perf_counter()
+    visits = 0
+
+    with use_clock(clock):
+        players = [SimulatedPlayer(i, choose_profile(profiles, rng), rng) for i in range(user_count)]
+        day_start = clock.now()
+
+        for _ in range(days):
+            # Collect the day's visits and bedtimes, then play them in time order
+            events = []
+            for player in players:
+                if rng.random() < player.profile['login_chance']:
+                    events.append((rng.uniform(7, 21), 'visit', player))
+                    if player.profile['bedtime'] is not None:
+                        events.append((player.profile['bedtime'] + rng.random(), 'bed', player))
+            events.sort(key=lambda event: event[0])
+
+            for hour, kind, player in events:
+                clock.set(day_start + datetime.timedelta(hours=hour))
+                if kind == 'visit':
+                    player.visit(rng)
+                    visits += 1
+                else:
+                    player.engine.execute({'action': 'sleep'})
+
+            day_start += datetime.timedelta(days=1)
+
+        # Bring every pet up to the end of the simulation
+        clock.set(day_start)
+        for player in players:
+            player.engine.pet.update_stats()
+
+    seconds = time.perf_counter() - started
+    summaries = {}
+    for profile in profiles:
+        group = [player.engine for player in players if player.profile is profile]
+        if not group:
+            continue
+        played = sum(engine.user.games_played for engine in group)
+        summaries[profile['name']] = {
+            'users': len(group),
+            'average_streak': sum(engine.user.current_login_streak for engine in group) / len(group),
+            'longest_streak': max(engine.user.longest_login_streak for engine in group),
+            'win_rate': 100 * sum(engine.user.games_won for engine in group) / played if played else 0.0,
+            'average_fullness': sum(engine.pet.fullness for engine in group) / len(group),
+            'starving': sum(engine.pet.fullness <= MIN_STAT for engine in group)
+        }
+    return {
+        'users': user_count,
+        'days': days,
+        'visits': visits,
+        'profiles': summaries,
+        'seconds': seconds,
+        'simulated_user_days_per_second': user_count * days / seconds if seconds else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast-forward a simulated player population.")
+    parser.add_argument("--users", type=int, default=1000, help="users to simulate")
+    parser.add_argument("--days", type=int, default=90, help="days to fast-forward")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    report = simulate(args.users, args.days, args.seed)
+    print(f"Simulated {report['users']:,} users for {report['days']} days ({report['visits']:,} visits) "
+          f"in {report['seconds']:.2f}s")
+    print(f"{'profile':<12}{'users':>7}{'avg streak':>12}{'best streak':>13}{'win %':>8}{'fullness':>10}{'starving':>10}")
+    for name, summary in report['profiles'].items():
+        print(f"{name:<12}{summary['users']:>7}{summary['average_streak']:>12.1f}{summary['longest_streak']:>13}"
+              f"{summary['win_rate']:>8.1f}{summary['average_fullness']:>10.1f}{summary['starving']:>10}")
+
+
+if __name__ == "__main__":
+    main()
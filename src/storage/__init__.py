@@ -0,0 +1,70 @@
+"""
+Storage backends for saved users and pets.
+
+The active backend is chosen by STORAGE_BACKEND in config and can be
+replaced at runtime with set_backend().
+"""
+import os
+from src.config import STORAGE_BACKEND, SQLITE_DB_PATH, USERS_PATH, PETS_PATH
+from src.storage.base import StorageBackend
+from src.storage.json_files import JsonFileBackend
+from src.storage.sqlite import SqliteBackend
+
+_backend = None
+_backend_pid = None
+
+
+def create_backend(name=STORAGE_BACKEND):
+    """
+    Create a storage backend by name.
+
+    Args:
+        name (str): 'json' or 'sqlite'
+
+    Returns:
+        StorageBackend: New backend instance
+    """
+    if name == 'json':
+        return JsonFileBackend(USERS_PATH, PETS_PATH)
+    if name == 'sqlite':
+        return SqliteBackend(SQLITE_DB_PATH)
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+def get_backend():
+    """
+    Get the active storage backend, creating it on first use.
+
+    A backend created in a parent process is not reused after a fork,
+    since database connections can't be shared between processes.
+
+    Returns:
+        StorageBackend: The active backend
+    """
+    global _backend, _backend_pid
+    if _backend is None or _backend_pid != os.getpid():
+        _backend = create_backend()
+        _backend_pid = os.getpid()
+    return _backend
+
+
+def set_backend(backend):
+    """
+    Replace the active storage backend.
+
+    Args:
+        backend (StorageBackend | None): Backend to use, or None to recreate from config
+    """
+    global _backend, _backend_pid
+    _backend = backend
+    _backend_pid = os.getpid() if backend is not None else None
+
+
+__all__ = [
+    'StorageBackend',
+    'JsonFileBackend',
+    'SqliteBackend',
+    'create_backend',
+    'get_backend',
+    'set_backend'
+]
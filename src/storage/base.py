@@ -0,0 +1,149 @@
+"""
+Storage backend interface for saved users and pets.
+"""
+import contextlib
+
+
+class StorageBackend:
+    """
+    Stores serialized user and pet records.
+
+    Records are opaque byte strings; encoding and validation happen in
+    data_handler. Pets are keyed by their save filename and users by username.
+    """
+
+    def read_pet(self, filename):
+        """
+        Read a pet record.
+
+        Args:
+            filename (str): Pet save filename
+
+        Returns:
+            bytes | None: Stored record or None if it doesn't exist
+        """
+        raise NotImplementedError
+
+    def write_pet(self, filename, payload):
+        """
+        Write a pet record.
+
+        Args:
+            filename (str): Pet save filename
+            payload (bytes): Serialized pet
+        """
+        raise NotImplementedError
+
+    def write_pets(self, items):
+        """
+        Write several pet records.
+
+        Args:
+            items (iterable[tuple[str, bytes]]): (filename, payload) pairs
+        """
+        for filename, payload in items:
+            self.write_pet(filename, payload)
+
+    def pet_version(self, filename):
+        """
+        Get a token that changes whenever a pet record is rewritten.
+
+        Args:
+            filename (str): Pet save filename
+
+        Returns:
+            object: Version token (None if the backend can't tell)
+        """
+        return None
+
+    def list_pets(self):
+        """
+        List stored pets.
+
+        Returns:
+            list[str]: Pet filenames
+        """
+        raise NotImplementedError
+
+    def read_user(self, username):
+        """
+        Read a user record.
+
+        Args:
+            username (str): Username to read
+
+        Returns:
+            bytes | None: Stored record or None if it doesn't exist
+        """
+        raise NotImplementedError
+
+    def write_user(self, username, payload):
+        """
+        Write a user record.
+
+        Args:
+            username (str): Username to write
+            payload (bytes): Serialized user
+        """
+        raise NotImplementedError
+
+    def write_users(self, items):
+        """
+        Write several user records.
+
+        Args:
+            items (iterable[tuple[str, bytes]]): (username, payload) pairs
+        """
+        for username, payload in items:
+            self.write_user(username, payload)
+
+    def user_version(self, username):
+        """
+        Get a token that changes whenever a user record is rewritten.
+
+        Args:
+            username (str): Username
+
+        Returns:
+            object: Version token (None if the backend can't tell)
+        """
+        return None
+
+    def list_users(self):
+        """
+        List stored users.
+
+        Returns:
+            list[str]: Usernames
+        """
+        raise NotImplementedError
+
+    def iter_users(self):
+        """
+        Iterate over stored usernames.
+
+        Backends override this to stream the names without building the full list.
+
+        Returns:
+            iterator[str]: Usernames
+        """
+        return iter(self.list_users())
+
+    def iter_pets(self):
+        """
+        Iterate over stored pet filenames.
+
+        Backends override this to stream the names without building the full list.
+
+        Returns:
+            iterator[str]: Pet filenames
+        """
+        return iter(self.list_pets())
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Group the writes made inside the block; backends may commit them together"""
+        yield self
+
+    def close(self):
+        """Release any resources held by the backend"""
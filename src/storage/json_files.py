@@ -0,0 +1,155 @@
+"""
+JSON file storage: one file per pet and one file per user.
+"""
+import os
+import time
+from src import instrumentation
+from src.config import STORAGE_SHARD_LEVELS
+from src.storage.base import StorageBackend
+from src.storage.sharding import shard_path, walk_records, iter_records, has_flat_records
+
+
+class JsonFileBackend(StorageBackend):
+    """
+    Stores each record as its own file.
+
+    Pet records live at the path they are saved under; user records live at
+    '{users_path}/{username}.json'. With shard_levels set, records directly
+    under users_path or pets_path go into hash-prefix subdirectories instead
+    (see sharding.py). Records not migrated out of the flat layout yet are
+    still found there, and move into their shard the next time they are saved.
+
+    Files are replaced atomically: each write goes to a temporary file that is
+    fsynced and then renamed over the old one, so a crash never leaves a
+    half-written save.
+
+    Attributes:
+        users_path (str): Directory holding user files
+        pets_path (str): Directory holding pet files
+        shard_levels (int): Hash-prefix directory levels (0 for a flat layout)
+    """
+
+    def __init__(self, users_path, pets_path, shard_levels=STORAGE_SHARD_LEVELS):
+        self.users_path = users_path
+        self.pets_path = pets_path
+        self.shard_levels = shard_levels
+        self._pets_dir = os.path.normpath(pets_path)
+        # Whether each directory may still hold flat records, checked once
+        self._flat = {}
+
+    def _may_be_flat(self, directory):
+        flat = self._flat.get(directory)
+        if flat is None:
+            flat = self._flat[directory] = has_flat_records(directory)
+        return flat
+
+    def _read(self, filename):
+        try:
+            with open(filename, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, filename, payload):
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_filename = filename + ".tmp"
+        with open(temp_filename, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            metrics = instrumentation.registry
+            if metrics is None:
+                os.fsync(f.fileno())
+            else:
+                started = time.perf_counter()
+                os.fsync(f.fileno())
+                metrics.observe('storage.fsync.seconds', time.perf_counter() - started)
+        os.replace(temp_filename, filename)
+
+    def _stamp(self, filename):
+        # Saves replace the file, so the inode changes even when the mtime doesn't
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+    def _list(self, directory):
+        if not os.path.exists(directory):
+            return []
+        return [filename for filename in os.listdir(directory) if filename.endswith('.json')]
+
+    def _locate(self, directory, name):
+        """Sharded path of a record, and its flat path if it may still be there (else None)"""
+        if not self.shard_levels:
+            return os.path.join(directory, name), None
+        flat = os.path.join(directory, name) if self._may_be_flat(directory) else None
+        return shard_path(directory, name, self.shard_levels), flat
+
+    def _pet_paths(self, filename):
+        if self.shard_levels and os.path.dirname(os.path.normpath(filename)) == self._pets_dir:
+            return self._locate(self.pets_path, os.path.basename(filename))
+        return filename, None
+
+    def _read_either(self, paths):
+        path, flat = paths
+        payload = self._read(path)
+        if payload is None and flat is not None:
+            payload = self._read(flat)
+        return payload
+
+    def _write_sharded(self, paths, payload):
+        path, flat = paths
+        self._write(path, payload)
+        if flat is not None:
+            try:
+                os.remove(flat)
+            except FileNotFoundError:
+                pass
+
+    def _version_either(self, paths):
+        path, flat = paths
+        version = self._stamp(path)
+        if version is None and flat is not None:
+            version = self._stamp(flat)
+        return version
+
+    def _list_names(self, directory):
+        if not self.shard_levels:
+            return self._list(directory)
+        return walk_records(directory, self.shard_levels)
+
+    def user_path(self, username):
+        """Return the file path for a username"""
+        return self._locate(self.users_path, f"{username}.json")[0]
+
+    def read_pet(self, filename):
+        return self._read_either(self._pet_paths(filename))
+
+    def write_pet(self, filename, payload):
+        self._write_sharded(self._pet_paths(filename), payload)
+
+    def pet_version(self, filename):
+        return self._version_either(self._pet_paths(filename))
+
+    def list_pets(self):
+        return self._list_names(self.pets_path)
+
+    def read_user(self, username):
+        return self._read_either(self._locate(self.users_path, f"{username}.json"))
+
+    def write_user(self, username, payload):
+        self._write_sharded(self._locate(self.users_path, f"{username}.json"), payload)
+
+    def user_version(self, username):
+        return self._version_either(self._locate(self.users_path, f"{username}.json"))
+
+    def list_users(self):
+        return [filename[:-5] for filename in self._list_names(self.users_path)]  # Remove .json extension
+
+    def iter_users(self):
+        return (filename[:-5] for filename in iter_records(self.users_path, self.shard_levels))
+
+    def iter_pets(self):
+        return iter_records(self.pets_path, self.shard_levels)
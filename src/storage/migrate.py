@@ -0,0 +1,65 @@
+"""
+Import an existing data/ tree of JSON files into an SQLite database.
+
+Usage: python -m src.storage.migrate [data_dir] [db_path]
+"""
+import os
+import sys
+from src.config import DATA_PATH, SQLITE_DB_PATH
+from src.storage.json_files import JsonFileBackend
+from src.storage.sqlite import SqliteBackend
+
+BATCH_SIZE = 1000
+
+
+def _batches(keys, read, batch_size):
+    batch = []
+    for key in keys:
+        payload = read(key)
+        if payload is not None:
+            batch.append((key, payload))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def migrate(data_dir=DATA_PATH, db_path=SQLITE_DB_PATH, batch_size=BATCH_SIZE):
+    """
+    Copy every user and pet file under data_dir into the SQLite database.
+
+    Records are copied byte for byte and written in batches, one transaction
+    per batch. Running it again overwrites records with the same key.
+
+    Args:
+        data_dir (str): Directory containing 'users' and 'pets'
+        db_path (str): SQLite database file to import into
+        batch_size (int): Records per transaction
+
+    Returns:
+        tuple[int, int]: Number of users and pets imported
+    """
+    source = JsonFileBackend(os.path.join(data_dir, "users"), os.path.join(data_dir, "pets"))
+    target = SqliteBackend(db_path)
+    try:
+        user_count = 0
+        for batch in _batches(source.list_users(), source.read_user, batch_size):
+            target.write_users(batch)
+            user_count += len(batch)
+
+        pet_count = 0
+        pet_paths = (os.path.join(source.pets_path, filename) for filename in source.list_pets())
+        for batch in _batches(pet_paths, source.read_pet, batch_size):
+            target.write_pets(batch)
+            pet_count += len(batch)
+    finally:
+        target.close()
+    return user_count, pet_count
+
+
+if __name__ == "__main__":
+    data_dir_arg = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    db_path_arg = sys.argv[2] if len(sys.argv) > 2 else SQLITE_DB_PATH
+    users, pets = migrate(data_dir_arg, db_path_arg)
+    print(f"Imported {users} users and {pets} pets into {db_path_arg}")
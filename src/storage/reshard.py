@@ -0,0 +1,40 @@
+"""
+Move the user and pet directories into the sharded layout, or count records.
+
+Sharding is off unless STORAGE_SHARD_LEVELS (PET_GAME_SHARD_LEVELS) is set.
+To turn it on, migrate first, then run the game with the same levels:
+
+    python -m src.storage.reshard migrate --levels 2
+    PET_GAME_SHARD_LEVELS=2 python main.py
+
+Usage:
+    python -m src.storage.reshard migrate [--levels 2] [--workers 16]
+    python -m src.storage.reshard count [--levels 2] [--workers 16]
+"""
+import argparse
+import time
+from src.config import USERS_PATH, PETS_PATH, STORAGE_SHARD_LEVELS
+from src.storage.sharding import WALK_WORKERS, walk_records, migrate_layout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the sharded user and pet directories.")
+    parser.add_argument("command", choices=("migrate", "count"),
+                        help="'migrate' moves flat files into shards; 'count' walks every record")
+    parser.add_argument("--levels", type=int, default=STORAGE_SHARD_LEVELS, help="shard levels")
+    parser.add_argument("--workers", type=int, default=WALK_WORKERS, help="threads")
+    args = parser.parse_args()
+
+    if args.levels <= 0:
+        parser.error("sharding is off (STORAGE_SHARD_LEVELS is 0); pass --levels")
+    for directory in (USERS_PATH, PETS_PATH):
+        if args.command == "migrate":
+            migrate_layout(directory, args.levels, args.workers)
+        else:
+            started = time.perf_counter()
+            count = len(walk_records(directory, args.levels, args.workers))
+            print(f"{directory}: {count:,} records in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
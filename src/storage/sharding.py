@@ -0,0 +1,227 @@
+"""
+Hash-sharded directory layout for user and pet files.
+
+With sharding on, a record named 'fluffy.json' under data/pets is stored at
+data/pets/3f/a2/fluffy.json, where '3f' and 'a2' are the first bytes of a
+hash of the name. Each directory then holds a bounded number of entries, so
+lookups stay fast and backups can work shard by shard.
+
+migrate_layout() moves an existing flat directory into shards. It is safe to
+run while the game is live (a record the game has already rewritten in its
+shard is never overwritten by the old flat copy) and to interrupt: progress
+is the files themselves, so running it again picks up the remaining ones.
+
+Run the migration with python -m src.storage.reshard.
+"""
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.config import STORAGE_SHARD_LEVELS
+
+# Threads used to walk or migrate shard directories
+WALK_WORKERS = 16
+
+# Hex characters per directory level (2 gives 256 subdirectories per level)
+SHARD_WIDTH = 2
+
+
+def shard_dirs(name, levels=STORAGE_SHARD_LEVELS):
+    """
+    Subdirectory names a record is sharded into.
+
+    Args:
+        name (str): Record file name, e.g. 'fluffy.json'
+        levels (int): Directory levels
+
+    Returns:
+        list[str]: One hex prefix per level
+    """
+    digest = hashlib.md5(name.encode('utf-8')).hexdigest()
+    return [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(levels)]
+
+
+def shard_path(directory, name, levels=STORAGE_SHARD_LEVELS):
+    """
+    Path of a record in the sharded layout.
+
+    Args:
+        directory (str): Top-level directory, e.g. PETS_PATH
+        name (str): Record file name
+        levels (int): Directory levels (0 keeps the flat layout)
+
+    Returns:
+        str: Path to the record
+    """
+    return os.path.join(directory, *shard_dirs(name, levels), name)
+
+
+def _is_shard(name):
+    return len(name) == SHARD_WIDTH and all(c in "0123456789abcdef" for c in name)
+
+
+def _scan(directory, depth):
+    """Record names in one directory, descending depth more shard levels"""
+    names = []
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return names
+    for entry in entries:
+        if depth > 0:
+            if _is_shard(entry.name) and entry.is_dir():
+                names.extend(_scan(entry.path, depth - 1))
+        elif entry.name.endswith('.json') and entry.is_file():
+            names.append(entry.name)
+    return names
+
+
+def _iter_scan(directory, depth):
+    """Yield record names in one directory as they are read, descending depth more shard levels"""
+    try:
+        with os.scandir(directory) as entries:
+            if depth == 0:
+                for entry in entries:
+                    if entry.name.endswith('.json') and entry.is_file():
+                        yield entry.name
+                return
+            shards = [entry.path for entry in entries if _is_shard(entry.name) and entry.is_dir()]
+    except FileNotFoundError:
+        return
+    for shard in shards:
+        yield from _iter_scan(shard, depth - 1)
+
+
+def iter_records(directory, levels=STORAGE_SHARD_LEVELS):
+    """
+    Yield every record name in a directory, flat or sharded, one directory at a time.
+
+    Unlike walk_records() this never holds the whole listing: only the names
+    of flat records not migrated yet, to skip their copies in the shards.
+
+    Args:
+        directory (str): Top-level directory
+        levels (int): Shard levels to descend
+
+    Yields:
+        str: Record file names, e.g. 'fluffy.json'
+    """
+    flat = set()
+    for name in _iter_scan(directory, 0):
+        if levels > 0:
+            flat.add(name)
+        yield name
+    if levels > 0:
+        for name in _iter_scan(directory, levels):
+            # Mid-migration a record can briefly be in both places
+            if name not in flat:
+                yield name
+
+
+def walk_records(directory, levels=STORAGE_SHARD_LEVELS, workers=WALK_WORKERS):
+    """
+    List every record name in a directory, flat or sharded.
+
+    Flat files at the top level (not migrated yet) are included too. Top-level
+    shards are scanned by a pool of threads, since listing directories is
+    almost all waiting on the filesystem.
+
+    Args:
+        directory (str): Top-level directory
+        levels (int): Shard levels to descend
+        workers (int): Threads scanning shards
+
+    Returns:
+        list[str]: Record file names, e.g. ['fluffy.json', ...]
+    """
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return []
+    names = [entry.name for entry in entries if entry.name.endswith('.json') and entry.is_file()]
+    if levels <= 0:
+        return names
+    shards = [entry.path for entry in entries if _is_shard(entry.name) and entry.is_dir()]
+    if workers <= 1 or len(shards) <= 1:
+        parts = [_scan(shard, levels - 1) for shard in shards]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(lambda shard: _scan(shard, levels - 1), shards))
+    flat = names
+    names = [name for part in parts for name in part]
+    if flat:
+        # Mid-migration a record can briefly be in both places
+        names = list(dict.fromkeys(names + flat))
+    return names
+
+
+def has_flat_records(directory):
+    """Return True if any record is still stored directly in directory"""
+    try:
+        with os.scandir(directory) as entries:
+            return any(entry.name.endswith('.json') and entry.is_file() for entry in entries)
+    except FileNotFoundError:
+        return False
+
+
+def move_to_shard(directory, name, levels=STORAGE_SHARD_LEVELS):
+    """
+    Move one flat record into its shard.
+
+    The record is hard-linked into place, which fails if the shard already has
+    a copy (the game saved it there since), and only then is the flat file
+    removed. Either way the flat file is gone afterwards.
+
+    Args:
+        directory (str): Top-level directory
+        name (str): Record file name
+        levels (int): Shard levels
+
+    Returns:
+        bool: True if the record was moved, False if the shard copy was newer
+    """
+    source = os.path.join(directory, name)
+    target = shard_path(directory, name, levels)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+        moved = True
+    except FileExistsError:
+        moved = False
+    except FileNotFoundError:
+        # Already moved (or removed by the game) since it was listed
+        return False
+    try:
+        os.remove(source)
+    except FileNotFoundError:
+        pass
+    return moved
+
+
+def migrate_layout(directory, levels=STORAGE_SHARD_LEVELS, workers=WALK_WORKERS, report=print):
+    """
+    Move every flat record in a directory into the sharded layout.
+
+    Args:
+        directory (str): Top-level directory, e.g. PETS_PATH
+        levels (int): Shard levels
+        workers (int): Threads moving files
+        report (callable | None): Called with a summary line when done
+
+    Returns:
+        dict: 'moved', 'superseded' (flat copies dropped because the shard was newer) and 'seconds'
+    """
+    started = time.perf_counter()
+    names = walk_records(directory, levels=0)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        results = list(executor.map(lambda name: move_to_shard(directory, name, levels), names))
+    summary = {
+        'moved': sum(results),
+        'superseded': len(results) - sum(results),
+        'seconds': time.perf_counter() - started
+    }
+    if report:
+        report(f"{directory}: moved {summary['moved']:,} records into shards "
+               f"({summary['superseded']:,} already there) in {summary['seconds']:.2f}s")
+    return summary
+
@@ -0,0 +1,169 @@
+"""
+SQLite storage: all users and pets in a single database file.
+"""
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from src import instrumentation
+from src.storage.base import StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pets (
+    filename TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Fixed statement texts so sqlite3's statement cache reuses the prepared statements
+SELECT_PET = "SELECT data FROM pets WHERE filename = ?"
+UPSERT_PET = "INSERT OR REPLACE INTO pets (filename, data) VALUES (?, ?)"
+LIST_PETS = "SELECT filename FROM pets ORDER BY filename"
+SELECT_USER = "SELECT data FROM users WHERE username = ?"
+UPSERT_USER = "INSERT OR REPLACE INTO users (username, data) VALUES (?, ?)"
+LIST_USERS = "SELECT username FROM users ORDER BY username"
+# Keyset pages for iter_pets/iter_users: each page starts after the last key of the one before
+PAGE_PETS = "SELECT filename FROM pets WHERE filename > ? ORDER BY filename LIMIT ?"
+PAGE_USERS = "SELECT username FROM users WHERE username > ? ORDER BY username LIMIT ?"
+
+# Keys read per page when iterating
+KEY_PAGE_SIZE = 1000
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Stores records in an SQLite database in WAL mode.
+
+    Pets are keyed by the base name of their save file (e.g. 'fluffy.json'),
+    so lookups match the filenames kept in User.pets. Writes made inside
+    batch() are queued and committed together in one transaction. The
+    connection is shared between threads behind a lock.
+
+    Attributes:
+        path (str): Database file path
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, cached_statements=64, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._pending_pets = None
+        self._pending_users = None
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Queue writes made inside the block and commit them in one transaction"""
+        if self._pending_pets is not None:
+            # Already batching; the outer block commits
+            yield self
+            return
+        self._pending_pets = {}
+        self._pending_users = {}
+        try:
+            yield self
+            pets, users = self._pending_pets, self._pending_users
+        finally:
+            self._pending_pets = None
+            self._pending_users = None
+        self._write_rows((UPSERT_PET, pets.items()), (UPSERT_USER, users.items()))
+
+    def read_pet(self, filename):
+        key = os.path.basename(filename)
+        if self._pending_pets and key in self._pending_pets:
+            return self._pending_pets[key]
+        with self._lock:
+            row = self._connection.execute(SELECT_PET, (key,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def write_pet(self, filename, payload):
+        self.write_pets([(filename, payload)])
+
+    def write_pets(self, items):
+        rows = [(os.path.basename(filename), payload) for filename, payload in items]
+        if self._pending_pets is not None:
+            self._pending_pets.update(rows)
+            return
+        self._write_rows((UPSERT_PET, rows))
+
+    def _write_rows(self, *writes):
+        """
+        Run each upsert over its rows, all in one transaction.
+
+        Args:
+            *writes (tuple[str, iterable]): (statement, rows) pairs
+        """
+        metrics = instrumentation.registry
+        if metrics is not None:
+            started = time.perf_counter()
+        with self._lock, self._connection:
+            for statement, rows in writes:
+                self._connection.executemany(statement, rows)
+        if metrics is not None:
+            metrics.observe('storage.commit.seconds', time.perf_counter() - started)
+
+    def _data_version(self):
+        # Changes only when another connection commits
+        with self._lock:
+            return self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def pet_version(self, filename):
+        return self._data_version()
+
+    def list_pets(self):
+        with self._lock:
+            return [row[0] for row in self._connection.execute(LIST_PETS)]
+
+    def read_user(self, username):
+        if self._pending_users and username in self._pending_users:
+            return self._pending_users[username]
+        with self._lock:
+            row = self._connection.execute(SELECT_USER, (username,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def write_user(self, username, payload):
+        self.write_users([(username, payload)])
+
+    def write_users(self, items):
+        rows = list(items)
+        if self._pending_users is not None:
+            self._pending_users.update(rows)
+            return
+        self._write_rows((UPSERT_USER, rows))
+
+    def user_version(self, username):
+        return self._data_version()
+
+    def list_users(self):
+        with self._lock:
+            return [row[0] for row in self._connection.execute(LIST_USERS)]
+
+    def _iter_keys(self, statement):
+        """Yield keys a page at a time, so neither the lock nor a cursor is held between pages"""
+        last = ''
+        while True:
+            with self._lock:
+                keys = [row[0] for row in self._connection.execute(statement, (last, KEY_PAGE_SIZE))]
+            yield from keys
+            if len(keys) < KEY_PAGE_SIZE:
+                return
+            last = keys[-1]
+
+    def iter_pets(self):
+        return self._iter_keys(PAGE_PETS)
+
+    def iter_users(self):
+        return self._iter_keys(PAGE_USERS)
+
+    def close(self):
+        self._connection.close()
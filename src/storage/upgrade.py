@@ -0,0 +1,214 @@
+"""
+Rewrite every stored user and pet at the current schema version.
+
+Records are read, upgraded (see src.schema), validated by loading them, and
+written back in the codec they were stored with. Chunks of records are
+handled by a pool of worker processes. Run it while the game is stopped.
+
+With --dry-run nothing is written; the report counts what would change and
+shows a field-by-field diff of the first few records.
+
+Usage: python -m src.storage.upgrade [--dry-run] [--data-dir data] [--workers 8]
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.config import PETS_PATH
+from src.pet import Pet
+from src.schema import PET_SCHEMA_VERSION, USER_SCHEMA_VERSION, record_version
+from src.serialization import COMPACT_JSON_HEADER, detect_codec
+from src.storage import get_backend
+from src.storage.json_files import JsonFileBackend
+from src.user import User
+
+# Records per worker task
+CHUNK_SIZE = 1000
+
+# Diffs shown by a dry run
+DEFAULT_SHOW = 5
+
+
+def diff_records(old, new):
+    """
+    Describe how an upgrade changes a record.
+
+    Args:
+        old (dict): Record as stored
+        new (dict): Upgraded record
+
+    Returns:
+        list[str]: '- field: value' for removed fields, '+ field: value' for added
+            ones and '~ field: old -> new' for changed ones
+    """
+    lines = []
+    for field in old:
+        if field not in new:
+            lines.append(f"- {field}: {json.dumps(old[field])}")
+        elif old[field] != new[field]:
+            lines.append(f"~ {field}: {json.dumps(old[field])} -> {json.dumps(new[field])}")
+    for field in new:
+        if field not in old:
+            lines.append(f"+ {field}: {json.dumps(new[field])}")
+    return lines
+
+
+def upgrade_payload(kind, payload):
+    """
+    Upgrade one stored record.
+
+    Args:
+        kind (str): 'user' or 'pet'
+        payload (bytes): Stored record
+
+    Returns:
+        tuple[int, dict, dict, bytes] | None: Stored version, stored and upgraded
+            records, and the new payload; None if the record is already current
+    """
+    codec = detect_codec(payload)
+    if codec.name == 'binary' or (codec.name == 'json-compact' and kind == 'pet'):
+        return None  # Versioned by the codec header
+    prefix = COMPACT_JSON_HEADER if codec.name == 'json-compact' else b''
+    data = json.loads(payload[len(prefix):])
+    version = record_version(data)
+    if version == (USER_SCHEMA_VERSION if kind == 'user' else PET_SCHEMA_VERSION):
+        return None
+    # Loading upgrades and validates; saving what was loaded writes what the game would
+    upgraded = (User if kind == 'user' else Pet).from_dict(data).to_dict()
+    if codec.name == 'json':
+        text = json.dumps(upgraded, indent=2)
+    else:
+        text = json.dumps(upgraded, separators=(',', ':'))
+    return version, data, upgraded, prefix + text.encode('utf-8')
+
+
+def _backend(data_dir):
+    if data_dir is None:
+        return get_backend()
+    return JsonFileBackend(os.path.join(data_dir, "users"), os.path.join(data_dir, "pets"))
+
+
+def upgrade_chunk(kind, keys, data_dir=None, dry_run=False, show=DEFAULT_SHOW):
+    """
+    Upgrade a chunk of stored records.
+
+    Args:
+        kind (str): 'user' or 'pet'
+        keys (list[str]): Usernames, or pet file names
+        data_dir (str, optional): Data directory (defaults to the configured backend)
+        dry_run (bool): Only report what would change
+        show (int): Diffs to return
+
+    Returns:
+        dict: 'checked', 'upgraded' (count by stored version), 'invalid' (key, error)
+            pairs and 'diffs' (key, stored version, diff lines)
+    """
+    backend = _backend(data_dir)
+    pets_path = backend.pets_path if data_dir else PETS_PATH
+    result = {'checked': 0, 'upgraded': {}, 'invalid': [], 'diffs': []}
+    for key in keys:
+        if kind == 'user':
+            payload = backend.read_user(key)
+        else:
+            key = os.path.join(pets_path, key)
+            payload = backend.read_pet(key)
+        if payload is None:
+            continue
+        result['checked'] += 1
+        try:
+            upgrade = upgrade_payload(kind, payload)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            result['invalid'].append((key, str(e)))
+            continue
+        if upgrade is None:
+            continue
+        version, old, new, new_payload = upgrade
+        result['upgraded'][version] = result['upgraded'].get(version, 0) + 1
+        if len(result['diffs']) < show:
+            result['diffs'].append((key, version, diff_records(old, new)))
+        if not dry_run:
+            if kind == 'user':
+                backend.write_user(key, new_payload)
+            else:
+                backend.write_pet(key, new_payload)
+    return result
+
+
+def _run_chunk(args):
+    return upgrade_chunk(*args)
+
+
+def upgrade_all(data_dir=None, dry_run=False, workers=None, chunk_size=CHUNK_SIZE, show=DEFAULT_SHOW):
+    """
+    Upgrade every stored user and pet to the current schema version.
+
+    Args:
+        data_dir (str, optional): Data directory of JSON files (defaults to the configured backend)
+        dry_run (bool): Only report what would change
+        workers (int, optional): Worker processes (defaults to the CPU count; 1 runs in this process)
+        chunk_size (int): Records per task
+        show (int): Diffs to collect
+
+    Returns:
+        dict: Per kind ('user', 'pet'): 'checked', 'upgraded' (count by stored version)
+            and 'invalid' (key, error) pairs; plus 'diffs' and 'seconds'
+    """
+    started = time.perf_counter()
+    backend = _backend(data_dir)
+    keys = {'user': backend.list_users(), 'pet': backend.list_pets()}
+    jobs = [(kind, names[i:i + chunk_size], data_dir, dry_run, show)
+            for kind, names in keys.items() for i in range(0, len(names), chunk_size)]
+
+    if workers == 1 or len(jobs) <= 1:
+        parts = [_run_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_run_chunk, jobs))
+
+    summary = {kind: {'checked': 0, 'upgraded': {}, 'invalid': []} for kind in keys}
+    summary['diffs'] = []
+    for (kind, *_), part in zip(jobs, parts):
+        totals = summary[kind]
+        totals['checked'] += part['checked']
+        totals['invalid'].extend(part['invalid'])
+        for version, count in part['upgraded'].items():
+            totals['upgraded'][version] = totals['upgraded'].get(version, 0) + count
+        summary['diffs'].extend((kind,) + diff for diff in part['diffs'])
+    del summary['diffs'][show:]
+    summary['seconds'] = time.perf_counter() - started
+    return summary
+
+
+def print_report(summary, dry_run):
+    """Print per-kind counts, invalid records and the collected diffs"""
+    for kind, current in (('user', USER_SCHEMA_VERSION), ('pet', PET_SCHEMA_VERSION)):
+        totals = summary[kind]
+        upgraded = sum(totals['upgraded'].values())
+        verb = "need upgrading" if dry_run else "upgraded"
+        print(f"{kind}s: {upgraded:,} of {totals['checked']:,} {verb} to version {current}")
+        for version, count in sorted(totals['upgraded'].items()):
+            print(f"  from version {version}: {count:,}")
+        for key, error in totals['invalid']:
+            print(f"  invalid {key}: {error}")
+    for kind, key, version, lines in summary['diffs']:
+        print(f"\n{key} ({kind}, version {version})")
+        for line in lines:
+            print(f"  {line}")
+    print(f"\n{'Checked' if dry_run else 'Done'} in {summary['seconds']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade stored users and pets to the current schema version.")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--data-dir", help="data directory of JSON files (default: the configured backend)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--show", type=int, default=DEFAULT_SHOW, help="record diffs to show")
+    args = parser.parse_args()
+
+    summary = upgrade_all(args.data_dir, args.dry_run, args.workers, show=args.show)
+    print_report(summary, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
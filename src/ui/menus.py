@@ -36,9 +36,17 @@ def display_welcome():
     print("=" * 50)
 
 
-def display_pet_status(pet):
-    """Display pet status in formatted view"""
-    pet.update_stats()
+def display_pet_status(pet, update=True):
+    """
+    Display pet status in formatted view.
+
+    Args:
+        pet (Pet): Pet to display
+        update (bool): Bring the stats up to date first; pass False if the
+            caller just did
+    """
+    if update:
+        pet.update_stats()
     print("\n" + "=" * 50)
     print("PET STATUS")
     print("=" * 50)
@@ -1,4 +1,12 @@
 import datetime
+from src import clock
+from src.schema import SCHEMA_FIELD, USER_SCHEMA_VERSION, upgrade_user
+
+# Fields every current-version user record has
+REQUIRED_FIELDS = (
+    'username', 'birthday', 'first_login_date', 'last_login_date', 'longest_login_streak',
+    'current_login_streak', 'pets', 'current_pet', 'games_played', 'games_won'
+)
 
 
 class User:
@@ -8,12 +16,17 @@ class User:
     Attributes:
         username (str): The user's username
         birthday (datetime.date): The user's birthday
-        pets (list): List of pet dictionaries with 'name' and 'filename' keys
+        pets (tuple): Read-only tuple of pet dictionaries with 'name' and 'filename' keys, in the order they were added
         current_pet (str | None): Currently active pet's filename (e.g., 'fluffy_cat.json')
         games_played (int): Total number of games played
         games_won (int): Total number of games won
     """
 
+    __slots__ = (
+        'username', 'birthday', 'first_login_date', 'last_login_date', 'longest_login_streak',
+        'current_login_streak', '_pets', 'current_pet', 'games_played', 'games_won'
+    )
+
     def __init__(self, username, birthday=None):
         if not isinstance(username, str):
             raise TypeError("Username must be a string")
@@ -24,8 +37,9 @@ class User:
         self.username = username.strip()
 
         # Set birthday - default to today if not provided
+        today = clock.today()
         if birthday is None:
-            self.birthday = datetime.datetime.now().date()
+            self.birthday = today
         elif isinstance(birthday, datetime.date):
             self.birthday = birthday
         elif isinstance(birthday, str):
@@ -34,16 +48,16 @@ class User:
             raise TypeError("Birthday must be a datetime.date, string, or None")
         
         # Set first log-in anniversary date
-        self.first_login_date = datetime.datetime.now().date()
-        self.last_login_date = datetime.datetime.now().date()
+        self.first_login_date = today
+        self.last_login_date = today
 
         # Set stats
         self.longest_login_streak = 0
         self.current_login_streak = 1
 
         # Pet ownership tracking
-        # Each pet entry is a dict: {'name': str, 'filename': str}
-        self.pets = []  # List of pet dictionaries
+        # Each pet entry is a dict: {'name': str, 'filename': str}, indexed by filename
+        self._pets = {}  # Insertion-ordered filename -> pet dictionary
         self.current_pet = None  # Currently active pet filename
 
         # Game stats
@@ -69,6 +83,27 @@ class User:
             return 0
         return self.games_won / self.games_played
 
+    @property
+    def pets(self):
+        """Read-only tuple of pet dictionaries; change the collection with add_pet, rename_pet and remove_pet"""
+        return tuple(self._pets.values())
+
+    @pets.setter
+    def pets(self, pets):
+        self._pets = {}
+        for pet in pets:
+            self._pets.setdefault(pet['filename'], pet)
+
+    def has_pet(self, pet_filename):
+        """
+        Check whether this user owns a pet.
+        Args:
+            pet_filename (str): Filename of the pet
+        Returns:
+            bool: True if the pet is in this user's collection
+        """
+        return pet_filename in self._pets
+
     def add_pet(self, pet_filename, pet_name=None):
         """
         Add a pet to this user's collection.
@@ -89,8 +124,8 @@ class User:
             pet_name = pet_filename.replace('.json', '').replace('_', ' ')
 
         # Check if pet already exists (by filename)
-        if not any(pet['filename'] == pet_filename for pet in self.pets):
-            self.pets.append({'name': pet_name, 'filename': pet_filename})
+        if pet_filename not in self._pets:
+            self._pets[pet_filename] = {'name': pet_name, 'filename': pet_filename}
             # Set as current pet if it's the first one
             if self.current_pet is None:
                 self.current_pet = pet_filename
@@ -101,12 +136,23 @@ class User:
         Args:
             pet_filename (str): Filename of the pet to remove
         """
-        # Find and remove pet by filename
-        self.pets = [pet for pet in self.pets if pet['filename'] != pet_filename]
+        self._pets.pop(pet_filename, None)
 
         # Clear current pet if it was the one removed
         if self.current_pet == pet_filename:
-            self.current_pet = self.pets[0]['filename'] if self.pets else None
+            self.current_pet = next(iter(self._pets), None)
+
+    def rename_pet(self, pet_filename, pet_name):
+        """
+        Change the display name of a pet.
+        Args:
+            pet_filename (str): Filename of the pet to rename
+            pet_name (str): New display name
+        """
+        if pet_filename not in self._pets:
+            raise ValueError(f"Pet with filename '{pet_filename}' is not owned by this user")
+        # A new entry, so tuples already handed out by pets don't change underneath their holders
+        self._pets[pet_filename] = {'name': pet_name, 'filename': pet_filename}
 
     def set_current_pet(self, pet_filename):
         """
@@ -114,7 +160,7 @@ class User:
         Args:
             pet_filename (str): Filename of the pet to set as current
         """
-        if not any(pet['filename'] == pet_filename for pet in self.pets):
+        if pet_filename not in self._pets:
             raise ValueError(f"Pet with filename '{pet_filename}' is not owned by this user")
         self.current_pet = pet_filename
 
@@ -126,10 +172,7 @@ class User:
         """
         if self.current_pet is None:
             return None
-        for pet in self.pets:
-            if pet['filename'] == self.current_pet:
-                return pet['name']
-        return None
+        return self.get_pet_name(self.current_pet)
 
     def get_pet_name(self, pet_filename):
         """
@@ -139,10 +182,8 @@ class User:
         Returns:
             str | None: The pet's display name, or None if not found
         """
-        for pet in self.pets:
-            if pet['filename'] == pet_filename:
-                return pet['name']
-        return None
+        pet = self._pets.get(pet_filename)
+        return pet['name'] if pet else None
 
     def is_birthday_today(self):
         """
@@ -150,7 +191,7 @@ class User:
         Returns:
             bool: True if today is the user's birthday, False otherwise
         """
-        today = datetime.datetime.now().date()
+        today = clock.today()
         return (today.month == self.birthday.month and
                 today.day == self.birthday.day)
 
@@ -162,7 +203,7 @@ class User:
         Returns:
             tuple: (streak_continued, days_since_last_login)
         """
-        today = datetime.datetime.now().date()
+        today = clock.today()
         days_since_last = (today - last_login_date).days
 
         if days_since_last == 0:
@@ -182,13 +223,14 @@ class User:
     def to_dict(self):
         """Convert user to dictionary for saving"""
         return {
+            SCHEMA_FIELD: USER_SCHEMA_VERSION,
             'username': self.username,
             'birthday': self.birthday.isoformat(),
             'first_login_date': self.first_login_date.isoformat(),
             'last_login_date': self.last_login_date.isoformat(),
             'longest_login_streak': self.longest_login_streak,
             'current_login_streak': self.current_login_streak,
-            'pets': self.pets,
+            'pets': list(self._pets.values()),
             'current_pet': self.current_pet,
             'games_played': self.games_played,
             'games_won': self.games_won
@@ -196,77 +238,42 @@ class User:
 
     @classmethod
     def from_dict(cls, data):
-        """Create user from dictionary with validation"""
+        """
+        Create user from dictionary with validation.
+        Records from before USER_SCHEMA_VERSION are upgraded first (see src.schema).
+        """
+        if data.get(SCHEMA_FIELD) != USER_SCHEMA_VERSION:
+            data = upgrade_user(data)
+
         # Validate required fields
-        required_fields = ['username', 'birthday']
-        for field in required_fields:
+        for field in REQUIRED_FIELDS:
             if field not in data:
                 raise KeyError(f"Missing required field: {field}")
 
         # Create user
         user = cls(data['username'], data['birthday'])
 
-        # Load pets list (with backward compatibility)
-        if 'pets' in data:
-            if not isinstance(data['pets'], list):
-                raise TypeError("pets must be a list")
-
-            # Handle old format (list of strings) vs new format (list of dicts)
-            if data['pets'] and isinstance(data['pets'][0], str):
-                # Old format: convert pet names to dict format
-                user.pets = [
-                    {
-                        'name': pet_name,
-                        'filename': f"{pet_name.lower().replace(' ', '_')}.json"
-                    }
-                    for pet_name in data['pets']
-                ]
-            else:
-                # New format: already list of dicts
-                user.pets = data['pets']
-
-        # Load current pet (with backward compatibility)
-        if 'current_pet' in data:
-            current_pet_value = data['current_pet']
-            # Check if it's in old format (pet name) or new format (filename)
-            if current_pet_value and not current_pet_value.endswith('.json'):
-                # Old format: convert pet name to filename
-                user.current_pet = f"{current_pet_value.lower().replace(' ', '_')}.json"
-            else:
-                # New format: already a filename
-                user.current_pet = current_pet_value
-
-        # Load login streak data (with backward compatibility)
-        if 'first_login_date' in data:
-            if isinstance(data['first_login_date'], str):
-                user.first_login_date = datetime.date.fromisoformat(data['first_login_date'])
-            else:
-                user.first_login_date = data['first_login_date']
-
-        if 'last_login_date' in data:
-            if isinstance(data['last_login_date'], str):
-                user.last_login_date = datetime.date.fromisoformat(data['last_login_date'])
-            else:
-                user.last_login_date = data['last_login_date']
-
-        if 'longest_login_streak' in data:
-            user.longest_login_streak = data['longest_login_streak']
-
-        if 'current_login_streak' in data:
-            user.current_login_streak = data['current_login_streak']
-
-        # Load game stats (with backward compatibility)
-        if 'games_played' in data:
-            user.games_played = data['games_played']
-
-        if 'games_won' in data:
-            user.games_won = data['games_won']
+        if not isinstance(data['pets'], list):
+            raise TypeError("pets must be a list")
+        user.pets = data['pets']
+        user.current_pet = data['current_pet']
+
+        # Login streak data
+        user.first_login_date = datetime.date.fromisoformat(data['first_login_date'])
+        user.last_login_date = datetime.date.fromisoformat(data['last_login_date'])
+        user.longest_login_streak = data['longest_login_streak']
+        user.current_login_streak = data['current_login_streak']
+
+        # Game stats
+        user.games_played = data['games_played']
+        user.games_won = data['games_won']
 
         return user
 
     def __str__(self):
-        age = (datetime.datetime.now().date() - self.birthday).days // 365
-        pet_count = len(self.pets)
-        days_since_first = (datetime.datetime.now().date() - self.first_login_date).days
+        today = clock.today()
+        age = (today - self.birthday).days // 365
+        pet_count = len(self._pets)
+        days_since_first = (today - self.first_login_date).days
         current_pet_display = self.get_current_pet_name() or 'None'
         return f"Username: {self.username}\nAge: {age}\nPets owned: {pet_count}\nCurrent pet: {current_pet_display}\nCurrent streak: {self.current_login_streak} days\nLongest streak: {self.longest_login_streak} days\nDays since first login: {days_since_first}"
\ No newline at end of file
@@ -2,7 +2,11 @@
 User authentication and management.
 """
 from src.user import User
-from src.data_handler import load_user, save_user, list_users
+from src import clock
+from src.config import JOURNAL_ENABLED, USER_PAGE_SIZE
+from src.data_handler import load_user, save_user, user_exists, search_users
+from src.journal import recover_user
+from src.instrumentation import instrumented
 
 
 def show_login_streak_message(user, streak_continued, days_since):
@@ -25,6 +29,39 @@ def show_login_streak_message(user, streak_continued, days_since):
         print(f">> It's been {days_since - 1} day(s) since your last login!")
 
 
+def record_login(user):
+    """
+    Update a user's login streak and last login date for a login now.
+
+    Args:
+        user (User): User who is logging in
+
+    Returns:
+        tuple: (streak_continued, days_since_last_login)
+    """
+    streak_continued, days_since = user.update_login_streak(user.last_login_date)
+    user.last_login_date = clock.today()
+    return streak_continued, days_since
+
+
+def load_user_or_recover(username):
+    """
+    Load a user, rebuilding unsaved progress from their journal if needed.
+
+    Args:
+        username (str): Username to load
+
+    Returns:
+        User | None: Loaded User instance or None if it couldn't be loaded
+    """
+    if JOURNAL_ENABLED:
+        recovered_user = recover_user(username)
+        if recovered_user:
+            print("Recovered unsaved progress from your last session.")
+            return recovered_user
+    return load_user(username)
+
+
 def create_new_user(username):
     """
     Create a new user by prompting for birthday.
@@ -58,13 +95,12 @@ def login_existing_user(username):
     Returns:
         User | None: User instance if successful, None if user doesn't exist
     """
-    loaded_user = load_user(username)
+    loaded_user = load_user_or_recover(username)
     if not loaded_user:
         return None
 
     # Update login streak
-    streak_continued, days_since = loaded_user.update_login_streak(loaded_user.last_login_date)
-    loaded_user.last_login_date = loaded_user.birthday.today()
+    streak_continued, days_since = record_login(loaded_user)
 
     print(f"Welcome back, {loaded_user.username}!")
 
@@ -74,43 +110,80 @@ def login_existing_user(username):
     return loaded_user
 
 
+def prompt_new_username():
+    """
+    Prompt for a username that isn't taken yet.
+
+    Returns:
+        str: The new username
+    """
+    while True:
+        username = input("Enter new username: ").strip()
+        if not user_exists(username):
+            return username
+        print(f"Username '{username}' is already taken. Please choose another.")
+
+
 def select_user_from_list():
     """
-    Display list of users and prompt for selection or new user creation.
+    Display existing users a page at a time and prompt for selection or new user creation.
 
     Returns:
         User: Selected or newly created user instance
     """
-    existing_users = list_users()
+    prefix = ''
+    page = search_users(limit=USER_PAGE_SIZE)
+
+    if not page:
+        username = input("Enter username: ").strip()
+        return create_new_user(username)
 
-    if existing_users:
+    while True:
         print("\nExisting users:")
-        for i, u in enumerate(existing_users, 1):
+        for i, u in enumerate(page, 1):
             print(f"{i}. {u}")
-        print(f"{len(existing_users) + 1}. Create new user")
+        if len(page) == USER_PAGE_SIZE:
+            print("n. Next page")
+        print("s. Search users")
+        print("c. Create new user")
+
+        choice = input("\nSelect a user (enter number or letter): ").strip()
+        if choice.lower() == 'n':
+            next_page = search_users(prefix, after=page[-1], limit=USER_PAGE_SIZE)
+            if next_page:
+                page = next_page
+            else:
+                print("No more users.")
+            continue
+        elif choice.lower() == 's':
+            prefix = input("Username starts with: ").strip()
+            results = search_users(prefix, limit=USER_PAGE_SIZE)
+            if results:
+                page = results
+            else:
+                print(f"No users starting with '{prefix}'.")
+            continue
+        elif choice.lower() == 'c':
+            return create_new_user(prompt_new_username())
 
         try:
-            choice = int(input("\nSelect a user (enter number): ").strip())
-            if 1 <= choice <= len(existing_users):
-                username = existing_users[choice - 1]
-                user = login_existing_user(username)
-                if user:
-                    return user
-                # Fallback if file exists but can't be loaded
-                print(f"Error loading user {username}. Creating new user.")
-                return create_new_user(username)
-            else:
-                username = input("Enter new username: ").strip()
-                return create_new_user(username)
-        except (ValueError, IndexError):
-            print("Invalid selection. Creating new user...")
-            username = input("Enter username: ").strip()
+            number = int(choice)
+        except ValueError:
+            print("Invalid selection. Please try again.")
+            continue
+
+        if 1 <= number <= len(page):
+            username = page[number - 1]
+            user = login_existing_user(username)
+            if user:
+                return user
+            # Fallback if file exists but can't be loaded
+            print(f"Error loading user {username}. Creating new user.")
             return create_new_user(username)
-    else:
-        username = input("Enter username: ").strip()
-        return create_new_user(username)
+        print("Invalid selection. Please try again.")
 
 
+@instrumented('user_auth.authenticate_user')
 def authenticate_user(username=None):
     """
     Authenticate or create a user.
@@ -123,11 +196,10 @@ def authenticate_user(username=None):
     """
     if username:
         # Try to load existing user
-        loaded_user = load_user(username)
+        loaded_user = load_user_or_recover(username)
         if loaded_user:
             # Update login streak
-            streak_continued, days_since = loaded_user.update_login_streak(loaded_user.last_login_date)
-            loaded_user.last_login_date = loaded_user.birthday.today()
+            streak_continued, days_since = record_login(loaded_user)
 
             print(f"Welcome back, {loaded_user.username}!")
             show_login_streak_message(loaded_user, streak_continued, days_since)
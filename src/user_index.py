@@ -0,0 +1,354 @@
+"""
+Persistent, sorted index of usernames.
+
+The index lives in USER_INDEX_PATH as three files:
+
+- users.idx: every indexed username, sorted, one per line
+- users.off: the byte offset of each line in users.idx (8 bytes each),
+  so any record can be read with one seek and searched by bisection
+- users.delta: a generation line, then usernames added since the last
+  merge, in insertion order
+
+A Bloom filter (users.bloom) answers "might this username exist?" without
+touching the sorted file. New usernames are appended to the delta file and
+set bits in the filter in place; once the delta grows past
+USER_INDEX_DELTA_LIMIT it is merged into the sorted file.
+
+Opening the index only reads the small delta file, so startup cost doesn't
+grow with the number of users.
+
+Processes sharing the index hold a lock on users.lock while they use it and
+read the usernames other processes have appended to the delta since they
+last looked. Each new delta file starts with a random generation line, so a
+process can tell when the file it was reading has been merged away.
+"""
+import bisect
+import contextlib
+import hashlib
+import os
+import struct
+import threading
+from src.storage import get_backend
+from src.config import USER_INDEX_PATH, USER_INDEX_DELTA_LIMIT, USER_INDEX_BLOOM_BITS, USER_INDEX_BLOOM_HASHES
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are locked out
+    fcntl = None
+
+OFFSET = struct.Struct('<Q')
+
+# Usernames are stripped, so a line starting with a tab can't be one
+GENERATION_PREFIX = b"\tgeneration "
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter stored in a file and updated in place.
+
+    Attributes:
+        path (str): Filter file path
+        size (int): Number of bits
+        hashes (int): Number of bit positions per item
+    """
+
+    def __init__(self, path, size=USER_INDEX_BLOOM_BITS, hashes=USER_INDEX_BLOOM_HASHES):
+        self.path = path
+        self.size = size
+        self.hashes = hashes
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.truncate(size // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = struct.unpack('<QQ', digest)
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        """Set the item's bits"""
+        with open(self.path, 'r+b') as f:
+            for position in self._positions(item):
+                f.seek(position // 8)
+                byte = f.read(1)[0]
+                f.seek(position // 8)
+                f.write(bytes([byte | (1 << (position % 8))]))
+
+    def might_contain(self, item):
+        """
+        Check whether the item may have been added.
+
+        Returns:
+            bool: False if the item was definitely never added
+        """
+        with open(self.path, 'rb') as f:
+            for position in self._positions(item):
+                f.seek(position // 8)
+                if not f.read(1)[0] & (1 << (position % 8)):
+                    return False
+        return True
+
+    def clear(self):
+        """Reset every bit"""
+        with open(self.path, 'wb') as f:
+            f.truncate(self.size // 8)
+
+
+class UserIndex:
+    """
+    Sorted on-disk username index with prefix search and pagination.
+
+    Attributes:
+        path (str): Directory holding the index files
+        delta_limit (int): Delta size that triggers a merge
+    """
+
+    def __init__(self, path=USER_INDEX_PATH, delta_limit=USER_INDEX_DELTA_LIMIT):
+        self.path = path
+        self.delta_limit = delta_limit
+        os.makedirs(path, exist_ok=True)
+        self._idx_path = os.path.join(path, "users.idx")
+        self._off_path = os.path.join(path, "users.off")
+        self._delta_path = os.path.join(path, "users.delta")
+        self.bloom = BloomFilter(os.path.join(path, "users.bloom"))
+        self._lock_path = os.path.join(path, "users.lock")
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._delta = []
+        self._delta_generation = None
+        self._delta_offset = 0
+        with self._locked():
+            self._sync()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the thread lock and, outermost, the lock file shared with other processes"""
+        with self._lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                if self._lock_file is None:
+                    self._lock_file = open(self._lock_path, 'a')
+                fcntl.lockf(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and fcntl is not None:
+                    fcntl.lockf(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _sync(self):
+        """Read usernames other processes have added to the delta (call with the lock held)"""
+        try:
+            f = open(self._delta_path, 'rb')
+        except FileNotFoundError:
+            self._reset_delta()
+            return
+        with f:
+            header = f.readline()
+            generation = header if header.startswith(GENERATION_PREFIX) else None
+            if generation is None or generation != self._delta_generation:
+                # A new delta since we last looked (or one without a generation line): read all of it
+                self._delta = []
+                self._delta_generation = generation
+                self._delta_offset = 0 if generation is None else len(header)
+            f.seek(self._delta_offset)
+            added = []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Still being written, or cut short by a crash
+                self._delta_offset += len(line)
+                username = line.decode('utf-8').rstrip('\n')
+                if username:
+                    added.append(username)
+        if added:
+            self._delta = sorted(set(self._delta).union(added))
+
+    def _reset_delta(self):
+        self._delta = []
+        self._delta_generation = None
+        self._delta_offset = 0
+
+    def exists(self):
+        """Return True if the sorted index has been built"""
+        return os.path.exists(self._idx_path) and os.path.exists(self._off_path)
+
+    def rebuild(self, usernames):
+        """
+        Rebuild the whole index from a list of usernames.
+
+        Args:
+            usernames (iterable[str]): Every username
+        """
+        with self._locked():
+            self.bloom.clear()
+            usernames = sorted(set(usernames))
+            for username in usernames:
+                self.bloom.add(username)
+            self._write_sorted(usernames)
+            self._reset_delta()
+            if os.path.exists(self._delta_path):
+                os.remove(self._delta_path)
+
+    def _write_sorted(self, usernames):
+        offsets = bytearray()
+        position = 0
+        with open(self._idx_path + ".tmp", 'wb') as idx:
+            for username in usernames:
+                line = username.encode('utf-8') + b"\n"
+                offsets += OFFSET.pack(position)
+                idx.write(line)
+                position += len(line)
+        with open(self._off_path + ".tmp", 'wb') as off:
+            off.write(offsets)
+        os.replace(self._idx_path + ".tmp", self._idx_path)
+        os.replace(self._off_path + ".tmp", self._off_path)
+
+    def _sorted_count(self):
+        if not os.path.exists(self._off_path):
+            return 0
+        return os.path.getsize(self._off_path) // OFFSET.size
+
+    def _sorted_find(self, key, idx, off, count):
+        """Return the position of the first sorted record >= key"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._read_record(idx, off, mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _read_record(self, idx, off, position):
+        off.seek(position * OFFSET.size)
+        idx.seek(OFFSET.unpack(off.read(OFFSET.size))[0])
+        return idx.readline().decode('utf-8').rstrip('\n')
+
+    def add(self, username):
+        """
+        Add a username if it isn't indexed yet.
+
+        Args:
+            username (str): Username to add
+        """
+        with self._locked():
+            if self.contains(username):
+                return
+            self.bloom.add(username)
+            with open(self._delta_path, 'ab') as f:
+                if f.tell() == 0:
+                    self._delta_generation = GENERATION_PREFIX + os.urandom(8).hex().encode('ascii') + b"\n"
+                    f.write(self._delta_generation)
+                    self._delta_offset = len(self._delta_generation)
+                line = username.encode('utf-8') + b"\n"
+                f.write(line)
+                self._delta_offset += len(line)
+            bisect.insort(self._delta, username)
+            if len(self._delta) >= self.delta_limit:
+                self.merge()
+
+    def merge(self):
+        """Merge the delta, including other processes' additions, into the sorted file"""
+        with self._locked():
+            self._sync()
+            merged = list(self._scan('', None, None)) if self.exists() else list(self._delta)
+            self._write_sorted(merged)
+            self._reset_delta()
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._delta_path)
+
+    def contains(self, username):
+        """
+        Check whether a username is indexed.
+
+        Returns:
+            bool: True if the username exists
+        """
+        if not self.bloom.might_contain(username):
+            return False
+        with self._locked():
+            self._sync()
+            i = bisect.bisect_left(self._delta, username)
+            if i < len(self._delta) and self._delta[i] == username:
+                return True
+            count = self._sorted_count()
+            if count == 0:
+                return False
+            with open(self._idx_path, 'rb') as idx, open(self._off_path, 'rb') as off:
+                position = self._sorted_find(username, idx, off, count)
+                return position < count and self._read_record(idx, off, position) == username
+
+    def _scan(self, prefix, after, limit):
+        """Yield indexed usernames in order, starting with prefix and after the cursor"""
+        start = prefix if after is None or after < prefix else after
+        delta = self._delta[bisect.bisect_left(self._delta, start):]
+        delta_pos = 0
+        count = self._sorted_count()
+        produced = 0
+
+        idx = open(self._idx_path, 'rb') if count else None
+        off = open(self._off_path, 'rb') if count else None
+        try:
+            position = self._sorted_find(start, idx, off, count) if count else 0
+            while limit is None or produced < limit:
+                from_sorted = self._read_record(idx, off, position) if position < count else None
+                from_delta = delta[delta_pos] if delta_pos < len(delta) else None
+                if from_sorted is None and from_delta is None:
+                    break
+                if from_delta is None or (from_sorted is not None and from_sorted <= from_delta):
+                    username = from_sorted
+                    position += 1
+                    if username == from_delta:
+                        delta_pos += 1
+                else:
+                    username = from_delta
+                    delta_pos += 1
+                if not username.startswith(prefix):
+                    break
+                if after is not None and username <= after:
+                    continue
+                produced += 1
+                yield username
+        finally:
+            if idx:
+                idx.close()
+                off.close()
+
+    def search(self, prefix='', after=None, limit=20):
+        """
+        List usernames starting with prefix, in sorted order.
+
+        Args:
+            prefix (str): Username prefix ('' for everyone)
+            after (str, optional): Only return usernames after this one (the last
+                username of the previous page)
+            limit (int): Maximum number of usernames to return
+
+        Returns:
+            list[str]: Matching usernames
+        """
+        with self._locked():
+            self._sync()
+            return list(self._scan(prefix, after, limit))
+
+
+_index = None
+
+
+def get_user_index():
+    """
+    Get the shared user index, building it from the stored users on first use.
+
+    Returns:
+        UserIndex: The user index
+    """
+    global _index
+    if _index is None:
+        index = UserIndex()
+        with index._locked():
+            # Another process may have built it while we waited for the lock
+            if not index.exists():
+                index.rebuild(get_backend().list_users())
+        _index = index
+    return _index
@@ -0,0 +1,56 @@
+import datetime
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.analytics import UserAnalytics, HyperLogLog, to_columns, effective_streaks
+from src.user import User
+
+
+def make_user(name, first, last, streak):
+    user = User(name)
+    user.first_login_date = first
+    user.last_login_date = last
+    user.current_login_streak = streak
+    user.longest_login_streak = streak
+    return user
+
+
+def test_streaks_retention_and_activity():
+    as_of = datetime.date(2024, 3, 31)
+    users = [
+        make_user("ann", datetime.date(2024, 1, 1), as_of, 10),
+        make_user("bob", datetime.date(2024, 1, 2), as_of - datetime.timedelta(days=1), 3),
+        make_user("cat", datetime.date(2024, 1, 3), datetime.date(2024, 1, 3), 1),
+        make_user("dan", datetime.date(2024, 3, 30), as_of, 2)
+    ]
+    columns = to_columns(users)
+    assert effective_streaks(columns, as_of.toordinal()).tolist() == [10, 3, 0, 2]
+
+    analytics = UserAnalytics(as_of)
+    analytics.add([user.username for user in users[:2]], to_columns(users[:2]))
+    analytics.add([user.username for user in users[2:]], to_columns(users[2:]))
+    report = analytics.report()
+
+    assert report['users'] == 4
+    assert report['streaks']['on_streak'] == 3
+    assert report['streaks']['at_least_7'] == 1
+    first_week = report['retention'][0]
+    assert first_week['cohort'] == "2024-01-01" and first_week['users'] == 3
+    assert first_week['d30'] == pytest.approx(2 / 3)
+    assert round(report['active']['dau']) == 2
+    assert round(report['active']['wau']) == 3
+
+
+def test_hyperloglog_estimate_and_merge():
+    first, second = HyperLogLog(), HyperLogLog()
+    first.add_hashes(HyperLogLog.hash_keys(f"user{i}" for i in range(50_000)))
+    second.add_hashes(HyperLogLog.hash_keys(f"user{i}" for i in range(25_000, 75_000)))
+    assert first.count() == pytest.approx(50_000, rel=0.05)
+    assert first.merge(second).count() == pytest.approx(75_000, rel=0.05)
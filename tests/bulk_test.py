@@ -0,0 +1,100 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import src.bulk as bulk
+from src.bulk import export_data, import_data, read_checkpoint
+from src.config import PETS_PATH
+from src.data_handler import save_pet, save_user, load_pet, load_user, list_pets
+from src.pet import Pet
+from src.storage import get_backend
+from src.user import User
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Run in an empty directory with fresh user index and leaderboards"""
+    def switch(name):
+        directory = tmp_path / name
+        directory.mkdir()
+        monkeypatch.chdir(directory)
+        monkeypatch.setattr('src.user_index._index', None)
+        monkeypatch.setattr('src.leaderboard._leaderboards', None)
+        return directory
+    return switch
+
+
+def populate():
+    records = {}
+    for i in range(5):
+        user = User(f"user{i}")
+        pet = Pet(f"Pet{i}", user.username)
+        user.add_pet(f"pet{i}.json", pet.name)
+        save_user(user)
+        save_pet(pet, os.path.join(PETS_PATH, f"pet{i}.json"), quiet=True)
+        records[user.username] = user.to_dict()
+        records[f"pet{i}.json"] = pet.to_dict()
+    return records
+
+
+def test_export_import_round_trip(data_dir, tmp_path):
+    data_dir("source")
+    records = populate()
+    get_backend().write_pet(os.path.join(PETS_PATH, "broken.json"), b"not a pet")
+    export_path = str(tmp_path / "backup.ndjson.gz")
+    summary = export_data(export_path, workers=1, batch_size=3, report=None)
+    assert summary['records'] == 10
+    assert summary['invalid'] == 1
+
+    data_dir("target")
+    summary = import_data(export_path, workers=1, batch_size=3, report=None)
+    assert (summary['users'], summary['pets'], summary['invalid']) == (5, 5, 0)
+    assert sorted(list_pets()) == [f"pet{i}.json" for i in range(5)]
+    assert load_user("user3").to_dict() == records["user3"]
+    assert load_pet(os.path.join(PETS_PATH, "pet2.json")).to_dict() == records["pet2.json"]
+    assert not os.path.exists(export_path + ".checkpoint")
+
+
+def test_import_resumes_from_checkpoint(data_dir, tmp_path, monkeypatch):
+    data_dir("source")
+    populate()
+    export_path = str(tmp_path / "backup.ndjson")
+    export_data(export_path, workers=1, report=None)
+    with open(export_path, 'a') as f:
+        f.write('{"type": "pet", "key": "bad.json", "data": {"name": ""}}\n')
+
+    data_dir("target")
+    saved = []
+
+    def failing_save_pet(pet, filename, quiet=False):
+        if len(saved) == 3:
+            raise KeyboardInterrupt
+        saved.append(filename)
+        save_pet(pet, filename, quiet)
+
+    monkeypatch.setattr(bulk, 'save_pet', failing_save_pet)
+    with pytest.raises(KeyboardInterrupt):
+        import_data(export_path, workers=1, batch_size=2, report=None)
+    checkpoint = read_checkpoint(export_path)
+    assert checkpoint['users'] == 5 and checkpoint['pets'] == 3
+
+    monkeypatch.setattr(bulk, 'save_pet', save_pet)
+    summary = import_data(export_path, workers=1, batch_size=2, report=None)
+    assert summary['resumed_from'] == checkpoint['line']
+    assert (summary['users'], summary['pets'], summary['invalid']) == (5, 5, 1)
+    assert len(list_pets()) == 5
+
+
+def test_empty_export_imports_cleanly(data_dir, tmp_path):
+    data_dir("source")
+    export_path = str(tmp_path / "empty.ndjson")
+    assert export_data(export_path, workers=1, report=None)['records'] == 0
+
+    data_dir("target")
+    summary = import_data(export_path, workers=1, report=None)
+    assert (summary['users'], summary['pets'], summary['invalid']) == (0, 0, 0)
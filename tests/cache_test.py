@@ -0,0 +1,53 @@
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cache import WriteBackCache
+from src.config import PETS_PATH
+from src.data_handler import enable_cache, disable_cache, cache_stats, load_pet, save_pet
+from src.pet import Pet
+from src.serialization import get_codec
+from src.storage import get_backend
+
+
+def test_lru_eviction_writes_back_dirty_entries():
+    written = []
+    cache = WriteBackCache(lambda key, value: written.append((key, value)) or (10, 1), max_entries=2)
+    cache.put('a', 1, size=10)
+    cache.put('b', 2, dirty=True)
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache.put('c', 3, size=10)
+    assert cache.get('b') is None
+    assert written == [('b', 2)]
+
+    cache.put('a', 4, dirty=True)
+    cache.flush()
+    assert written == [('b', 2), ('a', 4)]
+    assert cache.stats['evictions'] == 1 and cache.stats['writebacks'] == 2
+    assert len(cache) == 2
+
+
+def test_cached_pet_is_dropped_when_its_file_is_replaced(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.leaderboard._leaderboards', None)
+    filename = os.path.join(PETS_PATH, "mochi.json")
+    save_pet(Pet("Mochi"), filename, quiet=True)
+
+    enable_cache()
+    try:
+        first = load_pet(filename, quiet=True)
+        assert load_pet(filename, quiet=True) is first
+
+        # Another process rewrites the file within the same mtime tick
+        [path] = Path(PETS_PATH).rglob("mochi.json")
+        stat = os.stat(path)
+        get_backend().write_pet(filename, get_codec('json').encode_pet(Pet("Bean")))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert load_pet(filename, quiet=True).name == "Bean"
+        assert cache_stats()['invalidations'] == 1
+    finally:
+        disable_cache()
@@ -0,0 +1,47 @@
+import datetime
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.clock import VirtualClock, use_clock, now
+from src.pet import Pet
+from src.user import User
+from src.user_auth import record_login
+from src.simulation import simulate
+
+
+def test_thirty_day_login_streak():
+    clock = VirtualClock(datetime.datetime(2024, 3, 1, 9, 0))
+    with use_clock(clock):
+        user = User("alice", "2000-03-30")
+        for _ in range(29):
+            clock.advance(days=1)
+            record_login(user)
+        assert user.current_login_streak == 30
+        assert user.is_birthday_today()
+
+        clock.advance(days=2)
+        assert record_login(user) == (False, 2)
+        assert user.current_login_streak == 1
+        assert user.longest_login_streak == 30
+    assert now() != clock.now()
+
+
+def test_week_of_neglect():
+    clock = VirtualClock(datetime.datetime(2024, 3, 1, 9, 0))
+    with use_clock(clock):
+        pet = Pet("Mochi")
+        clock.advance(weeks=1)
+        pet.update_stats()
+        assert pet.fullness == 0
+        assert pet.age == 7
+        assert pet.last_update == clock.now()
+
+
+def test_simulation_is_repeatable():
+    first = simulate(user_count=50, days=14, seed=3)
+    second = simulate(user_count=50, days=14, seed=3)
+    assert first['visits'] == second['visits'] > 0
+    assert first['profiles'] == second['profiles']
@@ -0,0 +1,52 @@
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.config import PETS_PATH
+from src.data_handler import Session, after_save, load_pet, load_user, save_pet, save_user
+from src.pet import Pet
+from src.storage import get_backend
+from src.user import User
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Run in an empty directory with a fresh user index and leaderboards"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.user_index._index', None)
+    monkeypatch.setattr('src.leaderboard._leaderboards', None)
+
+
+def test_session_coalesces_saves_and_reads_back_unsaved_copies():
+    filename = os.path.join(PETS_PATH, "mochi.json")
+    pet = Pet("Mochi")
+    user = User("meg")
+    events = []
+
+    with Session() as session:
+        for fill in (10, 20, 30):
+            pet.feed(fill)
+            save_pet(pet, filename, quiet=True)
+        save_user(user)
+        save_user(user)
+        after_save(lambda: events.append(get_backend().read_pet(filename) is not None))
+
+        # Nothing is written yet, but loads see the latest saved state as a copy
+        assert get_backend().read_pet(filename) is None
+        loaded = load_pet(filename, quiet=True)
+        assert loaded is not pet and loaded.fullness == pet.fullness
+        assert load_user("meg").username == "meg"
+        assert events == []
+
+    # The callback ran after the commit had written the pet
+    assert events == [True]
+    assert session.stats['saves_requested'] == 5
+    assert session.stats['records_written'] == 2
+    assert session.stats['syscalls_saved'] > 0
+    assert "2 of 5 saves written" in session.summary()
+    assert load_pet(filename, quiet=True).fullness == pet.fullness
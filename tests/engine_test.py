@@ -0,0 +1,107 @@
+import datetime
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pet import Pet
+from src.user import User
+from src.engine import GameEngine
+from src.replay import SessionRecorder, read_script, replay, generate_script
+
+
+def make_engine(recorder=None):
+    user = User("alice", "2000-01-01")
+    pet = Pet("Mochi", owner="alice")
+    pet.last_update = datetime.datetime(2024, 1, 1, 8, 0)
+    user.add_pet("mochi.json", "Mochi")
+    return GameEngine(user, pet, "mochi.json", persist=False, recorder=recorder)
+
+
+def test_engine_commands():
+    engine = make_engine()
+    time = "2024-01-01T09:00:00"
+
+    result = engine.execute({'action': 'feed', 'food': 1, 'time': time})
+    assert result['ok']
+    assert result['messages'][0] == "Mochi ate a rice ball!"
+
+    assert not engine.execute({'action': 'feed', 'food': 99, 'time': time})['ok']
+    assert engine.execute({'action': 'sleep', 'time': time})['ok']
+    assert engine.execute({'action': 'sleep', 'time': time})['error'] == "Mochi is sleeping already!"
+    assert not engine.execute({'action': 'play', 'guesses': ['l'] * 5, 'time': time})['ok']
+    assert engine.execute({'action': 'wake', 'time': time})['ok']
+
+    result = engine.execute({'action': 'play', 'guesses': ['l'] * 5, 'answers': ['l', 'l', 'l', 'r', 'r'],
+                             'time': time})
+    assert result['correct'] == 3 and result['won']
+    assert engine.user.games_won == 1
+    assert engine.execute({'action': 'dance'})['error'] == "Unknown action: 'dance'"
+
+
+def test_recorded_session_replays_exactly(tmp_path):
+    path = str(tmp_path / "session.ndjson")
+    recorder = SessionRecorder(path)
+    engine = make_engine(recorder)
+    recorder.start_session(engine.user, engine.pet, engine.pet_filename)
+    for command in ({'action': 'status'}, {'action': 'feed', 'food': 2}, {'action': 'play', 'guesses': ['r'] * 5},
+                    {'action': 'sleep'}, {'action': 'wake'}, {'action': 'user_info'}):
+        engine.execute(command)
+    recorder.close()
+
+    report = replay(read_script(path))
+    assert report['sessions'] == 1
+    assert report['commands'] == 6
+    assert report['mismatches'] == 0
+
+
+def test_generated_script_replays():
+    report = replay(generate_script(50, commands=10, seed=1))
+    assert report['sessions'] == 50
+    assert report['commands'] == 500
+
+
+def test_engine_rejects_malformed_commands():
+    engine = make_engine()
+    for command in ({'action': 'feed', 'food': [1]}, {'action': 'feed', 'food': True}, {'action': ['status']},
+                    {'action': 'play', 'guesses': [[], {}, 1, None, 'l']},
+                    {'action': 'play', 'guesses': ['l'] * 5, 'answers': 'lllrr'}):
+        result = engine.execute(command)
+        assert not result['ok'] and result['error']
+
+
+def test_view_status_updates_stats_once(monkeypatch, capsys):
+    from src.app_loop import handle_view_status
+    engine = make_engine()
+    calls = []
+    update_stats = Pet.update_stats
+    monkeypatch.setattr(Pet, 'update_stats', lambda pet, *args: calls.append(args) or update_stats(pet, *args))
+
+    handle_view_status(engine)
+
+    assert len(calls) == 1
+    assert "Name: Mochi" in capsys.readouterr().out
+
+
+def test_feed_and_sleep_check_the_pet_as_of_the_command():
+    # Actions are allowed or refused on up-to-date stats, not as of the last status view
+    engine = make_engine()
+    pet = engine.pet
+    pet.energy = 0.0
+    pet.sleep = pet.auto_sleep = True
+    pet.sleep_start = pet.last_update
+
+    # An hour of sleep restores enough energy for the pet to wake up by itself
+    assert engine.execute({'action': 'feed', 'food': 1, 'time': "2024-01-01T09:00:00"})['ok']
+    assert not pet.sleep
+
+    pet.fullness = 100.0
+    assert not engine.execute({'action': 'feed', 'food': 1, 'time': "2024-01-01T09:00:00"})['ok']
+    assert engine.execute({'action': 'feed', 'food': 1, 'time': "2024-01-01T21:00:00"})['ok']
+
+    pet.energy = 0.0
+    pet.sleep = pet.auto_sleep = True
+    pet.sleep_start = pet.last_update
+    assert engine.execute({'action': 'sleep', 'time': "2024-01-01T22:00:00"})['ok']
+    assert not pet.auto_sleep
@@ -0,0 +1,58 @@
+import datetime
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import instrumentation
+from src.instrumentation import Histogram
+from src.pet import Pet
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in range(1, 10001):
+        histogram.record(value / 1e6)
+    assert histogram.count == 10000
+    assert histogram.min == 1e-6 and histogram.max == 0.01
+    for percent in (50, 90, 99):
+        exact = percent / 100 * 0.01
+        assert abs(histogram.percentile(percent) - exact) / exact < 0.02
+
+
+def test_registry_collects_only_when_enabled():
+    instrumentation.disable()
+    pet = Pet("Mochi")
+    pet.update_stats(pet.last_update + datetime.timedelta(days=3))
+    assert instrumentation.registry is None
+
+    registry = instrumentation.enable()
+    try:
+        pet.update_stats(pet.last_update + datetime.timedelta(days=3))
+        assert registry.histograms['pet.update_stats.seconds'].count == 1
+        assert registry.histograms['pet.update_stats.iterations'].max >= 1
+
+        registry.increment('data_handler.bytes_read', 100)
+        text = registry.to_prometheus()
+        assert "pet_game_data_handler_bytes_read_total 100" in text
+        assert 'pet_game_pet_update_stats_seconds_bucket{le="+Inf"} 1' in text
+    finally:
+        instrumentation.disable()
+
+
+def test_background_dump_waits_for_the_registry_lock(tmp_path):
+    registry = instrumentation.enable()
+    path = str(tmp_path / "metrics")
+    try:
+        registry.increment('server.requests')
+        # The main thread is mid-update, as it may be when SIGUSR1 arrives
+        with registry._lock:
+            thread = instrumentation.dump_in_background(path)
+            thread.join(0.05)
+            assert thread.is_alive()
+        thread.join(5)
+        assert not thread.is_alive()
+        assert "pet_game_server_requests_total 1" in (tmp_path / "metrics.prom").read_text()
+    finally:
+        instrumentation.disable()
@@ -0,0 +1,75 @@
+import datetime
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.clock import VirtualClock, use_clock
+from src.config import PETS_PATH
+from src.data_handler import save_pet
+from src.journal import Journal, recover_pet
+from src.pet import Pet
+
+START = datetime.datetime(2024, 1, 1, 8, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.leaderboard._leaderboards', None)
+
+
+def play(pet, journal, clock):
+    """Feed the pet and put it to bed an hour apart, journaling like the engine does"""
+    for action in ('feed', 'sleep'):
+        now = clock.advance(hours=1)
+        pet.update_stats(now)
+        journal.append('update', timestamp=now)
+        if action == 'feed':
+            pet.feed(20)
+            journal.append('feed', fill_value=20)
+        else:
+            pet.go_to_bed(now)
+            journal.append('sleep', timestamp=now)
+
+
+def test_events_after_a_save_replay_onto_the_save_file():
+    clock = VirtualClock(START)
+    with use_clock(clock):
+        filename = os.path.join(PETS_PATH, "mochi.json")
+        pet = Pet("Mochi")
+        save_pet(pet, filename, quiet=True)
+        journal = Journal.for_pet(filename, pet.to_dict)
+        journal.mark_saved()
+        assert recover_pet(filename) is None
+
+        # Starting from saved state writes nothing
+        journal.begin(pet.to_dict())
+        assert [record['event'] for record in journal.read()] == ['saved']
+
+        play(pet, journal, clock)
+        assert recover_pet(filename).to_dict() == pet.to_dict()
+
+        journal.mark_saved()
+        assert recover_pet(filename) is None
+        assert len(journal.read()) == 1
+
+
+def test_compacted_journal_is_not_treated_as_saved():
+    clock = VirtualClock(START)
+    with use_clock(clock):
+        filename = os.path.join(PETS_PATH, "bean.json")
+        pet = Pet("Bean")
+        journal = Journal(Journal.for_pet(filename).path, pet.to_dict, snapshot_interval=4)
+        # A new pet has no save file, so the session starts from a snapshot
+        journal.begin(pet.to_dict())
+        play(pet, journal, clock)
+
+        records = journal.read()
+        assert [record['event'] for record in records] == ['snapshot']
+        assert records[0]['seq'] == 5
+        assert recover_pet(filename).to_dict() == pet.to_dict()
@@ -0,0 +1,93 @@
+import datetime
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.clock import VirtualClock, use_clock
+from src.config import PETS_PATH
+from src.data_handler import save_pet, load_pet
+from src.lazy_pet import LazyPet, load_current_pet
+from src.pet import Pet
+from src.user import User
+
+START = datetime.datetime(2024, 1, 1, 8, 0, 0)
+
+
+def test_lazy_pets_match_eagerly_updated_pets(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.leaderboard._leaderboards', None)
+    clock = VirtualClock(START)
+    with use_clock(clock):
+        filename = os.path.join(PETS_PATH, "mochi.json")
+        save_pet(Pet("Mochi"), filename, quiet=True)
+        clock.advance(hours=9)
+
+        def play(pet):
+            # The first use of each pet is a method call, not a stat read
+            pet.feed(2)
+            pet.go_to_bed()
+            clock.advance(hours=3)
+            pet.update_stats()
+            pet.wake_up()
+            return pet.to_dict()
+
+        eager = load_pet(filename, quiet=True)
+        eager.update_stats()
+        lazy = LazyPet(filename)
+        assert not lazy.loaded
+        assert lazy.name == "Mochi" and not lazy._stats_updated
+        clock.set(START + datetime.timedelta(hours=9))
+        eager_result = play(eager)
+        clock.set(START + datetime.timedelta(hours=9))
+        assert play(lazy) == eager_result
+
+
+def test_login_loads_only_the_current_pet(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.leaderboard._leaderboards', None)
+    user = User("meg")
+    for name in ("Mochi", "Bean", "Pip"):
+        user.add_pet(f"{name.lower()}.json", name)
+    save_pet(Pet("Bean"), os.path.join(PETS_PATH, "bean.json"), quiet=True)
+    user.current_pet = "bean.json"
+
+    loads = []
+    monkeypatch.setattr('src.lazy_pet.load_pet', lambda filename, quiet: loads.append(filename) or load_pet(filename, quiet))
+    assert load_current_pet(user).name == "Bean"
+    assert loads == [os.path.join(PETS_PATH, "bean.json")]
+    assert load_current_pet(user, "pip.json") is None
+
+
+def test_login_does_not_build_proxies_for_every_pet(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.leaderboard._leaderboards', None)
+    user = User("meg")
+    for i in range(50):
+        user.add_pet(f"pet{i}.json", f"Pet{i}")
+    save_pet(Pet("Pet7"), os.path.join(PETS_PATH, "pet7.json"), quiet=True)
+
+    created = []
+    init = LazyPet.__init__
+    monkeypatch.setattr(LazyPet, '__init__', lambda proxy, filename: created.append(filename) or init(proxy, filename))
+    assert load_current_pet(user, "pet7.json").name == "Pet7"
+    assert created == [os.path.join(PETS_PATH, "pet7.json")]
+
+
+def test_initialize_pet_updates_stats_once(tmp_path, monkeypatch):
+    from src.app_loop import initialize_pet
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.leaderboard._leaderboards', None)
+    user = User("meg")
+    user.add_pet("bean.json", "Bean")
+    save_pet(Pet("Bean"), os.path.join(PETS_PATH, "bean.json"), quiet=True)
+    user.current_pet = "bean.json"
+
+    calls = []
+    update_stats = Pet.update_stats
+    monkeypatch.setattr(Pet, 'update_stats', lambda pet, *args: calls.append(args) or update_stats(pet, *args))
+    pet, filename = initialize_pet(user)
+    assert pet.name == "Bean" and filename == os.path.join(PETS_PATH, "bean.json")
+    assert len(calls) == 1
@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.leaderboard import SortedBoard, Leaderboards
+from src.user import User
+from src.pet import Pet
+
+
+def test_sorted_board_matches_a_full_sort(monkeypatch):
+    monkeypatch.setattr('src.leaderboard.BUCKET_SIZE', 4)
+    rng = random.Random(5)
+    board = SortedBoard('test')
+    scores = {}
+    for _ in range(2000):
+        member = f"user{rng.randrange(200)}"
+        if rng.random() < 0.2:
+            board.discard(member)
+            scores.pop(member, None)
+        else:
+            scores[member] = rng.randrange(50)
+            board.set(member, scores[member])
+
+    expected = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    assert board.top(len(scores) + 5) == expected
+    assert board.top(7, offset=30) == expected[30:37]
+    for rank, (member, _) in enumerate(expected, 1):
+        assert board.rank(member) == rank
+
+
+def make_user(name, won, played, streak):
+    user = User(name)
+    user.games_won, user.games_played, user.longest_login_streak = won, played, streak
+    return user
+
+
+def test_leaderboards_persist_and_apply_min_games(tmp_path):
+    path = str(tmp_path / "leaderboard")
+    boards = Leaderboards(path, min_games=10, log_limit=3)
+    boards.update_user("ann", make_user("ann", 9, 10, 4))
+    boards.update_user("bob", make_user("bob", 5, 5, 9))
+    boards.update_user("cat", make_user("cat", 6, 12, 1))
+    boards.update_pet("data/pets/old.json", Pet("Old"))
+
+    reopened = Leaderboards(path, min_games=10)
+    assert [entry['name'] for entry in reopened.top('win_rate')] == ["ann", "cat"]
+    assert reopened.rank('win_rate', "bob") is None
+    assert reopened.rank('games_won', "bob")['rank'] == 3
+    assert reopened.top('longest_streak', 1)[0]['name'] == "bob"
+    assert reopened.rank('oldest_pet', "old.json")['rank'] == 1
+
+
+def record_wins(path, prefix):
+    boards = Leaderboards(path, log_limit=7)
+    for i in range(40):
+        boards.update_user(f"{prefix}{i}", make_user(f"{prefix}{i}", i, i, 0))
+
+
+def test_processes_sharing_leaderboards_keep_every_change(tmp_path):
+    path = str(tmp_path / "leaderboard")
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        list(executor.map(record_wins, [path] * 3, ["a", "b", "c"]))
+
+    reopened = Leaderboards(path)
+    assert len(reopened.boards['games_won']) == 120
+    assert reopened.rank('games_won', "c39")['score'] == 39
+    assert not [name for name in os.listdir(path) if name.endswith(".tmp")]
@@ -0,0 +1,154 @@
+import datetime
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import clock
+from src.pet import Pet
+from src.pet_store import PetStore
+
+START = datetime.datetime(2024, 1, 1, 12, 0)
+
+
+def make_pets(count):
+    with clock.use_clock(clock.VirtualClock(START)):
+        return [Pet(f"pet{i}", f"owner{i % 3}" if i % 2 else None) for i in range(count)]
+
+
+def test_records_update_in_place_and_persist(tmp_path):
+    path = str(tmp_path / "pets.store")
+    store = PetStore(path, initial_capacity=2)
+    pets = make_pets(5)
+    for i, pet in enumerate(pets):
+        store.add(f"pet{i}.json", pet)
+
+    later = START + datetime.timedelta(hours=30)
+    with store.locked("pet1.json") as mapped:
+        for pet in (mapped, pets[1]):
+            pet.wake_up(later)
+            pet.feed(30)
+            pet.go_to_bed(later)
+    assert store.load("pet1.json").to_dict() == pets[1].to_dict()
+    store.close()
+
+    store = PetStore(path)
+    assert len(store) == 5
+    assert store.load("pet1.json").to_dict() == pets[1].to_dict()
+    assert store.load("pet0.json").owner is None
+    store.close()
+
+
+def test_removed_records_are_reused(tmp_path):
+    path = str(tmp_path / "pets.store")
+    store, other = PetStore(path), PetStore(path)
+    pets = make_pets(3)
+    for i, pet in enumerate(pets):
+        store.add(f"pet{i}.json", pet)
+
+    slot = store.get("pet1.json").slot
+    assert store.remove("pet1.json")
+    assert not store.remove("pet1.json")
+    assert store.add("new.json", pets[1]).slot == slot
+    # Another handle on the same file sees the reused slot under its new key
+    assert "pet1.json" not in other
+    assert other.get("new.json").name == "pet1"
+    store.close()
+    other.close()
+
+
+def test_update_all_matches_update_stats(tmp_path):
+    pytest.importorskip("numpy")
+    store = PetStore(str(tmp_path / "pets.store"))
+    pets = make_pets(20)
+    for i, pet in enumerate(pets):
+        if i % 4 == 0:
+            pet.go_to_bed(START)
+        store.add(f"pet{i}.json", pet)
+    store.remove("pet3.json")
+
+    later = START + datetime.timedelta(hours=20)
+    assert store.update_all(later) == 19
+    for i, pet in enumerate(pets):
+        if i != 3:
+            pet.update_stats(later)
+            assert store.load(f"pet{i}.json").to_dict() == pet.to_dict()
+    store.close()
+
+
+def test_update_all_waits_for_record_locks(tmp_path):
+    pytest.importorskip("numpy")
+    store = PetStore(str(tmp_path / "pets.store"))
+    pets = make_pets(4)
+    for i, pet in enumerate(pets):
+        store.add(f"pet{i}.json", pet)
+
+    later = START + datetime.timedelta(hours=3)
+    holding = threading.Event()
+
+    def feed_slowly():
+        with store.locked("pet2.json") as mapped:
+            holding.set()
+            time.sleep(0.1)
+            mapped.fullness = 77.0
+
+    feeder = threading.Thread(target=feed_slowly)
+    feeder.start()
+    holding.wait()
+    store.update_all(later, batch_size=2)
+    feeder.join()
+
+    # The tick ran after the feed instead of overwriting it with stale stats
+    pets[2].fullness = 77.0
+    pets[2].update_stats(later)
+    assert store.load("pet2.json").fullness == pets[2].fullness
+    store.close()
+
+
+def test_locked_pet_survives_the_store_growing(tmp_path):
+    store = PetStore(str(tmp_path / "pets.store"), initial_capacity=1)
+    pets = make_pets(2)
+    store.add("a", pets[0])
+    with store.locked("a") as mapped:
+        store.add("b", pets[1])  # The store is full, so this grows and remaps the file
+        mapped.feed(10)
+        assert mapped.fullness == pets[0].fullness + 10
+    assert store.load("a").fullness == pets[0].fullness + 10
+    assert store.load("b").to_dict() == pets[1].to_dict()
+    store.close()
+
+
+def test_locked_follows_a_pet_whose_slot_was_reused(tmp_path, monkeypatch):
+    path = str(tmp_path / "pets.store")
+    store = PetStore(path)
+    other = PetStore(path)  # Stands in for another process
+    pets = make_pets(3)
+    store.add("a", pets[0])
+    store.add("b", pets[1])
+
+    find_slot = store._slot
+    raced = []
+
+    def racing_slot(key):
+        slot = find_slot(key)
+        if not raced:
+            # Between the lookup and the lock, 'a' moves and 'c' takes its old slot
+            raced.append(slot)
+            other.remove("a")
+            other.add("c", pets[2])
+            other.add("a", pets[0])
+        return slot
+
+    monkeypatch.setattr(store, '_slot', racing_slot)
+    with store.locked("a") as mapped:
+        assert mapped.slot != raced[0]
+        mapped.fullness = 42.0
+    assert store.load("a").fullness == 42.0
+    assert store.load("c").to_dict() == pets[2].to_dict()
+    other.close()
+    store.close()
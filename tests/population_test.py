@@ -0,0 +1,50 @@
+import datetime
+import math
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.population import PetPopulation
+from benchmarks.datagen import make_pets
+
+
+def assert_same_timestamp(actual, expected):
+    if expected is None:
+        assert actual is None
+    else:
+        assert actual is not None
+        assert abs((actual - expected).total_seconds()) < 1e-3
+
+
+def test_population_matches_pet_update_stats():
+    start = datetime.datetime(2024, 3, 1, 12, 0, 0)
+    pets = make_pets(2000, start, seed=7)
+    population = PetPopulation.from_pets(pets)
+
+    for gap in (datetime.timedelta(hours=3), datetime.timedelta(days=400)):
+        now = start + gap
+        population.update_stats(now)
+        for pet in pets:
+            pet.update_stats(now)
+
+        for pet, updated in zip(pets, population.to_pets()):
+            assert updated.sleep == pet.sleep
+            assert updated.auto_sleep == pet.auto_sleep
+            assert math.isclose(updated.fullness, pet.fullness, abs_tol=1e-6)
+            assert math.isclose(updated.energy, pet.energy, abs_tol=1e-6)
+            assert updated.age == pet.age
+            assert_same_timestamp(updated.sleep_start, pet.sleep_start)
+            assert_same_timestamp(updated.energy_zero_since, pet.energy_zero_since)
+            assert_same_timestamp(updated.fullness_zero_since, pet.fullness_zero_since)
+
+
+def test_population_round_trips_dicts():
+    pets = make_pets(50, datetime.datetime(2024, 3, 1), seed=3)
+    records = [pet.to_dict() for pet in pets]
+    assert PetPopulation.from_dicts(records).to_dicts() == records
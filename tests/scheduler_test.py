@@ -0,0 +1,60 @@
+import datetime
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.clock import VirtualClock, use_clock
+from src.config import PETS_PATH
+from src.data_handler import save_pet
+from src.pet import Pet, epoch_to_datetime
+from src.scheduler import predict_events, EventScheduler, Notifier
+
+
+def test_predictions_match_update_stats():
+    start = datetime.datetime(2024, 1, 1)
+    with use_clock(VirtualClock(start)):
+        pet = Pet("Mochi")
+    events = predict_events(pet)
+    assert set(events) == {'starve', 'pass_out'}
+
+    for kind, when in events.items():
+        before, after = Pet.from_dict(pet.to_dict()), Pet.from_dict(pet.to_dict())
+        before.update_stats(epoch_to_datetime(when - 1))
+        after.update_stats(epoch_to_datetime(when + 1))
+        if kind == 'starve':
+            assert before.fullness > 0 and after.fullness == 0
+        else:
+            assert not before.sleep and after.sleep
+
+
+def test_rescheduling_replaces_old_events():
+    scheduler = EventScheduler()
+    pet = Pet("Mochi")
+    scheduler.schedule('mochi', pet)
+    first = scheduler.next_time()
+    pet.feed(50)
+    scheduler.schedule('mochi', pet)
+    assert len(scheduler) == 1
+    due = scheduler.pop_due(first + 10 * 86400)
+    assert len(due) == len(predict_events(pet))
+
+
+def test_notifier_reports_each_event_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.user_index._index', None)
+    monkeypatch.setattr('src.leaderboard._leaderboards', None)
+    clock = VirtualClock(datetime.datetime(2024, 1, 1))
+    reported = []
+    with use_clock(clock):
+        save_pet(Pet("Mochi"), os.path.join(PETS_PATH, "mochi.json"), quiet=True)
+        notifier = Notifier(notify=lambda pet, kind, when: reported.append(kind))
+        notifier.scan()
+        for _ in range(48):
+            clock.advance(hours=1)
+            notifier.run_once()
+    assert reported[:2] == ['starve', 'pass_out']
+    assert reported.count('starve') == 1
+    assert 'wake' in reported
@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pet import Pet
+from src.schema import SCHEMA_FIELD, PET_SCHEMA_VERSION, USER_SCHEMA_VERSION, upgrade_pet
+from src.storage import JsonFileBackend
+from src.storage.upgrade import upgrade_all
+from src.user import User
+
+LEGACY_PET = {
+    'name': 'Old Rex', 'birthday': '2020-01-01', 'age': 3, 'sleep': False, 'energy': 50,
+    'hunger': 30, 'last_update': '2024-01-01T00:00:00'
+}
+LEGACY_USER = {'username': 'olduser', 'birthday': '1990-01-01', 'pets': ['Old Rex'], 'current_pet': 'Old Rex'}
+
+
+def test_legacy_records_upgrade_on_load():
+    pet = Pet.from_dict(LEGACY_PET)
+    assert (pet.fullness, pet.auto_sleep, pet.owner) == (70.0, False, None)
+    assert pet.to_dict()[SCHEMA_FIELD] == PET_SCHEMA_VERSION
+    assert Pet.from_dict(pet.to_dict()).to_dict() == pet.to_dict()
+
+    user = User.from_dict(LEGACY_USER)
+    assert user.pets == ({'name': 'Old Rex', 'filename': 'old_rex.json'},)
+    assert user.current_pet == 'old_rex.json'
+    assert user.to_dict()[SCHEMA_FIELD] == USER_SCHEMA_VERSION
+
+
+def test_current_records_need_every_field():
+    data = Pet("Rex").to_dict()
+    del data['auto_sleep']
+    with pytest.raises(KeyError):
+        Pet.from_dict(data)
+    with pytest.raises(ValueError):
+        upgrade_pet(dict(data, **{SCHEMA_FIELD: PET_SCHEMA_VERSION + 1}))
+
+
+def test_upgrade_all_rewrites_legacy_files(tmp_path):
+    data_dir = str(tmp_path / "data")
+    backend = JsonFileBackend(os.path.join(data_dir, "users"), os.path.join(data_dir, "pets"))
+    legacy_path = os.path.join(backend.pets_path, "old_rex.json")
+    backend.write_pet(legacy_path, json.dumps(LEGACY_PET).encode('utf-8'))
+    backend.write_pet(os.path.join(backend.pets_path, "broken.json"), b'{"name": "Broken"}')
+    backend.write_user("olduser", json.dumps(LEGACY_USER).encode('utf-8'))
+    backend.write_user("newuser", json.dumps(User("newuser").to_dict()).encode('utf-8'))
+
+    summary = upgrade_all(data_dir, dry_run=True, workers=1)
+    assert summary['pet']['upgraded'] == {1: 1} and len(summary['pet']['invalid']) == 1
+    assert summary['user'] == {'checked': 2, 'upgraded': {1: 1}, 'invalid': []}
+    diff = {key: lines for _, key, _, lines in summary['diffs']}[legacy_path]
+    assert "- hunger: 30" in diff and "+ fullness: 70.0" in diff
+    assert 'hunger' in json.loads(backend.read_pet(legacy_path))
+
+    upgrade_all(data_dir, workers=1)
+    assert json.loads(backend.read_pet(legacy_path))[SCHEMA_FIELD] == PET_SCHEMA_VERSION
+    assert json.loads(backend.read_user("olduser"))['current_pet'] == 'old_rex.json'
+    assert sum(upgrade_all(data_dir, dry_run=True, workers=1)['user']['upgraded'].values()) == 0
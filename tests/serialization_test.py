@@ -0,0 +1,41 @@
+import datetime
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pet import Pet
+from src.user import User
+from src.serialization import CODECS, detect_codec
+
+
+def make_pet():
+    pet = Pet("Mochi", owner="alice")
+    pet.sleep = True
+    pet.auto_sleep = True
+    pet.energy = 3.25
+    pet.fullness = 0.0
+    pet.last_update = datetime.datetime(2024, 5, 1, 9, 30, 15, 123456)
+    pet.sleep_start = datetime.datetime(2024, 5, 1, 9, 0, 0)
+    pet.energy_zero_since = datetime.datetime(2024, 5, 1, 9, 0, 0)
+    pet.fullness_zero_since = datetime.datetime(2024, 5, 1, 7, 45, 0, 500000)
+    return pet
+
+
+def test_every_codec_round_trips_pets():
+    for pet in (make_pet(), Pet("Ownerless")):
+        for name, codec in CODECS.items():
+            payload = codec.encode_pet(pet)
+            assert detect_codec(payload) is codec
+            assert codec.decode_pet(payload).to_dict() == pet.to_dict(), name
+
+
+def test_json_codecs_round_trip_users():
+    user = User("alice", "1990-02-03")
+    user.add_pet("mochi.json", "Mochi")
+    user.games_played = 4
+    for name in ('json', 'json-compact'):
+        payload = CODECS[name].encode_user(user)
+        assert detect_codec(payload) is CODECS[name]
+        assert CODECS[name].decode_user(payload).to_dict() == user.to_dict()
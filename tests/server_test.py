@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.config import PETS_PATH
+from src.data_handler import load_pet, load_user, save_pet
+from src.pet import Pet
+from src.storage import get_backend
+from src.server import GameServer, save_account
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Run in an empty directory with a fresh user index and leaderboards"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.user_index._index', None)
+    monkeypatch.setattr('src.leaderboard._leaderboards', None)
+
+
+async def talk(server, requests):
+    """Send requests on one connection to a running server and return the responses"""
+    reader, writer = await asyncio.open_unix_connection(server.socket_path)
+    responses = []
+    for request in requests:
+        line = request if isinstance(request, bytes) else json.dumps(request).encode('utf-8')
+        writer.write(line + b"\n")
+        await writer.drain()
+        responses.append(json.loads(await reader.readline()))
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+def run_server(tmp_path, scenario):
+    async def main():
+        game_server = GameServer(io_workers=2)
+        game_server.socket_path = str(tmp_path / "game.sock")
+        server = await game_server.start(unix_path=game_server.socket_path)
+        try:
+            return await scenario(game_server)
+        finally:
+            server.close()
+            await server.wait_closed()
+            game_server.close()
+    return asyncio.run(main())
+
+
+def test_names_cannot_escape_the_data_directory(tmp_path):
+    async def scenario(server):
+        logins = [
+            {'action': 'login', 'username': '../outside', 'birthday': '2000-01-01', 'pet_name': 'Mochi'},
+            {'action': 'login', 'username': 'meg', 'birthday': '2000-01-01', 'pet_name': '../../../escaped_pet'},
+            {'action': 'login', 'username': 'meg', 'birthday': '2000-01-01', 'pet_name': 'x' * 51},
+            {'action': 'login', 'username': ['meg'], 'birthday': '2000-01-01', 'pet_name': 'Mochi'},
+            {'action': 'login', 'username': 'meg', 'birthday': '2000-01-01', 'pet_name': 'a\\b'}
+        ]
+        return [(await talk(server, [login]))[0] for login in logins]
+
+    for response in run_server(tmp_path, scenario):
+        assert not response['ok']
+    assert not os.path.exists(tmp_path / "escaped_pet.json")
+    assert not os.path.exists(tmp_path / "data" / "outside.json")
+
+
+def test_bad_requests_get_error_responses(tmp_path):
+    async def scenario(server):
+        return await talk(server, [
+            {'action': 'login', 'username': 'meg', 'birthday': '2000-01-01', 'pet_name': 'Mochi'},
+            {'action': 'feed', 'food': [1]},
+            {'action': ['status']},
+            {'action': 'play', 'guesses': [[], {}, 1, None, 'l']},
+            b'not json',
+            {'action': 'status'}
+        ])
+
+    login, *errors, status = run_server(tmp_path, scenario)
+    assert login['ok'] and status['ok']
+    assert [response['ok'] for response in errors] == [False] * 4
+
+
+def test_relogin_during_logout_reuses_the_account(monkeypatch):
+    import src.server
+    saves = []
+
+    def slow_save(user, pet, pet_filename):
+        time.sleep(0.1)
+        saves.append(user.games_played)
+        save_account(user, pet, pet_filename)
+
+    monkeypatch.setattr(src.server, 'save_account', slow_save)
+    login = {'action': 'login', 'username': 'meg', 'birthday': '2000-01-01', 'pet_name': 'Mochi'}
+
+    async def main():
+        server = GameServer(io_workers=2)
+        account = await server.login(login)
+        await server.handle(account, {'action': 'play', 'guesses': ['l'] * 5})
+        logout = asyncio.create_task(server.logout(account))
+        await asyncio.sleep(0.05)  # The logout save is running
+        again = await server.login(login)
+        await logout
+        await server.handle(again, {'action': 'play', 'guesses': ['l'] * 5})
+        await server.logout(again)
+        server.close()
+        return account, again, server.accounts
+
+    account, again, accounts = asyncio.run(main())
+    assert again is account
+    assert accounts == {}
+    assert saves == [1, 2]
+    assert load_user("meg").games_played == 2
+
+
+def test_logout_writes_out_only_its_own_account():
+    login = {'action': 'login', 'username': 'meg', 'birthday': '2000-01-01', 'pet_name': 'Mochi'}
+    other = os.path.join(PETS_PATH, "bean.json")
+
+    async def main():
+        server = GameServer(io_workers=2)
+        account = await server.login(login)
+        # Another account's unsaved pet, sitting dirty in the cache
+        save_pet(Pet("Bean"), other, quiet=True)
+        await server.handle(account, {'action': 'save'})
+        # The cache holds a copy made on the event loop, not the live pet
+        assert load_pet(account.pet_filename, quiet=True) is not account.pet
+        await server.logout(account)
+        written = get_backend().read_pet(other) is not None
+        server.close()
+        return written
+
+    written = asyncio.run(main())
+    assert not written
+    assert get_backend().read_pet(other) is not None  # Closing the server flushes the rest
+    assert load_user("meg").username == "meg"
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.storage import JsonFileBackend, SqliteBackend
+from src.storage.migrate import migrate
+from src.storage.sharding import migrate_layout
+
+
+def check_backend(backend, pets_path):
+    fluffy = os.path.join(pets_path, "fluffy.json")
+    assert backend.read_pet(fluffy) is None
+    assert backend.read_user("alice") is None
+
+    backend.write_pet(fluffy, b'{"name": "Fluffy"}')
+    backend.write_user("alice", b'{"username": "alice"}')
+    backend.write_users([("bob", b'{"username": "bob"}')])
+
+    assert backend.read_pet(fluffy) == b'{"name": "Fluffy"}'
+    assert backend.read_user("alice") == b'{"username": "alice"}'
+    assert sorted(backend.list_users()) == ["alice", "bob"]
+    assert backend.list_pets() == ["fluffy.json"]
+    assert sorted(backend.iter_users()) == ["alice", "bob"]
+    assert list(backend.iter_pets()) == ["fluffy.json"]
+
+
+def test_json_file_backend(tmp_path):
+    backend = JsonFileBackend(str(tmp_path / "users"), str(tmp_path / "pets"))
+    check_backend(backend, str(tmp_path / "pets"))
+
+
+def test_sqlite_backend(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "game.db"))
+    check_backend(backend, str(tmp_path / "pets"))
+
+    with backend.batch():
+        backend.write_pet("rex.json", b'{"name": "Rex"}')
+        assert backend.read_pet("rex.json") == b'{"name": "Rex"}'
+    assert backend.list_pets() == ["fluffy.json", "rex.json"]
+
+    # A batch commits all or nothing: the failing user write rolls back the pet
+    with pytest.raises(sqlite3.IntegrityError):
+        with backend.batch():
+            backend.write_pet("max.json", b'{"name": "Max"}')
+            backend.write_user("carl", None)
+    assert backend.read_pet("max.json") is None
+    backend.close()
+
+
+def test_sqlite_iterates_keys_in_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.storage.sqlite.KEY_PAGE_SIZE', 2)
+    backend = SqliteBackend(str(tmp_path / "game.db"))
+    usernames = [f"user{i}" for i in range(5)]
+    backend.write_users([(username, b'{}') for username in usernames])
+
+    users = backend.iter_users()
+    assert next(users) == "user0"
+    # A write between pages doesn't block on, or get lost by, the iteration
+    backend.write_user("user9", b'{}')
+    assert list(users) == usernames[1:] + ["user9"]
+    backend.close()
+
+
+def test_migrate_imports_data_tree(tmp_path):
+    source = JsonFileBackend(str(tmp_path / "data" / "users"), str(tmp_path / "data" / "pets"))
+    check_backend(source, source.pets_path)
+
+    db_path = str(tmp_path / "game.db")
+    assert migrate(str(tmp_path / "data"), db_path) == (2, 1)
+
+    target = SqliteBackend(db_path)
+    assert target.read_user("bob") == b'{"username": "bob"}'
+    assert target.read_pet("fluffy.json") == b'{"name": "Fluffy"}'
+    target.close()
+
+
+def test_sharded_layout_reads_flat_records_and_migrates(tmp_path):
+    flat = JsonFileBackend(str(tmp_path / "users"), str(tmp_path / "pets"), shard_levels=0)
+    check_backend(flat, flat.pets_path)
+
+    sharded = JsonFileBackend(flat.users_path, flat.pets_path, shard_levels=2)
+    fluffy = os.path.join(flat.pets_path, "fluffy.json")
+    assert sharded.read_pet(fluffy) == b'{"name": "Fluffy"}'
+    sharded.write_user("alice", b'{"username": "alice", "v": 2}')
+    assert not os.path.exists(os.path.join(flat.users_path, "alice.json"))
+    assert sorted(sharded.list_users()) == ["alice", "bob"]
+    assert sorted(sharded.iter_users()) == ["alice", "bob"]
+
+    assert migrate_layout(flat.users_path, 2, report=None)['moved'] == 1
+    assert migrate_layout(flat.pets_path, 2, report=None)['moved'] == 1
+    assert flat.list_users() == [] and flat.list_pets() == []
+    assert sharded.read_user("alice") == b'{"username": "alice", "v": 2}'
+    assert sharded.read_user("bob") == b'{"username": "bob"}'
+    assert sharded.list_pets() == ["fluffy.json"]
+
+
+def test_default_layout_keeps_existing_flat_files_in_place(tmp_path):
+    users_path = tmp_path / "users"
+    users_path.mkdir()
+    (users_path / "bob.json").write_bytes(b'{"username": "bob"}')
+
+    backend = JsonFileBackend(str(users_path), str(tmp_path / "pets"))
+    backend.write_user("bob", b'{"username": "bob", "v": 2}')
+    assert (users_path / "bob.json").read_bytes() == b'{"username": "bob", "v": 2}'
+    assert [path.name for path in users_path.iterdir()] == ["bob.json"]
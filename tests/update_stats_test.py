@@ -0,0 +1,175 @@
+import datetime
+import itertools
+import math
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pet import Pet
+from src.config import (
+    MIN_STAT,
+    MAX_STAT,
+    SLEEP_RESTORATION_RATE,
+    SLEEP_FULLNESS_MULTIPLIER,
+    FULLNESS_DECREASE_RATE,
+    ENERGY_DECREASE_RATE
+)
+
+
+START = datetime.datetime(2024, 1, 1, 8, 0, 0)
+
+GAPS = [
+    0, 1, 59.5, 3600, 5760, 8640, 8640 * 3 + 17,
+    datetime.timedelta(days=1).total_seconds(),
+    datetime.timedelta(days=7).total_seconds(),
+    datetime.timedelta(days=30, hours=5).total_seconds(),
+    datetime.timedelta(days=365).total_seconds(),
+]
+
+# (sleep, auto_sleep, energy, fullness)
+STATES = [
+    (False, False, 20.0, 20.0),
+    (False, False, 100.0, 100.0),
+    (False, False, 0.0, 50.0),
+    (False, False, 10.0, 0.0),
+    (True, False, 50.0, 80.0),
+    (True, False, 100.0, 30.0),
+    (True, True, 0.0, 60.0),
+    (True, True, 7.5, 5.0),
+    (True, True, 15.0, 90.0),
+]
+
+
+def reference_update_stats(pet, now):
+    """The original step-by-step update_stats loop, kept as the reference model"""
+    elapsed_seconds = (now - pet.last_update).total_seconds()
+    old_fullness = pet.fullness
+    remaining_time = elapsed_seconds
+    current_time = pet.last_update
+
+    while remaining_time > 0:
+        fullness_multiplier = SLEEP_FULLNESS_MULTIPLIER if pet.sleep else 1.0
+        fullness_change = (remaining_time / FULLNESS_DECREASE_RATE) * fullness_multiplier
+        new_fullness = pet.fullness - fullness_change
+
+        if pet.sleep:
+            new_energy = pet.energy + remaining_time / SLEEP_RESTORATION_RATE
+        else:
+            new_energy = pet.energy - remaining_time / ENERGY_DECREASE_RATE
+
+        if not pet.sleep and new_energy <= MIN_STAT and pet.energy > MIN_STAT:
+            time_to_zero = pet.energy / (1.0 / ENERGY_DECREASE_RATE)
+            pet.fullness -= (time_to_zero / FULLNESS_DECREASE_RATE)
+            pet.energy = MIN_STAT
+            pet.energy_zero_since = current_time + datetime.timedelta(seconds=time_to_zero)
+            pet.sleep = True
+            pet.auto_sleep = True
+            pet.sleep_start = current_time + datetime.timedelta(seconds=time_to_zero)
+            remaining_time -= time_to_zero
+            current_time = pet.sleep_start
+            continue
+
+        wake_threshold = 10.0 if pet.auto_sleep else MAX_STAT
+        if pet.sleep and new_energy >= wake_threshold and pet.energy < wake_threshold:
+            time_to_wake = (wake_threshold - pet.energy) * SLEEP_RESTORATION_RATE
+            pet.fullness -= (time_to_wake / FULLNESS_DECREASE_RATE) * SLEEP_FULLNESS_MULTIPLIER
+            pet.energy = wake_threshold
+            pet.energy_zero_since = None
+            pet.sleep = False
+            pet.auto_sleep = False
+            pet.sleep_start = None
+            remaining_time -= time_to_wake
+            current_time += datetime.timedelta(seconds=time_to_wake)
+            continue
+
+        pet.fullness = new_fullness
+        pet.energy = new_energy
+        break
+
+    if old_fullness > MIN_STAT and pet.fullness <= MIN_STAT:
+        fullness_multiplier = SLEEP_FULLNESS_MULTIPLIER if pet.sleep else 1.0
+        fullness_rate = 1.0 / (FULLNESS_DECREASE_RATE * fullness_multiplier)
+        seconds_to_zero = old_fullness / fullness_rate
+        pet.fullness_zero_since = pet.last_update + datetime.timedelta(seconds=seconds_to_zero)
+    elif pet.fullness > MIN_STAT:
+        pet.fullness_zero_since = None
+
+    pet.fullness = max(MIN_STAT, min(MAX_STAT, pet.fullness))
+    pet.energy = max(MIN_STAT, min(MAX_STAT, pet.energy))
+    pet.last_update = now
+    pet.age = (now.date() - pet.birthday).days
+
+
+def make_pet(sleep, auto_sleep, energy, fullness):
+    """Build a pet in the given state, last updated at START"""
+    pet = Pet("Fluffy", owner="tester")
+    pet.birthday = START.date()
+    pet.sleep = sleep
+    pet.auto_sleep = auto_sleep
+    pet.sleep_start = START - datetime.timedelta(minutes=5) if sleep else None
+    pet.energy = energy
+    pet.fullness = fullness
+    pet.energy_zero_since = START - datetime.timedelta(minutes=5) if sleep and energy == 0 else None
+    pet.fullness_zero_since = START - datetime.timedelta(hours=1) if fullness == 0 else None
+    pet.last_update = START
+    return pet
+
+
+def assert_same_timestamp(actual, expected):
+    if expected is None:
+        assert actual is None
+    else:
+        assert actual is not None
+        assert abs((actual - expected).total_seconds()) < 1e-3
+
+
+def assert_equivalent(state, gap):
+    now = START + datetime.timedelta(seconds=gap)
+    fast = make_pet(*state)
+    slow = make_pet(*state)
+    fast.update_stats(now)
+    reference_update_stats(slow, now)
+
+    context = f"state={state} gap={gap}"
+    assert fast.sleep == slow.sleep, context
+    assert fast.auto_sleep == slow.auto_sleep, context
+    assert math.isclose(fast.fullness, slow.fullness, rel_tol=1e-9, abs_tol=1e-6), context
+    assert math.isclose(fast.energy, slow.energy, rel_tol=1e-9, abs_tol=1e-6), context
+    assert fast.last_update == slow.last_update, context
+    assert fast.age == slow.age, context
+    assert_same_timestamp(fast.sleep_start, slow.sleep_start)
+    assert_same_timestamp(fast.energy_zero_since, slow.energy_zero_since)
+    assert_same_timestamp(fast.fullness_zero_since, slow.fullness_zero_since)
+
+
+def test_update_stats_matches_reference_loop():
+    for state, gap in itertools.product(STATES, GAPS):
+        assert_equivalent(state, gap)
+
+
+def test_update_stats_matches_reference_over_ten_years():
+    ten_years = datetime.timedelta(days=3652).total_seconds()
+    for state in STATES:
+        assert_equivalent(state, ten_years)
+
+
+def test_update_stats_matches_reference_in_small_steps():
+    fast = make_pet(False, False, 20.0, 20.0)
+    slow = make_pet(False, False, 20.0, 20.0)
+    now = START
+    for _ in range(200):
+        now += datetime.timedelta(minutes=37)
+        fast.update_stats(now)
+        reference_update_stats(slow, now)
+        assert fast.sleep == slow.sleep
+        assert math.isclose(fast.energy, slow.energy, rel_tol=1e-9, abs_tol=1e-6)
+        assert_same_timestamp(fast.sleep_start, slow.sleep_start)
+
+
+if __name__ == "__main__":
+    test_update_stats_matches_reference_loop()
+    test_update_stats_matches_reference_over_ten_years()
+    test_update_stats_matches_reference_in_small_steps()
+    print("update_stats matches the reference loop")
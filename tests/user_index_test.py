@@ -0,0 +1,62 @@
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data_handler import user_exists
+from src.storage import get_backend
+from src.user_index import UserIndex, get_user_index
+
+
+def test_user_index_search_and_pages(tmp_path):
+    index = UserIndex(str(tmp_path), delta_limit=7)
+    index.rebuild(["carol", "alice"])
+    names = [f"user{i:03d}" for i in range(25)] + ["bob", "alicia"]
+    for name in names:
+        index.add(name)
+    index.add("bob")  # already indexed
+
+    everyone = sorted(names + ["carol", "alice"])
+    assert index.search(limit=100) == everyone
+    assert index.search("ali") == ["alice", "alicia"]
+    assert index.search("user", limit=5) == [f"user{i:03d}" for i in range(5)]
+    assert index.search("user", after="user004", limit=3) == ["user005", "user006", "user007"]
+    assert index.search("zed") == []
+
+    assert index.contains("alicia")
+    assert index.contains("carol")
+    assert not index.contains("dave")
+
+    # Reopening reads the same index back from disk
+    reopened = UserIndex(str(tmp_path), delta_limit=7)
+    assert reopened.search(limit=100) == everyone
+    assert reopened.contains("user024")
+
+
+def add_users(path, prefix):
+    index = UserIndex(path, delta_limit=5)
+    for i in range(30):
+        index.add(f"{prefix}{i:02d}")
+
+
+def test_processes_sharing_the_index_keep_every_username(tmp_path):
+    path = str(tmp_path)
+    UserIndex(path).rebuild([])
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        list(executor.map(add_users, [path] * 3, ["a", "b", "c"]))
+
+    reopened = UserIndex(path)
+    assert len(reopened.search(limit=1000)) == 90
+    assert reopened.contains("b29")
+
+
+def test_user_exists_checks_storage_for_unindexed_users(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.user_index._index', None)
+    get_user_index()
+    # Written by something that bypassed the index
+    get_backend().write_user("ghost", b'{"username": "ghost"}')
+    assert user_exists("ghost")
+    assert not user_exists("nobody")
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.user import User
+
+
+def test_pet_collection():
+    user = User("meg")
+    user.add_pet("mochi.json", "Mochi")
+    user.add_pet("sir_bean.json")
+    user.add_pet("mochi.json", "Duplicate")  # already owned
+
+    assert user.current_pet == "mochi.json"
+    assert user.has_pet("sir_bean.json") and not user.has_pet("pip.json")
+    assert user.get_pet_name("sir_bean.json") == "sir bean"
+    assert [pet['name'] for pet in user.pets] == ["Mochi", "sir bean"]
+
+    before = user.pets
+    user.rename_pet("sir_bean.json", "Sir Bean")
+    assert user.get_pet_name("sir_bean.json") == "Sir Bean"
+    assert before[1]['name'] == "sir bean"
+    with pytest.raises(ValueError):
+        user.rename_pet("pip.json", "Pip")
+
+    user.remove_pet("mochi.json")
+    user.remove_pet("pip.json")  # not owned; nothing happens
+    assert user.current_pet == "sir_bean.json"
+    assert user.pets == ({'name': 'Sir Bean', 'filename': 'sir_bean.json'},)
+    assert User.from_dict(user.to_dict()).pets == user.pets
+
+    # The collection can only change through the methods above
+    assert isinstance(user.pets, tuple)
+    with pytest.raises(AttributeError):
+        user.pets.append({'name': 'Pip', 'filename': 'pip.json'})
+    with pytest.raises(TypeError):
+        user.add_pet(None)
@@ -0,0 +1,49 @@
+import random
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.games.which_way import play_rounds, score_game, guess_repeat, STRATEGIES
+
+
+def test_seeded_games_are_repeatable():
+    first = play_rounds(STRATEGIES['random'], random.Random(7))
+    second = play_rounds(STRATEGIES['random'], random.Random(7))
+    assert first == second
+    assert score_game(first['guesses'], first['answers']) == (first['correct'], first['won'])
+
+
+def test_strategies_see_previous_answers():
+    result = play_rounds(guess_repeat, random.Random(1), answers=['l', 'l', 'r', 'r', 'l'])
+    assert result['guesses'][1:] == ['l', 'l', 'r', 'r']
+    assert result['correct'] >= 2
+
+
+def test_monte_carlo_matches_exact_odds_for_any_worker_count():
+    pytest.importorskip("numpy")
+    from src.games.monte_carlo import run_monte_carlo, expected_win_rate
+
+    single = run_monte_carlo(200_000, seed=3, chunk_size=50_000)
+    pooled = run_monte_carlo(200_000, seed=3, chunk_size=50_000, workers=2)
+    assert single['distribution'] == pooled['distribution']
+    assert abs(single['win_rate'] - expected_win_rate()) < 0.01
+
+
+@pytest.mark.parametrize('arguments', [
+    ['--games', '0'],
+    ['--chunk-size', '0'],
+    ['--weights', '2', '-1'],
+    ['--weights', '0', '0'],
+])
+def test_monte_carlo_rejects_bad_arguments(arguments, monkeypatch):
+    pytest.importorskip("numpy")
+    from src.games import monte_carlo
+
+    monkeypatch.setattr(sys, 'argv', ['monte_carlo'] + arguments)
+    with pytest.raises(SystemExit) as exit_info:
+        monte_carlo.main()
+    assert exit_info.value.code == 2
@@ -0,0 +1,54 @@
+import datetime
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.clock import VirtualClock, use_clock
+from src.config import PETS_PATH
+from src.data_handler import load_pet, save_pet
+from src.pet import Pet
+from src.storage import get_backend
+from world_tick import run_world_tick
+
+START = datetime.datetime(2024, 1, 1, 8, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Run in an empty directory with fresh leaderboards"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('src.leaderboard._leaderboards', None)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_world_tick_updates_every_pet(workers):
+    clock = VirtualClock(START)
+    with use_clock(clock):
+        names = [f"pet{i}" for i in range(7)]
+        for name in names:
+            save_pet(Pet(name), os.path.join(PETS_PATH, f"{name}.json"), quiet=True)
+        get_backend().write_pet(os.path.join(PETS_PATH, "broken.json"), b"not a pet")
+        expected = Pet("expected")
+
+        now = clock.advance(hours=5)
+        expected.update_stats(now)
+
+        summary = run_world_tick(workers=workers, chunk_size=3, report=None)
+
+    assert summary['total'] == 8
+    assert summary['updated'] == 7
+    assert summary['failed'] == ["broken.json"]
+    for name in names:
+        pet = load_pet(os.path.join(PETS_PATH, f"{name}.json"), quiet=True)
+        assert pet.last_update == now
+        assert (pet.fullness, pet.energy, pet.sleep) == (expected.fullness, expected.energy, expected.sleep)
+
+
+def test_world_tick_rejects_bad_chunk_size():
+    with pytest.raises(ValueError):
+        run_world_tick(chunk_size=0, report=None)
@@ -0,0 +1,119 @@
+"""
+Simple Pet Game - World tick entry point.
+
+Brings every stored pet up to date without logging in as its owner.
+Pet files are split into chunks and processed across a pool of worker processes.
+
+Usage: python world_tick.py [--workers N] [--chunk-size N]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.config import PETS_PATH
+from src.data_handler import list_pets, load_pet, save_pet
+from src.leaderboard import get_leaderboards
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def tick_pets(pet_filenames):
+    """
+    Load, update and save a chunk of pets.
+
+    Args:
+        pet_filenames (list[str]): Pet filenames under PETS_PATH
+
+    Returns:
+        tuple[int, list[str]]: Number of pets updated and filenames that failed to load
+    """
+    updated = 0
+    failed = []
+    for pet_filename in pet_filenames:
+        filename = os.path.join(PETS_PATH, pet_filename)
+        pet = load_pet(filename, quiet=True)
+        if pet is None:
+            failed.append(pet_filename)
+            continue
+        pet.update_stats()
+        save_pet(pet, filename, quiet=True)
+        updated += 1
+    return updated, failed
+
+
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most size items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_world_tick(workers=None, chunk_size=DEFAULT_CHUNK_SIZE, report=print):
+    """
+    Update every stored pet in parallel.
+
+    Args:
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        chunk_size (int): Number of pets per task
+        report (callable | None): Called with a progress line after each chunk
+
+    Returns:
+        dict: Summary with 'total', 'updated', 'failed' and 'seconds'
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    # Rebuild missing leaderboards once here rather than in every worker
+    get_leaderboards()
+    pet_filenames = sorted(list_pets())
+    total = len(pet_filenames)
+    updated = 0
+    failed = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(tick_pets, chunk) for chunk in chunked(pet_filenames, chunk_size)]
+        for future in as_completed(futures):
+            chunk_updated, chunk_failed = future.result()
+            updated += chunk_updated
+            failed.extend(chunk_failed)
+            if report:
+                done = updated + len(failed)
+                elapsed = time.perf_counter() - start
+                rate = done / elapsed if elapsed > 0 else 0.0
+                report(f"{done}/{total} pets ({rate:.0f} pets/s)")
+
+    return {
+        'total': total,
+        'updated': updated,
+        'failed': failed,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def main(argv=None):
+    """
+    World tick entry point.
+
+    Args:
+        argv (list[str], optional): Command-line arguments
+    """
+    parser = argparse.ArgumentParser(description="Bring every stored pet up to date.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"pets per task (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--quiet', action='store_true', help="only print the final summary")
+    args = parser.parse_args(argv)
+
+    summary = run_world_tick(args.workers, args.chunk_size, report=None if args.quiet else print)
+
+    print("=" * 50)
+    print(f"Updated {summary['updated']}/{summary['total']} pets in {summary['seconds']:.2f}s")
+    for pet_filename in summary['failed']:
+        print(f">> Could not load {pet_filename}")
+    print("=" * 50)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())